@@ -0,0 +1,291 @@
+"""Micro and macro benchmarks of the yamb environments.
+
+Each benchmark is a function which sets up what it needs and returns (fn, ops) where fn is the callable to time
+and ops is how many operations (calls, steps, ...) a single call of fn performs. Benchmarks which start processes
+return (fn, ops, teardown) and the runner calls teardown once the timing is done.
+"""
+import numpy as np
+from typing import Callable, Dict, Tuple
+from yamb import YambEnv, FlattenGrid, ROW, COL, core
+
+Benchmark = Callable[[], tuple]
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str) -> Callable[[Benchmark], Benchmark]:
+    def register(fn: Benchmark) -> Benchmark:
+        BENCHMARKS[name] = fn
+        return fn
+    return register
+
+def sample_actions(masks: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Samples a uniformly random legal action for each row of masks
+
+    :param masks: (n, 108) action masks
+
+    :return: (n, 9) actions
+    """
+    masks = np.atleast_2d(masks)
+    priorities = np.where(masks, rng.random(masks.shape), -1.0)
+    sizes = [6, 6, 6, 6, 6, 6, 2, len(ROW), len(ROW) * len(COL)]
+    parts = np.split(priorities, np.cumsum(sizes)[:-1], axis=1)
+    return np.stack([part.argmax(axis=1) for part in parts], axis=1)
+
+def env_at_roll(roll_number: int, announce: bool = False) -> YambEnv:
+    """
+    :return: an environment part way through a game, on the given roll of its turn
+    """
+    env = YambEnv()
+    env.reset(seed=0)
+    rng = np.random.default_rng(0)
+    # play a few turns so that the grid isn't empty
+    for _ in range(3 * 10):
+        env.step(sample_actions(env.action_masks(), rng)[0])
+    for _ in range(roll_number):
+        action = sample_actions(env.action_masks(), rng)[0]
+        action[core.ACTION_ANNOUNCE_IDX] = int(announce)
+        env.step(action)
+    return env
+
+def step_phase(roll_number: int, action: np.ndarray, announce: bool = False) -> Tuple[Callable[[], None], int]:
+    env = env_at_roll(roll_number, announce)
+    snapshot = env.state.snapshot()
+    def fn():
+        env.state.restore(snapshot)
+        env.step(action)
+    return fn, 1
+
+
+@benchmark("single/reset")
+def bench_reset():
+    env = YambEnv()
+    env.reset(seed=0)
+    return env.reset, 1
+
+@benchmark("single/state_restore")
+def bench_state_restore():
+    # the step/* benchmarks restore the state before every step, subtract this to get the step on its own
+    env = env_at_roll(0)
+    snapshot = env.state.snapshot()
+    return lambda: env.state.restore(snapshot), 1
+
+@benchmark("single/step/keep")
+def bench_step_keep():
+    env = env_at_roll(1)
+    action = np.zeros(9, dtype=np.int64)
+    action[:6] = env.roll
+    action[0] = 0
+    return step_phase(1, action)
+
+@benchmark("single/step/announce")
+def bench_step_announce():
+    env = env_at_roll(0)
+    action = np.zeros(9, dtype=np.int64)
+    action[core.ACTION_ANNOUNCE_IDX] = 1
+    action[core.ACTION_ANNOUNCE_ROW_IDX] = int(np.flatnonzero(env.state.open_mask[COL.NAJAVA.value])[0])
+    return step_phase(0, action)
+
+@benchmark("single/step/fill")
+def bench_step_fill():
+    env = env_at_roll(2)
+    action = np.zeros(9, dtype=np.int64)
+    action[core.ACTION_ROW_COL_FILL_IDX] = int(np.flatnonzero(env.action_masks()[core.MASK_ROW_COL_FILL_IDX:])[0])
+    return step_phase(2, action)
+
+@benchmark("single/action_masks/keep")
+def bench_action_masks_keep():
+    env = env_at_roll(0)
+    return env.action_masks, 1
+
+@benchmark("single/action_masks/fill")
+def bench_action_masks_fill():
+    env = env_at_roll(2)
+    return env.action_masks, 1
+
+@benchmark("single/get_score")
+def bench_get_score():
+    env = env_at_roll(0)
+    return env.get_score, 1
+
+@benchmark("single/get_grid_square_value")
+def bench_get_grid_square_value():
+    roll = np.array([0, 0, 0, 2, 3, 0])
+    return lambda: YambEnv.get_grid_square_value(ROW.FULL.value, roll), 1
+
+@benchmark("single/flatten_grid_observation")
+def bench_flatten_grid_observation():
+    env = FlattenGrid(env_at_roll(0))
+    return lambda: env.observation(env.unwrapped.get_observation()), 1
+
+@benchmark("single/flatten_grid_observation/float32")
+def bench_flatten_grid_observation_float32():
+    env = FlattenGrid(env_at_roll(0), float32=True)
+    return lambda: env.observation(env.unwrapped.get_observation()), 1
+
+@benchmark("single/cell_values_observation")
+def bench_cell_values_observation():
+    from yamb.cell_values import CellValues
+    env = CellValues(FlattenGrid(env_at_roll(0)), expectations=True)
+    return lambda: env.observation(env.env.observation(env.unwrapped.get_observation())), 1
+
+@benchmark("single/episode")
+def bench_episode():
+    # steps of whole games with a random legal policy, including action masks
+    env = YambEnv()
+    env.reset(seed=0)
+    rng = np.random.default_rng(0)
+    def fn():
+        env.reset()
+        terminated = False
+        while not terminated:
+            _, _, terminated, _, _ = env.step(sample_actions(env.action_masks(), rng)[0])
+    return fn, 3 * len(ROW) * len(COL)
+
+def kernel_benchmarks() -> Dict[str, Tuple[Callable[[], object], Callable[[], object]]]:
+    """
+    :return: mapping of kernel name to a call of the kernel in yamb.kernels and the same call of the reference
+        implementation in YambEnv, YambState or core, on a game part way through
+    """
+    from yamb import kernels
+    env = env_at_roll(2)
+    state = env.state
+    grid, roll, meta = kernels.state_arrays(state)
+    row_col_fill = int(np.flatnonzero(env.action_masks()[core.MASK_ROW_COL_FILL_IDX:])[0])
+    fill = np.zeros(9, dtype=np.int64)
+    fill[core.ACTION_ROW_COL_FILL_IDX] = row_col_fill
+    dice = np.array([0, 1, 1, 1, 1, 1])
+    first = env_at_roll(0).state
+    first_arrays = kernels.state_arrays(first)
+    announce = np.zeros(9, dtype=np.int64)
+    announce[core.ACTION_ANNOUNCE_IDX] = 1
+    announce[core.ACTION_ANNOUNCE_ROW_IDX] = int(np.flatnonzero(first.open_mask[COL.NAJAVA.value])[-1])
+    full = np.array([0, 0, 0, 2, 3, 0])
+    snapshot = state.snapshot()
+    grid_before, roll_before, meta_before = grid.copy(), roll.copy(), meta.copy()
+
+    def apply():
+        grid[:], roll[:], meta[:] = grid_before, roll_before, meta_before
+        kernels.apply(grid, roll, meta, fill, dice)
+
+    def apply_reference():
+        state.restore(snapshot)
+        core.apply(state, fill, dice)
+
+    return {
+        "grid_square_value": (
+            lambda: kernels.grid_square_value(ROW.FULL.value, full),
+            lambda: YambEnv.get_grid_square_value(ROW.FULL.value, full),
+        ),
+        # the reference keeps a running score, so it is compared with summing the columns' scores
+        "score": (lambda: kernels.score(grid), lambda: sum(state.get_column_score(col) for col in range(len(COL)))),
+        "next_dolje": (lambda: kernels.next_dolje(grid), lambda: state._find_next_dolje(0)),
+        "next_gore": (lambda: kernels.next_gore(grid), lambda: state._find_next_gore(len(ROW) - 1)),
+        "need_to_announce": (lambda: kernels.need_to_announce(grid), lambda: core.need_to_announce(state)),
+        "fill_valid": (
+            lambda: kernels.fill_valid(grid, meta[2], meta[3], row_col_fill),
+            lambda: env.step_3_valid(row_col_fill, {}),
+        ),
+        "action_valid": (
+            lambda: kernels.action_valid(*first_arrays, announce),
+            lambda: core.check_action(first, announce),
+        ),
+        "apply": (apply, apply_reference),
+    }
+
+def kernel_benchmark(name: str, reference: bool) -> Benchmark:
+    def bench():
+        fn = kernel_benchmarks()[name][reference]
+        # compiles the kernel when numba is installed
+        fn()
+        return fn, 1
+    return bench
+
+for name in ["grid_square_value", "score", "next_dolje", "next_gore", "need_to_announce", "fill_valid", "action_valid", "apply"]:
+    benchmark(f"kernels/{name}")(kernel_benchmark(name, reference=False))
+    benchmark(f"kernels/{name}/reference")(kernel_benchmark(name, reference=True))
+
+def zobrist_benchmarks() -> Dict[str, Callable[[], object]]:
+    """
+    :return: mapping of name to a call of yamb.zobrist on a game part way through
+    """
+    from yamb import zobrist
+    state = env_at_roll(2).state
+    key = zobrist.state_key(state)
+    fill = np.zeros(9, dtype=np.int64)
+    fill[core.ACTION_ROW_COL_FILL_IDX] = int(np.flatnonzero(core.legal_actions(state)[core.MASK_ROW_COL_FILL_IDX:])[0])
+    dice = np.array([0, 1, 1, 1, 1, 1])
+    # rerolls every die
+    keep = np.zeros(9, dtype=np.int64)
+    keep_state = env_at_roll(1).state
+    table = zobrist.TranspositionTable(2 ** 16)
+    table.store(key, 1.0, 1)
+    return {
+        "state_key": lambda: zobrist.state_key(state),
+        "apply_fill": lambda: zobrist.apply(key, state, fill, dice),
+        "apply_keep": lambda: zobrist.apply(key, keep_state, keep, dice),
+        "table_get": lambda: table.get(key),
+        "table_store": lambda: table.store(key, 1.0, 1),
+    }
+
+def zobrist_benchmark(name: str) -> Benchmark:
+    def bench():
+        return zobrist_benchmarks()[name], 1
+    return bench
+
+for name in ["state_key", "apply_fill", "apply_keep", "table_get", "table_store"]:
+    benchmark(f"zobrist/{name}")(zobrist_benchmark(name))
+
+def vec_env_steps(vec_env, steps: int = 50) -> Tuple[Callable[[], None], int, Callable[[], None]]:
+    from sb3_contrib.common.maskable.utils import get_action_masks
+    rng = np.random.default_rng(0)
+    vec_env.seed(0)
+    vec_env.reset()
+    def fn():
+        for _ in range(steps):
+            vec_env.step(sample_actions(get_action_masks(vec_env), rng))
+    return fn, steps * vec_env.num_envs, vec_env.close
+
+def subproc_vec_env(num_envs: int) -> Benchmark:
+    def bench():
+        from stable_baselines3.common.env_util import make_vec_env
+        from stable_baselines3.common.vec_env import SubprocVecEnv
+        vec_env = make_vec_env(YambEnv, n_envs=num_envs, vec_env_cls=SubprocVecEnv, wrapper_class=FlattenGrid)
+        return vec_env_steps(vec_env, steps=20)
+    return bench
+
+def batched_vec_env(num_envs: int) -> Benchmark:
+    def bench():
+        from yamb import YambVecEnv
+        return vec_env_steps(YambVecEnv(num_envs))
+    return bench
+
+def shared_vec_env(num_envs: int, num_workers: int) -> Benchmark:
+    def bench():
+        from yamb.shared_vec_env import SharedMemoryVecEnv
+        return vec_env_steps(SharedMemoryVecEnv(num_envs, num_workers), steps=20)
+    return bench
+
+for n in [2, 4]:
+    benchmark(f"subproc/{n}/step")(subproc_vec_env(n))
+    benchmark(f"shared/{n}/step")(shared_vec_env(n, n))
+benchmark("shared/256/step")(shared_vec_env(256, 2))
+for n in [16, 256, 1024]:
+    benchmark(f"batched/{n}/step")(batched_vec_env(n))
+
+def agent_predict(name: str, num_envs: int = 1024) -> Benchmark:
+    def bench():
+        # decisions for games spread over every roll of a turn, in the FlattenGrid format
+        from yamb import YambVecEnv
+        from yamb.agents import make_agent
+        agent = make_agent(name)
+        vec_env = YambVecEnv(num_envs)
+        vec_env.seed(0)
+        vec_env.reset()
+        rng = np.random.default_rng(0)
+        vec_env.roll_number[:] = rng.integers(3, size=num_envs)
+        observation, masks = vec_env.get_observation(), vec_env.action_masks()
+        return lambda: agent.predict(observation, action_masks=masks), num_envs
+    return bench
+
+for name in ["greedy", "column", "lookahead"]:
+    benchmark(f"agents/{name}/predict")(agent_predict(name))
@@ -0,0 +1,104 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+import numpy as np
+from typing import Callable, Dict, List
+from benchmarks.env_benchmarks import BENCHMARKS
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+# benchmarks quicker than this in the baseline are compared with micro_tolerance, timer noise is a large part of them
+MICRO_NS = 1000
+
+
+def time_per_op(fn: Callable[[], None], ops: int, repeat: int, min_time: float) -> float:
+    """Times fn and keeps the best of repeat runs, each of which lasts at least min_time seconds
+
+    :return: nanoseconds per operation
+    """
+    timer = timeit.Timer(fn)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed == 0 else max(2, int(min_time / elapsed) + 1)
+    best = min([elapsed] + timer.repeat(repeat=repeat - 1, number=number))
+    return best / (number * ops) * 1e9
+
+def run(names: List[str], repeat: int, min_time: float) -> Dict[str, dict]:
+    results = {}
+    for name in names:
+        fn, ops, *teardown = BENCHMARKS[name]()
+        try:
+            ns = time_per_op(fn, ops, repeat, min_time)
+        finally:
+            for close in teardown:
+                close()
+        results[name] = {"ns_per_op": round(ns, 1), "ops_per_sec": round(1e9 / ns, 1)}
+        print(f"{name:40s} {ns:14,.1f} ns/op {1e9 / ns:14,.0f} ops/s", flush=True)
+    return results
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float, micro_tolerance: float) -> List[str]:
+    """
+    :param tolerance: fraction by which a benchmark may be slower than the baseline, e.g. 0.25 for 25%
+    :param micro_tolerance: the tolerance for benchmarks which take less than MICRO_NS in the baseline
+
+    :return: names of the benchmarks which regressed
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        allowed = micro_tolerance if baseline[name]["ns_per_op"] < MICRO_NS else tolerance
+        ratio = result["ns_per_op"] / baseline[name]["ns_per_op"]
+        status = "REGRESSION" if ratio > 1 + allowed else "ok"
+        print(f"{name:40s} {ratio:6.2f}x baseline time  {status}")
+        if ratio > 1 + allowed:
+            regressions.append(name)
+    return regressions
+
+def main(args):
+    names = [name for name in BENCHMARKS if args.filter is None or args.filter in name]
+    results = run(names, args.repeat, args.min_time)
+
+    if args.save:
+        baseline = {
+            "machine": {
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+            },
+            "results": results,
+        }
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=4)
+        print(f"Saved baseline to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --save to create one")
+        return
+
+    with open(args.baseline, "r") as f:
+        baseline = json.load(f)
+    print()
+    regressions = compare(results, baseline["results"], args.tolerance, args.micro_tolerance)
+    if regressions:
+        print(f"{len(regressions)} benchmarks regressed by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the yamb environments and compare against a baseline")
+    parser.add_argument("--filter", type=str, default=None, help="Only run benchmarks whose name contains this e.g. single/")
+    parser.add_argument("--baseline", type=str, default=DEFAULT_BASELINE, help="Path to the baseline json file")
+    parser.add_argument("--save", action="store_true", help="Save the results as the new baseline instead of comparing")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Fraction slower than the baseline which counts as a regression")
+    parser.add_argument("--micro_tolerance", type=float, default=1.0, help=f"Tolerance for benchmarks quicker than {MICRO_NS}ns")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of timing runs, the best one is kept")
+    parser.add_argument("--min_time", type=float, default=0.2, help="Minimum seconds per timing run")
+    args = parser.parse_args()
+    main(args)
@@ -1,20 +1,26 @@
 import argparse
-from yamb import YambEnv, FlattenGrid
-from sb3_contrib import MaskablePPO
-from sb3_contrib.common.maskable.evaluation import evaluate_policy
+from yamb.agents import AGENTS
+from yamb.evaluation import evaluate
 
 
 def main(args):
-    model = MaskablePPO.load(f"models/{args.model_name}")
-    env = YambEnv()
-    # Comment / uncomment the line below if you need the grid to be flattened
-    env = FlattenGrid(env)
-    mean_reward, std_reward = evaluate_policy(model, env, n_eval_episodes=args.episodes, warn=False)
-    print(f"Mean reward: {mean_reward}, Std reward: {std_reward}")
+    model_path = None if args.agent else f"models/{args.model_name}"
+    summary = evaluate(
+        args.episodes, agent=args.agent, model_path=model_path, num_envs=args.num_envs, workers=args.workers, seed=args.seed,
+    )
+    print(f"Mean reward: {summary['mean']}, Std reward: {summary['std']}")
+    print(f"Min: {summary['min']}, Max: {summary['max']}, Truncations: {summary['truncations']} of {summary['games']} games")
+    print("Quantiles: " + ", ".join(f"{q:.0%}: {v}" for q, v in summary["quantiles"].items()))
+    print(f"Throughput: {summary['games_per_sec']:,.1f} games/s, {summary['steps_per_sec']:,.0f} steps/s over {summary['seconds']:.1f}s")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Evaluate how yambot plays over a certain number of episodes")
-    parser.add_argument("--model_name", type=str, required=True, help="Specify the model name e.g. model_default")
+    players = parser.add_mutually_exclusive_group(required=True)
+    players.add_argument("--model_name", type=str, help="Specify the model name e.g. model_default")
+    players.add_argument("--agent", type=str, choices=list(AGENTS), help="Play a rule based agent from yamb.agents instead of a model")
     parser.add_argument("--episodes", type=int, required=True, help="Number of games which yambot should play")
+    parser.add_argument("--num_envs", type=int, default=64, help="The number of games each worker steps together, batching the model across them")
+    parser.add_argument("--workers", type=int, default=1, help="The number of processes to split the games between")
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the dice, for reproducible runs")
     args = parser.parse_args()
-    main(args)
\ No newline at end of file
+    main(args)
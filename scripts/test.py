@@ -2,13 +2,26 @@ import pygame
 import argparse
 from yamb import YambEnv, FlattenGrid
 import time
+from yamb.agents import AGENTS, make_agent
+from yamb.game_log import GameLogRecorder
+from yamb.search import Planner, RolloutEvaluator, ValueEvaluator
+from yamb.zobrist import TranspositionTable
 from sb3_contrib import MaskablePPO
 from sb3_contrib.common.maskable.utils import get_action_masks
 
 def main(args):
-    model = MaskablePPO.load(f"models/{args.model_name}")
+    model = make_agent(args.agent) if args.agent else MaskablePPO.load(f"models/{args.model_name}")
+    if args.search:
+        # the agent plays the rollouts, a model's value network estimates the leaves instead
+        evaluator = (
+            RolloutEvaluator(args.agent, args.search_horizon, args.search_workers) if args.agent else ValueEvaluator(model)
+        )
+        table = TranspositionTable(args.search_table) if args.search_table else None
+        model = Planner(evaluator, max_nodes=args.search_nodes, max_seconds=args.search_seconds, table=table)
     try:
         env = YambEnv()
+        if args.log_dir:
+            env = GameLogRecorder(env, args.log_dir)
         # Comment / uncomment the line below if you need the grid to be flattened
         env = FlattenGrid(env)
         obs, _ = env.reset()
@@ -24,6 +37,8 @@ def main(args):
         # This will pause the notebook and wait for the user to press Enter
         input("Press Enter to continue...")
         env.close()
+        if args.search:
+            model.close()
     except Exception as e:
         print(f"An error occurred: {e}")
         pygame.quit()
@@ -31,6 +46,15 @@ def main(args):
     
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Watch a yambot play as a test")
-    parser.add_argument("--model_name", type=str, required=True, help="specify the model name e.g. model_default")
+    players = parser.add_mutually_exclusive_group(required=True)
+    players.add_argument("--model_name", type=str, help="specify the model name e.g. model_default")
+    players.add_argument("--agent", type=str, choices=list(AGENTS), help="watch a rule based agent from yamb.agents instead of a model")
+    parser.add_argument("--log_dir", type=str, default=None, help="record the game to this directory, see yamb.game_log")
+    parser.add_argument("--search", action="store_true", help="play by searching each turn with yamb.search, estimating the leaves with rollouts of the agent or the model's value network")
+    parser.add_argument("--search_seconds", type=float, default=1.0, help="seconds of search per move")
+    parser.add_argument("--search_nodes", type=int, default=None, help="the most leaf evaluations per move")
+    parser.add_argument("--search_horizon", type=int, default=4, help="turns each rollout plays before estimating the rest of the game")
+    parser.add_argument("--search_workers", type=int, default=1, help="number of processes playing the rollouts")
+    parser.add_argument("--search_table", type=int, default=2 ** 16, help="entries of the transposition table of leaf estimates, 0 for none")
     args = parser.parse_args()
     main(args)
\ No newline at end of file
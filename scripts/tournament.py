@@ -0,0 +1,33 @@
+import argparse
+from yamb.agents import AGENTS
+from yamb.tournament import run_tournament, format_result
+
+
+def main(args):
+    specs = {name: (None, f"models/{name}") for name in args.models}
+    specs.update({f"agent:{name}": (name, None) for name in args.agents})
+    result = run_tournament(
+        specs,
+        max_games=args.games,
+        batch_games=args.batch,
+        seed=args.seed,
+        num_envs=args.num_envs,
+        workers=args.workers,
+        confidence=args.confidence,
+        on_round=lambda result: print(format_result(result) + "\n", flush=True),
+    )
+    if not result["settled"]:
+        print(f"The ranking was not settled after {result['games']} games")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank models and agents by playing them on the same dice")
+    parser.add_argument("--models", type=str, nargs="*", default=[], help="Model names in models/ e.g. model_default model_default_azure")
+    parser.add_argument("--agents", type=str, nargs="*", default=[], choices=list(AGENTS), help="Rule based agents from yamb.agents")
+    parser.add_argument("--games", type=int, default=10000, help="Most games each player plays")
+    parser.add_argument("--batch", type=int, default=256, help="Games played between checks whether the ranking is settled")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the dice tapes")
+    parser.add_argument("--num_envs", type=int, default=64, help="The number of games each worker steps together")
+    parser.add_argument("--workers", type=int, default=1, help="The number of processes to split the games between")
+    parser.add_argument("--confidence", type=float, default=0.95, help="Chance that the whole ranking is right when it stops early")
+    args = parser.parse_args()
+    main(args)
@@ -4,18 +4,26 @@ import json
 from stable_baselines3.common.env_checker import check_env
 from sb3_contrib import MaskablePPO
 from sb3_contrib.common.maskable.evaluation import evaluate_policy
-from stable_baselines3.common.vec_env import SubprocVecEnv
+from stable_baselines3.common.vec_env import SubprocVecEnv, VecEnv
 from stable_baselines3.common.env_util import make_vec_env
-from yamb import YambEnv, FlattenGrid
-import mlflow
+from yamb import YambEnv, FlattenGrid, YambVecEnv, SharedMemoryVecEnv
+from yamb.agents import AGENTS
+from yamb.behavior_cloning import behavior_clone
 
-def create_vec_env(num_envs: int) -> SubprocVecEnv:
+def create_vec_env(num_envs: int, batched: bool = False, workers: int = 0) -> VecEnv:
     """Create a vectorized yamb environment
     
     :param num_envs: number of environments you want to train in parallel
+    :param batched: whether to step all the environments in a single process with YambVecEnv
+    :param workers: if positive split the environments between this many processes with SharedMemoryVecEnv
     
     :return: vectorized environment
     """
+    if workers > 0:
+        return SharedMemoryVecEnv(num_envs, workers, flatten_grid=True)
+    if batched:
+        return YambVecEnv(num_envs, flatten_grid=True)
+    
     def mask_fn(e): return e.action_masks()
     # here you specify whether or not to flatten the grid in the environment
     # remember if you flatten the grid in the environment, the test.py will need to reflect this
@@ -50,7 +58,7 @@ def reset():
         
 
 def main(args):
-    vec_env = create_vec_env(args.num_envs)
+    vec_env = create_vec_env(args.num_envs, args.batched, args.workers)
     
     if args.reset:
         reset()
@@ -61,6 +69,12 @@ def main(args):
     if config["episodes_trained"] == 0:
         print("Creating new model ...")
         model = MaskablePPO("MultiInputPolicy", vec_env, verbose=1, **config["params"], tensorboard_log="logs/")
+        if args.pretrain_games > 0:
+            print(f"Pretraining on {args.pretrain_games} games of the {args.pretrain_agent} agent ...")
+            behavior_clone(
+                model, args.pretrain_agent, args.pretrain_games, workers=args.pretrain_workers,
+                on_shard=lambda i, loss: print(f"shard {i} loss {loss:.3f}"),
+            )
     else:
         print("Loading model ...")
         model = MaskablePPO.load(f"models/{config["model_name"]}")
@@ -69,6 +83,8 @@ def main(args):
     episode_length = 168
     
     if args.azure:
+        # mlflow is only needed to log to azure so don't import it otherwise
+        import mlflow
         mlflow.start_run()
     
     # train for an extra args.episodes
@@ -98,5 +114,10 @@ if __name__ == "__main__":
     parser.add_argument("--reset", type=bool, default=False, help="If you include this flag resets the config and wipes the logs")
     parser.add_argument("--azure", type=bool, default=False, help="If you include this flag use mlflow to log in azure")
     parser.add_argument("--num_envs", type=int, default=4, help="The number of parallel vector environments you want")
+    parser.add_argument("--batched", type=bool, default=False, help="If you include this flag step all the environments in one process with YambVecEnv")
+    parser.add_argument("--workers", type=int, default=0, help="Split the environments between this many processes with SharedMemoryVecEnv")
+    parser.add_argument("--pretrain_games", type=int, default=0, help="Before training a new model imitate this many games of --pretrain_agent, see yamb.behavior_cloning")
+    parser.add_argument("--pretrain_agent", type=str, default="column", choices=list(AGENTS), help="The agent from yamb.agents to imitate")
+    parser.add_argument("--pretrain_workers", type=int, default=1, help="The number of processes generating games to imitate")
     args = parser.parse_args()
     main(args)
\ No newline at end of file
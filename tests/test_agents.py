@@ -0,0 +1,71 @@
+import unittest
+import numpy as np
+from yamb import YambEnv, FlattenGrid, core
+from yamb.yamb_vec_env import YambVecEnv
+from yamb.agents import AGENTS, Agent, make_agent, decode_observation, fill_targets
+from sb3_contrib.common.maskable.evaluation import evaluate_policy
+from benchmarks.env_benchmarks import sample_actions
+
+class TestAgents(unittest.TestCase):
+    def test_decode_observation(self):
+        env = YambEnv()
+        observation, _ = env.reset(seed=0)
+        games = decode_observation(observation)
+        flattened = decode_observation(core.flatten_observation(dict(observation)))
+        for key, value in games.items():
+            np.testing.assert_array_equal(value, flattened[key])
+        np.testing.assert_array_equal(env.grid[None], games["grid"])
+        np.testing.assert_array_equal(env.roll[None], games["roll"])
+        self.assertEqual((1,), games["roll_number"].shape)
+
+    def test_fill_targets(self):
+        vec_env = YambVecEnv(16, flatten_grid=False)
+        vec_env.seed(0)
+        observation = vec_env.reset()
+        rng = np.random.default_rng(0)
+        for _ in range(200):
+            targets = fill_targets(decode_observation(observation))
+            np.testing.assert_array_equal(vec_env.fill_masks(), targets.transpose(0, 2, 1).reshape(16, -1))
+            observation, _, _, _ = vec_env.step(sample_actions(vec_env.action_masks(), rng))
+
+    def test_full_games(self):
+        for name in AGENTS:
+            agent = make_agent(name)
+            env = FlattenGrid(YambEnv())
+            observation, _ = env.reset(seed=0)
+            terminated = False
+            while not terminated:
+                action, state = agent.predict(observation, action_masks=env.unwrapped.action_masks())
+                self.assertIsNone(state)
+                self.assertEqual((9,), action.shape)
+                observation, reward, terminated, truncated, info = env.step(action)
+                self.assertFalse(truncated, msg=f"{name}: {info.get('truncation_reason')}")
+            self.assertEqual(0, env.unwrapped.state.open_cells)
+
+    def test_batched_matches_single(self):
+        vec_env = YambVecEnv(8)
+        vec_env.seed(1)
+        observation = vec_env.reset()
+        for name in AGENTS:
+            agent = make_agent(name)
+            for _ in range(20):
+                masks = vec_env.action_masks()
+                actions, _ = agent.predict(observation, action_masks=masks)
+                for i in range(vec_env.num_envs):
+                    single, _ = agent.predict({key: value[i] for key, value in observation.items()}, action_masks=masks[i])
+                    np.testing.assert_array_equal(single, actions[i])
+                observation, _, dones, _ = vec_env.step(actions)
+                self.assertFalse(dones.any())
+
+    def test_evaluate_policy(self):
+        mean_reward, _ = evaluate_policy(make_agent("greedy"), FlattenGrid(YambEnv()), n_eval_episodes=2, warn=False)
+        self.assertGreater(mean_reward, 0)
+
+    def test_make_agent(self):
+        with self.assertRaises(ValueError):
+            make_agent("random")
+
+    def test_agent_is_abstract(self):
+        # an agent has to choose its keeps
+        with self.assertRaises(TypeError):
+            Agent()
@@ -0,0 +1,45 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from yamb import core
+from yamb.behavior_cloning import active_parts, behavior_clone, generate_shard, load_shard, stream_shards
+from yamb.yamb_vec_env import YambVecEnv
+
+class TestBehaviorCloning(unittest.TestCase):
+    def test_generate_shard(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = generate_shard("greedy", num_games=3, num_envs=2, seed=0, path=os.path.join(directory, "shard"))
+            observations, masks, actions = load_shard(path)
+            self.assertEqual((3 * 168, 9), actions.shape)
+            self.assertEqual((3 * 168, core.MASK_SIZE), masks.shape)
+            self.assertEqual(np.float32, observations["grid"].dtype)
+            self.assertIsInstance(actions, np.memmap)
+            # every active part of every action is legal
+            offsets = np.concatenate([[0], np.cumsum([6] * 6 + [2, 14])])
+            active = active_parts(np.asarray(masks), np.asarray(actions))
+            legal = masks[np.arange(len(actions))[:, None], offsets + actions]
+            self.assertTrue(np.all(legal | ~active))
+            # three games each with three rolls a turn
+            np.testing.assert_array_equal(np.bincount(observations["roll_number"]), [3 * 56] * 3)
+
+    def test_stream_shards(self):
+        with tempfile.TemporaryDirectory() as directory:
+            paths = list(stream_shards("greedy", 5, directory, games_per_shard=2, num_envs=2, workers=2, seed=0))
+            self.assertEqual([os.path.join(directory, f"shard-{i:05d}") for i in range(3)], paths)
+            self.assertEqual([2 * 168, 2 * 168, 168], [len(load_shard(path)[2]) for path in paths])
+
+    def test_active_parts(self):
+        masks = np.zeros((2, core.MASK_SIZE), dtype=np.bool_)
+        masks[:, :core.MASK_ANNOUNCE_IDX] = True
+        masks[:, core.MASK_ANNOUNCE_IDX:core.MASK_ROW_COL_FILL_IDX] = True
+        actions = np.zeros((2, 9), dtype=np.int64)
+        actions[1, core.ACTION_ANNOUNCE_IDX] = 1
+        np.testing.assert_array_equal([[True] * 7 + [False, False], [True] * 8 + [False]], active_parts(masks, actions))
+
+    def test_behavior_clone(self):
+        from sb3_contrib import MaskablePPO
+        model = MaskablePPO("MultiInputPolicy", YambVecEnv(2, float32=True), learning_rate=1e-3, seed=0)
+        losses = behavior_clone(model, "greedy", num_games=8, games_per_shard=2, num_envs=2, batch_size=64, seed=0)
+        self.assertEqual(4, len(losses))
+        self.assertLess(losses[-1], losses[0])
@@ -0,0 +1,27 @@
+import unittest
+import numpy as np
+from yamb import core
+from benchmarks.env_benchmarks import BENCHMARKS, sample_actions, env_at_roll
+from benchmarks.run import compare
+
+class TestBenchmarks(unittest.TestCase):
+    def test_sample_actions(self):
+        rng = np.random.default_rng(0)
+        for roll_number in range(3):
+            env = env_at_roll(roll_number)
+            for _ in range(20):
+                action = sample_actions(env.action_masks(), rng)[0]
+                self.assertIsNone(core.check_action(env.state, action))
+
+    def test_single_benchmarks_run(self):
+        for name, bench in BENCHMARKS.items():
+            if name.startswith("single/"):
+                fn, ops, *teardown = bench()
+                fn()
+                self.assertEqual([], teardown)
+                self.assertGreater(ops, 0)
+
+    def test_compare(self):
+        baseline = {"a": {"ns_per_op": 1e4}, "b": {"ns_per_op": 1e4}, "c": {"ns_per_op": 100.0}, "d": {"ns_per_op": 100.0}}
+        results = {"a": {"ns_per_op": 1.2e4}, "b": {"ns_per_op": 1.3e4}, "c": {"ns_per_op": 150.0}, "d": {"ns_per_op": 250.0}, "e": {"ns_per_op": 1.0}}
+        self.assertEqual(["b", "d"], compare(results, baseline, tolerance=0.25, micro_tolerance=1.0))
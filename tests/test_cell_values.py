@@ -0,0 +1,60 @@
+import unittest
+import numpy as np
+from stable_baselines3.common.env_checker import check_env
+from yamb import core, score_table, solver
+from yamb.cell_values import CellValues, SCALE
+from yamb.flatten_grid import FlattenGrid
+from yamb.yamb_env import YambEnv
+from yamb.row_enum import ROW
+from yamb.col_enum import COL
+from tests.test_core import sample_legal_action
+
+class TestCellValues(unittest.TestCase):
+    def test_check_env(self):
+        check_env(CellValues(YambEnv(), expectations=True))
+        check_env(CellValues(FlattenGrid(YambEnv(), float32=True), expectations=True))
+
+    def test_random_games(self):
+        env = CellValues(FlattenGrid(YambEnv()), expectations=True)
+        observation, _ = env.reset(seed=0)
+        rng = np.random.default_rng(0)
+        for _ in range(3 * len(ROW) * len(COL)):
+            state = env.unwrapped.state
+            idx = score_table.roll_to_index(state.roll)
+            targets = core.fill_targets(state).reshape(-1)
+            rows = np.arange(len(ROW) * len(COL)) % len(ROW)
+            _, row_values = solver.row_tables(solver.MAX_REROLLS - state.roll_number)
+            np.testing.assert_array_equal(-1, observation["cell_values"][~targets])
+            np.testing.assert_array_equal(-1, observation["cell_expectations"][~targets])
+            values = score_table.SCORE_TABLE[idx, rows[targets]] / SCALE
+            np.testing.assert_allclose(values, observation["cell_values"][targets])
+            np.testing.assert_allclose(row_values[rows[targets], idx] / SCALE, observation["cell_expectations"][targets])
+            mask = env.unwrapped.action_masks()
+            if state.roll_number == 2:
+                # on the last roll the grid squares are the ones which can be filled out
+                np.testing.assert_array_equal(mask[core.MASK_ROW_COL_FILL_IDX:], targets)
+                np.testing.assert_array_equal(observation["cell_values"], observation["cell_expectations"])
+            observation, _, terminated, truncated, _ = env.step(sample_legal_action(mask, rng))
+            self.assertFalse(truncated)
+        self.assertTrue(terminated)
+
+    def test_fill_targets(self):
+        env = YambEnv()
+        env.reset(seed=0)
+        targets = core.fill_targets(env.state)
+        # the first dolje and last gore squares, every slobodno square and by announcing every najava square
+        self.assertEqual(2 + 2 * len(ROW), targets.sum())
+        self.assertTrue(targets[COL.NAJAVA.value].all())
+        action = np.zeros(9, dtype=np.int64)
+        action[core.ACTION_ANNOUNCE_IDX] = 1
+        action[core.ACTION_ANNOUNCE_ROW_IDX] = ROW.FULL.value
+        env.step(action)
+        targets = core.fill_targets(env.state)
+        self.assertEqual(1, targets.sum())
+        self.assertTrue(targets[COL.NAJAVA.value, ROW.FULL.value])
+
+    def test_dtype(self):
+        env = CellValues(FlattenGrid(YambEnv(), float32=True))
+        observation, _ = env.reset(seed=0)
+        self.assertEqual(np.float32, observation["cell_values"].dtype)
+        self.assertNotIn("cell_expectations", observation)
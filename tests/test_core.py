@@ -0,0 +1,103 @@
+import unittest
+import numpy as np
+from yamb import core
+from yamb.yamb_state import YambState
+from yamb.row_enum import ROW
+from yamb.col_enum import COL
+
+def sample_legal_action(mask: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    action = np.zeros(9, dtype=np.int64)
+    for i, part in enumerate(np.split(mask, np.cumsum([6, 6, 6, 6, 6, 6, 2, len(ROW)]))):
+        if part.any():
+            action[i] = rng.choice(np.flatnonzero(part))
+    return action
+
+class TestCore(unittest.TestCase):
+    def test_random_game(self):
+        rng = np.random.default_rng(0)
+        state = core.new_game(rng)
+        self.assertEqual(5, state.roll.sum())
+        steps = 0
+        while not core.is_terminal(state):
+            mask = core.legal_actions(state)
+            self.assertIsNone(core.step(state, sample_legal_action(mask, rng), rng))
+            steps += 1
+        self.assertEqual(3 * len(ROW) * len(COL), steps)
+        self.assertEqual(0, state.num_open_cells)
+        self.assertEqual(0, state.open_cells)
+        
+        other = YambState()
+        other.set_grid(state.grid)
+        self.assertEqual(core.score(other), core.score(state))
+        
+    def test_legal_actions_match_check_action(self):
+        rng = np.random.default_rng(1)
+        state = core.new_game(rng)
+        buffer = np.zeros(core.MASK_SIZE, dtype=np.bool_)
+        while not core.is_terminal(state):
+            mask = core.legal_actions(state, out=buffer)
+            self.assertIs(buffer, mask)
+            if state.roll_number == 2:
+                for row_col_fill in range(len(ROW) * len(COL)):
+                    self.assertEqual(mask[core.MASK_ROW_COL_FILL_IDX + row_col_fill], core.check_fill(state, row_col_fill) is None)
+            else:
+                # any action outside the mask is rejected
+                action = sample_legal_action(mask, rng)
+                bad = action.copy()
+                bad[0] = state.roll[0] + 1
+                self.assertIsNotNone(core.check_action(state, bad))
+            core.step(state, sample_legal_action(mask, rng), rng)
+        
+    def test_apply_with_explicit_dice(self):
+        state = YambState()
+        state.roll[:] = [0, 0, 0, 0, 2, 3]
+        snapshot = state.snapshot()
+        
+        # keep the three 6s, announce yamb and roll two more 6s
+        action = np.array([0, 0, 0, 0, 0, 3, 1, ROW.YAMB.value, 0])
+        self.assertEqual(2, core.num_dice_to_roll(state, action))
+        core.apply(state, action, np.array([0, 0, 0, 0, 0, 2]))
+        np.testing.assert_array_equal([0, 0, 0, 0, 0, 5], state.roll)
+        self.assertEqual(1, state.announced)
+        
+        action = np.array([0, 0, 0, 0, 0, 5, 0, 0, 0])
+        core.apply(state, action, np.zeros(6, dtype=np.int64))
+        action = np.array([0, 0, 0, 0, 0, 0, 0, 0, core.convert_row_fill_col_fill(ROW.YAMB.value, COL.NAJAVA.value)])
+        self.assertIsNone(core.check_action(state, action))
+        core.apply(state, action, np.array([1, 1, 1, 1, 1, 0]))
+        self.assertEqual(60 + 30, core.score(state))
+        self.assertEqual(1, state.turn_number)
+        np.testing.assert_array_equal([1, 1, 1, 1, 1, 0], state.roll)
+        
+        # the snapshot is untouched
+        self.assertEqual(0, core.score(snapshot))
+        np.testing.assert_array_equal([0, 0, 0, 0, 2, 3], snapshot.roll)
+        
+    def test_flatten_observation(self):
+        state = YambState()
+        observation = core.flatten_observation(core.observation(state))
+        self.assertEqual((len(ROW) * len(COL),), observation["grid"].shape)
+        np.testing.assert_array_equal(-1.0, observation["grid"])
+        np.testing.assert_array_equal(-0.2, observation["roll"])
+
+    def test_flatten_observation_out(self):
+        state = YambState()
+        state.grid[ROW.YAMB.value, COL.DOLJE.value] = 80
+        state.roll[:] = [0, 1, 2, 0, 1, 1]
+        observation = core.observation(state)
+        expected = core.flatten_observation(observation)
+        # the observation is left alone, so it still aliases the state
+        self.assertIs(state.grid, observation["grid"])
+        out = {"grid": np.zeros(len(ROW) * len(COL), dtype=np.float32), "roll": np.zeros(6, dtype=np.float32)}
+        flattened = core.flatten_observation(observation, out=out)
+        self.assertIs(out["grid"], flattened["grid"])
+        self.assertIs(out["roll"], flattened["roll"])
+        np.testing.assert_array_equal(expected["grid"].astype(np.float32), flattened["grid"])
+        np.testing.assert_array_equal(expected["roll"].astype(np.float32), flattened["roll"])
+        allocated = core.flatten_observation(observation, dtype=np.float32)
+        for key in ["grid", "roll"]:
+            self.assertEqual(np.float32, allocated[key].dtype)
+            np.testing.assert_array_equal(flattened[key], allocated[key])
+
+        stacked = core.flatten_observation({"grid": np.stack([state.grid] * 3), "roll": np.stack([state.roll] * 3)})
+        np.testing.assert_array_equal(np.stack([expected["grid"]] * 3), stacked["grid"])
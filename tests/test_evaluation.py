@@ -0,0 +1,36 @@
+import unittest
+import numpy as np
+from yamb.agents import make_agent
+from yamb.evaluation import evaluate, play_games, shard_seeds, summarize
+
+class TestEvaluation(unittest.TestCase):
+    def test_play_games(self):
+        result = play_games(make_agent("greedy"), num_games=10, num_envs=4, seed=0)
+        self.assertEqual(10, len(result["rewards"]))
+        self.assertEqual(0, result["truncations"])
+        # the slots which have finished their games while others play their last one aren't counted
+        self.assertEqual(10 * 56 * 3, result["steps"])
+        self.assertEqual(result, play_games(make_agent("greedy"), num_games=10, num_envs=4, seed=0))
+        self.assertEqual(5 * 56 * 3, play_games(make_agent("greedy"), num_games=5, num_envs=4, seed=0)["steps"])
+        with self.assertRaises(ValueError):
+            play_games(make_agent("greedy"), num_games=0, num_envs=4)
+
+    def test_evaluate(self):
+        summary = evaluate(12, agent="greedy", num_envs=4, workers=2, seed=0)
+        rewards = np.concatenate([
+            play_games(make_agent("greedy"), 6, 4, seed)["rewards"] for seed in shard_seeds(0, 2)
+        ])
+        self.assertEqual(12, summary["games"])
+        self.assertAlmostEqual(rewards.mean(), summary["mean"])
+        self.assertEqual(summary["mean"], evaluate(12, agent="greedy", num_envs=4, workers=2, seed=0)["mean"])
+        with self.assertRaises(ValueError):
+            evaluate(12)
+        with self.assertRaises(ValueError):
+            evaluate(0, agent="greedy")
+
+    def test_summarize(self):
+        summary = summarize(np.arange(101), truncations=1, steps=1000, seconds=2.0)
+        self.assertEqual(50.0, summary["mean"])
+        self.assertEqual({0.05: 5.0, 0.25: 25.0, 0.5: 50.0, 0.75: 75.0, 0.95: 95.0}, summary["quantiles"])
+        self.assertEqual(50.5, summary["games_per_sec"])
+        self.assertEqual(500.0, summary["steps_per_sec"])
@@ -1,10 +1,77 @@
 import unittest
+import numpy as np
 from yamb.flatten_grid import FlattenGrid
 from yamb.yamb_env import YambEnv
+from yamb.row_enum import ROW
+from yamb.col_enum import COL
+from yamb.profiling import merge_stats
 from stable_baselines3.common.env_checker import check_env
+from stable_baselines3.common.env_util import make_vec_env
+from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv
 
 class TestFlattenGrid(unittest.TestCase):
     def test_check_env(self):
         env = YambEnv()
         env = FlattenGrid(env)
-        check_env(env)
\ No newline at end of file
+        check_env(env)
+
+    def test_stats(self):
+        vec_env = make_vec_env(
+            YambEnv, n_envs=2, vec_env_cls=SubprocVecEnv,
+            env_kwargs={"profile": True}, wrapper_class=FlattenGrid, wrapper_kwargs={"profile": True},
+        )
+        vec_env.reset()
+        action = np.zeros((2, 9), dtype=np.int64)
+        vec_env.step(action)
+        vec_env.step(action)
+        # the gore column has to be filled from the bottom
+        action[:, YambEnv.ACTION_ROW_COL_FILL_IDX] = len(ROW) * COL.GORE.value
+        vec_env.step(action)
+        stats = merge_stats(vec_env.env_method("stats"))
+        vec_env.close()
+        # both workers reset once at the start and again after the third step, which was an invalid fill
+        self.assertEqual(4, stats["phases"]["reset/roll_dice"]["calls"])
+        self.assertEqual(2 * 3, stats["phases"]["step/check"]["calls"])
+        self.assertEqual(2 * 2, stats["phases"]["step/apply_keep"]["calls"])
+        self.assertEqual({"fill": 2}, stats["truncations"])
+        self.assertGreater(stats["phases"]["observation"]["ns"], 0)
+
+    def test_float32(self):
+        env = FlattenGrid(YambEnv(), float32=True)
+        check_env(env)
+        reference = FlattenGrid(YambEnv())
+        observation, _ = env.reset(seed=0)
+        expected, _ = reference.reset(seed=0)
+        self.assertEqual(np.float32, env.observation_space["grid"].dtype)
+        for key in ["grid", "roll"]:
+            self.assertEqual(np.float32, observation[key].dtype)
+            np.testing.assert_array_equal(expected[key].astype(np.float32), observation[key])
+        # the observation is a snapshot, it doesn't change as the game is played
+        roll = observation["roll"].copy()
+        env.unwrapped.roll[:] = [5, 0, 0, 0, 0, 0]
+        np.testing.assert_array_equal(roll, observation["roll"])
+
+        # nor do earlier observations change as later ones are made
+        grid = observation["grid"].copy()
+        env.step(np.zeros(9, dtype=np.int64))
+        np.testing.assert_array_equal(grid, observation["grid"])
+        np.testing.assert_array_equal(roll, observation["roll"])
+
+    def test_terminal_observation(self):
+        for float32 in [False, True]:
+            with self.subTest(float32=float32):
+                vec_env = DummyVecEnv([lambda: FlattenGrid(YambEnv(), float32=float32)])
+                vec_env.seed(0)
+                vec_env.reset()
+                action = np.zeros((1, 9), dtype=np.int64)
+                vec_env.step(action)
+                vec_env.step(action)
+                # filling out the first square of dolje then breaking the rules on the next turn ends the game
+                vec_env.step(action)
+                vec_env.step(action)
+                vec_env.step(action)
+                action[0, YambEnv.ACTION_ROW_COL_FILL_IDX] = len(ROW) * COL.GORE.value
+                _, _, dones, infos = vec_env.step(action)
+                self.assertTrue(dones[0])
+                terminal = infos[0]["terminal_observation"]["grid"]
+                self.assertEqual(1, int((terminal != YambEnv.NAN / 145.0).sum()))
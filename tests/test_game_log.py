@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from yamb.flatten_grid import FlattenGrid
+from yamb.game_log import GameLog, GameLogRecorder, RECORD_DTYPE, pack_actions, unpack_actions
+from yamb.yamb_env import YambEnv
+from yamb import core
+from tests.test_core import sample_legal_action
+
+def play(env, num_games: int, truncate_game: int = -1) -> list:
+    """Plays num_games random games, truncating truncate_game part way through
+
+    :return: the final state of each game
+    """
+    rng = np.random.default_rng(0)
+    states = []
+    for game in range(num_games):
+        env.reset(seed=game)
+        done = False
+        steps = 0
+        while not done:
+            action = sample_legal_action(env.unwrapped.action_masks(), rng)
+            if game == truncate_game and steps == 40:
+                # the second roll of a turn, keeping five ones is invalid unless the roll is five ones
+                action[0] = 5
+            _, _, terminated, truncated, _ = env.step(action)
+            done = terminated or truncated
+            steps += 1
+        states.append(env.unwrapped.state.snapshot())
+    env.close()
+    return states
+
+class TestGameLog(unittest.TestCase):
+    def test_record_size(self):
+        self.assertLess(RECORD_DTYPE.itemsize, 32)
+
+    def test_replay(self):
+        with tempfile.TemporaryDirectory() as directory:
+            env = FlattenGrid(GameLogRecorder(YambEnv(), directory, prefix="test", shard_steps=300))
+            states = play(env, num_games=4, truncate_game=2)
+            log = GameLog(directory)
+            self.assertEqual(4, log.num_games)
+            # shards are only cut between games
+            self.assertEqual(2, len(log.paths))
+            self.assertEqual([0, 1], list(np.unique(log.shards[0]["game"])))
+            self.assertEqual([2, 3], list(np.unique(log.shards[1]["game"])))
+            self.assertEqual(41, len(log.game(2)))
+            self.assertEqual(3 * 168 + 41, log.num_steps)
+            for i, state in enumerate(states):
+                self.assertEqual(state, log.final_state(i))
+            truncated = log.game(2)[-1]
+            self.assertEqual(1 + core.TRUNCATION_KINDS.index("keep"), truncated["truncation"])
+            self.assertEqual(-1000, truncated["reward"])
+            rewards = [reward for _, _, reward in log.replay(0)]
+            self.assertEqual(states[0].score, sum(rewards))
+            self.assertEqual(log.num_steps, sum(len(batch) for batch in log.batches(100)))
+            self.assertTrue(all(len(batch) <= 100 for batch in log.batches(100)))
+
+    def test_replay_detects_changes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            play(GameLogRecorder(YambEnv(), directory, prefix="test"), num_games=1)
+            path = os.path.join(directory, "test-00000.npy")
+            records = np.load(path)
+            records[10]["next_roll"] = (records[10]["next_roll"] + 1) % 252
+            np.save(path, records)
+            with self.assertRaises(ValueError):
+                GameLog(directory).final_state(0)
+
+    def test_pack_actions(self):
+        actions = np.array([[0, 1, 2, 3, 4, 5, 1, 13, 55], [5, 0, 0, 0, 0, 0, 0, 0, 0]])
+        records = np.zeros(2, dtype=RECORD_DTYPE)
+        records["keep"], records["announce"], records["fill"] = pack_actions(actions)
+        np.testing.assert_array_equal(actions, unpack_actions(records))
+        with self.assertRaises(ValueError):
+            pack_actions([6, 0, 0, 0, 0, 0, 0, 0, 0])
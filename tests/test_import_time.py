@@ -0,0 +1,37 @@
+import unittest
+import subprocess
+import sys
+
+class TestImportTime(unittest.TestCase):
+    # microseconds which `import yamb` is allowed to take, including numpy and gymnasium
+    IMPORT_TIME_BUDGET = 1_000_000
+    
+    @staticmethod
+    def import_times(statement: str) -> dict:
+        """Runs statement in a fresh interpreter with -X importtime
+        
+        :return: mapping of module name to cumulative import time in microseconds
+        """
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", statement],
+            capture_output=True, text=True, check=True,
+        )
+        times = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            _, cumulative, name = line.split("|")
+            times[name.strip()] = int(cumulative)
+        return times
+    
+    def test_import_time(self):
+        times = self.import_times("import yamb")
+        self.assertLess(times["yamb"], self.IMPORT_TIME_BUDGET)
+        
+    def test_heavy_dependencies_are_lazy(self):
+        times = self.import_times("import yamb; env = yamb.FlattenGrid(yamb.YambEnv()); env.reset(); env.step(env.action_space.sample())")
+        for module in ["pygame", "stable_baselines3", "torch", "mlflow", "numba"]:
+            self.assertNotIn(module, times)
+        
+        times = self.import_times("from yamb import YambVecEnv")
+        self.assertIn("stable_baselines3", times)
@@ -0,0 +1,78 @@
+import unittest
+import numpy as np
+from yamb import core, kernels
+from yamb.yamb_env import YambEnv
+from yamb.yamb_state import YambState
+from yamb.row_enum import ROW
+from yamb.col_enum import COL
+from tests.test_core import sample_legal_action
+
+def backends() -> dict:
+    """
+    :return: mapping of backend name to a mapping of kernel name to kernel, the Python versions are always included
+    """
+    compiled = {name: getattr(kernels, name) for name in kernels.KERNELS}
+    python = {name: getattr(kernel, "py_func", kernel) for name, kernel in compiled.items()}
+    return {kernels.BACKEND: compiled, "python": python}
+
+class TestKernels(unittest.TestCase):
+    def check_state(self, k: dict, env: YambEnv, grid: np.ndarray, roll: np.ndarray, meta: np.ndarray):
+        state = env.state
+        np.testing.assert_array_equal(state.grid, grid)
+        np.testing.assert_array_equal(state.roll, roll)
+        self.assertEqual([state.turn_number, state.roll_number, state.announced, state.announced_row], meta.tolist())
+        self.assertEqual(env.get_score(), k["score"](grid))
+        self.assertEqual(env.get_next_dolje(), k["next_dolje"](grid))
+        self.assertEqual(env.get_next_gore(), k["next_gore"](grid))
+        self.assertEqual(env.need_to_announce(), k["need_to_announce"](grid))
+        for row in ROW:
+            self.assertEqual(YambEnv.get_grid_square_value(row.value, state.roll), k["grid_square_value"](row.value, roll))
+        for row_col_fill in range(len(ROW) * len(COL)):
+            self.assertEqual(
+                env.step_3_valid(row_col_fill, {}),
+                k["fill_valid"](grid, meta[kernels.META_ANNOUNCED], meta[kernels.META_ANNOUNCED_ROW], row_col_fill),
+            )
+
+    def test_random_games(self):
+        for name, k in backends().items():
+            with self.subTest(backend=name):
+                rng = np.random.default_rng(0)
+                env = YambEnv()
+                env.action_space.seed(0)
+                for game in range(3):
+                    env.reset(seed=game)
+                    grid, roll, meta = kernels.state_arrays(env.state)
+                    terminated = False
+                    while not terminated:
+                        self.check_state(k, env, grid, roll, meta)
+                        # random actions are mostly invalid, which checks the rejections
+                        for _ in range(5):
+                            action = env.action_space.sample()
+                            self.assertEqual(core.check_action(env.state, action) is None, k["action_valid"](grid, roll, meta, action))
+                        action = sample_legal_action(env.action_masks(), rng)
+                        self.assertTrue(k["action_valid"](grid, roll, meta, action))
+                        keep = action[:core.ACTION_ANNOUNCE_IDX] if meta[kernels.META_ROLL_NUMBER] < 2 else 0
+                        _, _, terminated, truncated, _ = env.step(action)
+                        self.assertFalse(truncated)
+                        k["apply"](grid, roll, meta, action, env.state.roll.astype(np.int64) - keep)
+                    self.check_state(k, env, grid, roll, meta)
+                    self.assertEqual(kernels.to_state(grid, roll, meta), env.state)
+
+    def test_grid_square_value(self):
+        for name, k in backends().items():
+            with self.subTest(backend=name):
+                # rolls which aren't five dice aren't in the score table
+                for roll in [np.array([0, 0, 0, 3, 3, 0]), np.array([2, 2, 2, 0, 0, 0]), np.zeros(6, dtype=np.int64)]:
+                    for row in ROW:
+                        self.assertEqual(YambEnv.get_grid_square_value(row.value, roll), k["grid_square_value"](row.value, roll))
+                with self.assertRaises(IndexError):
+                    k["grid_square_value"](len(ROW), np.array([0, 0, 0, 0, 0, 5]))
+
+    def test_need_to_announce(self):
+        for name, k in backends().items():
+            with self.subTest(backend=name):
+                grid = np.zeros((len(ROW), len(COL)), dtype=np.int16)
+                grid[:, COL.NAJAVA.value] = YambState.NAN
+                self.assertTrue(k["need_to_announce"](grid))
+                grid[ROW.FULL.value, COL.SLOBODNO.value] = YambState.NAN
+                self.assertFalse(k["need_to_announce"](grid))
@@ -0,0 +1,49 @@
+import unittest
+import numpy as np
+from yamb import score_table
+from yamb.yamb_env import YambEnv
+from yamb.row_enum import ROW
+
+class TestScoreTable(unittest.TestCase):
+    def test_rolls(self):
+        self.assertEqual(252, score_table.NUM_ROLLS)
+        self.assertEqual((252, 6), score_table.ROLLS.shape)
+        np.testing.assert_array_equal(score_table.ROLLS.sum(axis=1), 5)
+        self.assertEqual(252, len({tuple(roll) for roll in score_table.ROLLS}))
+        np.testing.assert_array_equal(score_table.index_to_roll(0), [0,0,0,0,0,5])
+        np.testing.assert_array_equal(score_table.index_to_roll(251), [5,0,0,0,0,0])
+        
+    def test_roll_to_index(self):
+        for i, roll in enumerate(score_table.ROLLS):
+            self.assertEqual(i, score_table.roll_to_index(roll))
+            
+        idx = np.arange(score_table.NUM_ROLLS).reshape(12, 21)
+        np.testing.assert_array_equal(score_table.roll_to_index(score_table.index_to_roll(idx)), idx)
+        
+        with self.assertRaises(ValueError):
+            score_table.roll_to_index([1,1,1,1,1,1])
+        with self.assertRaises(ValueError):
+            score_table.roll_to_index([6,0,0,0,0,-1])
+        
+    def test_keep_to_index(self):
+        self.assertEqual(462, score_table.NUM_KEEPS)
+        self.assertTrue(np.all(score_table.KEEPS.sum(axis=1) <= 5))
+        np.testing.assert_array_equal(score_table.keep_to_index(score_table.KEEPS), np.arange(score_table.NUM_KEEPS))
+        with self.assertRaises(ValueError):
+            score_table.keep_to_index([1,1,1,1,1,1])
+        
+    def test_score_table(self):
+        self.assertEqual(np.int16, score_table.SCORE_TABLE.dtype)
+        self.assertEqual((252, 14), score_table.SCORE_TABLE.shape)
+        self.assertEqual(45, score_table.SCORE_TABLE[score_table.roll_to_index([1,1,1,1,1,0]), ROW.SKALA.value])
+        self.assertEqual(90, score_table.SCORE_TABLE[score_table.roll_to_index([0,0,0,0,0,5]), ROW.YAMB.value])
+        self.assertEqual(40 + 28, score_table.SCORE_TABLE[score_table.roll_to_index([0,0,0,0,2,3]), ROW.FULL.value])
+        
+    def test_get_grid_square_values(self):
+        rng = np.random.default_rng(1)
+        cnts = rng.multinomial(5, [1/6.]*6, size=200)
+        rows = rng.integers(0, len(ROW), size=200)
+        expected = [score_table.compute_grid_square_value(r, c) for r, c in zip(rows, cnts)]
+        np.testing.assert_array_equal(score_table.get_grid_square_values(rows, cnts), expected)
+        for r, c, e in zip(rows, cnts, expected):
+            self.assertEqual(e, YambEnv.get_grid_square_value(r, c))
@@ -0,0 +1,120 @@
+import unittest
+import numpy as np
+from yamb import core, kernels, score_table, solver, zobrist
+from yamb.flatten_grid import FlattenGrid
+from yamb.search import Planner, RolloutEvaluator, ValueEvaluator, leaf_grids, rollout
+from yamb.yamb_env import YambEnv
+from yamb.yamb_vec_env import YambVecEnv
+from yamb.row_enum import ROW
+from tests.test_core import sample_legal_action
+
+def env_at_turn(turn_number: int, roll_number: int = 0, seed: int = 0) -> YambEnv:
+    """
+    :return: an environment played with random legal actions up to the given turn and roll
+    """
+    env = YambEnv()
+    env.reset(seed=seed)
+    rng = np.random.default_rng(seed)
+    while (env.state.turn_number, env.state.roll_number) != (turn_number, roll_number):
+        env.step(sample_legal_action(env.action_masks(), rng))
+    return env
+
+class ScoreEvaluator:
+    def evaluate(self, grids, turn_number, seed, rounds):
+        return np.tile([kernels.score(grid) for grid in grids], (rounds, 1)).astype(np.float64)
+
+    def close(self):
+        pass
+
+class TestSearch(unittest.TestCase):
+    def test_last_turn_is_exact(self):
+        env = env_at_turn(core.NUM_TURNS - 1, roll_number=1)
+        planner = Planner(RolloutEvaluator("greedy"))
+        planner.plan(env.state)
+        self.assertEqual(1, planner.stats["rounds"])
+
+    def test_search_is_exact(self):
+        # with leaves worth their score the best action can be worked out directly
+        env = env_at_turn(20, roll_number=1)
+        planner = Planner(ScoreEvaluator())
+        cells = [(f % len(ROW), f // len(ROW)) for f in np.flatnonzero(core.fill_targets(env.state).reshape(-1))]
+        worths = np.array([
+            [kernels.score(leaf_grids(env.state.grid, [(row, col, score_table.SCORE_TABLE[i, row])])[0]) for row, col in cells]
+            for i in range(score_table.NUM_ROLLS)
+        ])
+        keeps, values = solver.values_tables(worths.max(axis=1), 1)
+        idx = score_table.roll_to_index(env.state.roll)
+        action = planner.plan(env.state)
+        np.testing.assert_array_equal(score_table.KEEPS[keeps[idx]], action[:core.ACTION_ANNOUNCE_IDX])
+
+        env.step(action)
+        action = planner.plan(env.state)
+        best = worths[score_table.roll_to_index(env.state.roll)].argmax()
+        self.assertEqual(cells[best][0] + len(ROW) * cells[best][1], action[core.ACTION_ROW_COL_FILL_IDX])
+
+    def test_plays_legal_moves(self):
+        env = FlattenGrid(env_at_turn(core.NUM_TURNS - 4))
+        observation = env.observation(env.unwrapped.get_observation())
+        planner = Planner(RolloutEvaluator("greedy", horizon=2), max_nodes=100, seed=0)
+        terminated = False
+        while not terminated:
+            masks = env.unwrapped.action_masks()
+            action, _ = planner.predict(observation, action_masks=masks)
+            self.assertIsNone(core.check_action(env.unwrapped.state, action))
+            self.assertLessEqual(planner.stats["rounds"] * planner.stats["leaves"], max(100, planner.stats["leaves"]))
+            observation, _, terminated, truncated, _ = env.step(action)
+            self.assertFalse(truncated)
+
+    def test_rollouts_share_dice(self):
+        env = env_at_turn(30, roll_number=2)
+        grids = leaf_grids(env.state.grid, [(0, 2, 0), (0, 2, 0), (ROW.YAMB.value, 2, 0)])
+        scores = rollout("column", grids, env.state.turn_number + 1, seed=0, rounds=3)
+        self.assertEqual((3, 3), scores.shape)
+        # the same grid on the same dice is played the same way
+        np.testing.assert_array_equal(scores[:, 0], scores[:, 1])
+        self.assertFalse(np.all(scores[0] == scores[1]))
+
+    def test_workers(self):
+        env = env_at_turn(40, roll_number=2)
+        grids = leaf_grids(env.state.grid, [(row, 2, 0) for row in range(len(ROW))])
+        evaluator = RolloutEvaluator("column", workers=2)
+        try:
+            np.testing.assert_array_equal(
+                RolloutEvaluator("column").evaluate(grids, env.state.turn_number + 1, 0, 2),
+                evaluator.evaluate(grids, env.state.turn_number + 1, 0, 2),
+            )
+        finally:
+            evaluator.close()
+
+    def test_value_evaluator(self):
+        from sb3_contrib import MaskablePPO
+        model = MaskablePPO("MultiInputPolicy", YambVecEnv(2, float32=True), seed=0)
+        env = env_at_turn(10)
+        planner = Planner(ValueEvaluator(model), max_nodes=1000, seed=0)
+        for _ in range(3):
+            action = planner.plan(env.state)
+            self.assertIsNone(core.check_action(env.state, action))
+            self.assertEqual(1000 // planner.stats["leaves"], planner.stats["rounds"])
+            env.step(action)
+
+    def test_table(self):
+        env = env_at_turn(25)
+        table = zobrist.TranspositionTable(4096)
+        planner = Planner(RolloutEvaluator("column", horizon=1), max_nodes=500, seed=0, table=table)
+        plain = Planner(RolloutEvaluator("column", horizon=1), max_nodes=500, seed=0)
+        # an empty table changes nothing
+        action = planner.plan(env.state)
+        np.testing.assert_array_equal(plain.plan(env.state), action)
+        self.assertEqual(0, planner.stats["cached"])
+        self.assertEqual(planner.stats["leaves"], len(table))
+
+        leaves = len(table)
+        np.testing.assert_array_equal(action, planner.plan(env.state))
+        self.assertEqual((0, leaves), (planner.stats["leaves"], planner.stats["cached"]))
+        self.assertEqual(leaves, table.stats["hits"])
+
+        # the leaves of the later rolls of a turn were leaves of its first roll
+        env.step(action)
+        planner.plan(env.state)
+        self.assertGreater(planner.stats["cached"], 0)
+        self.assertEqual(leaves + planner.stats["leaves"], len(table))
@@ -0,0 +1,98 @@
+import unittest
+import numpy as np
+from stable_baselines3.common.vec_env import DummyVecEnv
+from yamb.flatten_grid import FlattenGrid
+from yamb.shared_vec_env import SharedMemoryVecEnv, buffer_layout
+from yamb.yamb_env import YambEnv
+from yamb.yamb_vec_env import YambVecEnv
+from tests.test_yamb_vec_env import sample_masked_actions
+
+def reference_masks(vec_env) -> np.ndarray:
+    if isinstance(vec_env, YambVecEnv):
+        return vec_env.action_masks()
+    return np.stack(vec_env.env_method("action_masks"))
+
+class TestSharedMemoryVecEnv(unittest.TestCase):
+    def assert_matches(self, vec_env: SharedMemoryVecEnv, references: list, steps: int):
+        """Steps vec_env and the references, one for each worker's slice, with the same random actions and checks
+        everything they return is the same
+        """
+        rng = np.random.default_rng(0)
+        observation = vec_env.reset()
+        expected = [reference.reset() for reference in references]
+        for key in observation:
+            np.testing.assert_array_equal(np.concatenate([e[key] for e in expected]), observation[key])
+        for step in range(steps):
+            masks = vec_env.action_masks()
+            np.testing.assert_array_equal(np.concatenate([reference_masks(r) for r in references]), masks)
+            actions = sample_masked_actions(masks, rng)
+            if step % 50 == 7:
+                # an invalid keep truncates the game
+                actions[1, 0] = 5
+            observation, rewards, dones, infos = vec_env.step(actions)
+            starts = np.cumsum([0] + [r.num_envs for r in references])
+            results = [r.step(actions[a:b]) for r, a, b in zip(references, starts, starts[1:])]
+            for key in observation:
+                np.testing.assert_array_equal(np.concatenate([r[0][key] for r in results]), observation[key])
+                self.assertEqual(vec_env.observation_space[key].dtype, observation[key].dtype)
+            np.testing.assert_array_equal(np.concatenate([r[1] for r in results]), rewards)
+            np.testing.assert_array_equal(np.concatenate([r[2] for r in results]), dones)
+            for info, expected_info in zip(infos, [info for r in results for info in r[3]]):
+                self.assertEqual(expected_info.get("truncation_reason"), info.get("truncation_reason"))
+                if "truncation_reason" not in info:
+                    self.assertEqual(expected_info["score"], info["score"])
+                self.assertEqual("terminal_observation" in expected_info, "terminal_observation" in info)
+                if "terminal_observation" in info:
+                    self.assertEqual(expected_info["TimeLimit.truncated"], info["TimeLimit.truncated"])
+                    for key, value in info["terminal_observation"].items():
+                        np.testing.assert_array_equal(expected_info["terminal_observation"][key], value)
+
+    def test_small_slices_match_yamb_env(self):
+        vec_env = SharedMemoryVecEnv(6, 2, float32=True)
+        references = [DummyVecEnv([lambda: FlattenGrid(YambEnv(), float32=True)] * 3) for _ in range(2)]
+        vec_env.seed(3)
+        references[0].seed(3)
+        references[1].seed(6)
+        try:
+            self.assert_matches(vec_env, references, steps=3 * 56 + 20)
+        finally:
+            vec_env.close()
+
+    def test_batched_slices_match_yamb_vec_env(self):
+        n = SharedMemoryVecEnv.BATCHED_MIN_ENVS
+        vec_env = SharedMemoryVecEnv(2 * n, 2, flatten_grid=False)
+        references = [YambVecEnv(n, flatten_grid=False) for _ in range(2)]
+        vec_env.seed(3)
+        references[0].seed(3)
+        references[1].seed(3 + n)
+        try:
+            self.assert_matches(vec_env, references, steps=3 * 56 + 20)
+        finally:
+            vec_env.close()
+
+    def test_attributes_and_methods(self):
+        vec_env = SharedMemoryVecEnv(5, 2)
+        try:
+            vec_env.reset()
+            self.assertEqual([0, 0, 0], vec_env.get_attr("turn_number", [0, 2, 4]))
+            vec_env.set_attr("truncation_penalty", -5, [3])
+            self.assertEqual([-1000, -1000, -1000, -5, -1000], vec_env.get_attr("truncation_penalty"))
+            self.assertEqual([0, 0], vec_env.env_method("get_score", indices=[1, 3]))
+            masks = vec_env.env_method("action_masks", indices=[2, 4])
+            np.testing.assert_array_equal(vec_env.action_masks()[[2, 4]], np.stack(masks))
+            with self.assertRaises(RuntimeError):
+                vec_env.env_method("no_such_method", indices=[4])
+            # the worker is still usable after an error
+            self.assertEqual([0], vec_env.get_attr("turn_number", [4]))
+        finally:
+            vec_env.close()
+        self.assertTrue(vec_env.closed)
+        vec_env.close()
+
+    def test_buffer_layout(self):
+        layout, size = buffer_layout(7, 3, flatten_grid=True)
+        offsets = sorted(offset for _, _, offset in layout.values())
+        self.assertTrue(all(offset % 64 == 0 for offset in offsets))
+        self.assertEqual(len(offsets), len(set(offsets)))
+        self.assertEqual(((7, 56), "float64"), layout["observation/grid"][:2])
+        self.assertLessEqual(offsets[-1], size)
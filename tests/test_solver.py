@@ -0,0 +1,78 @@
+import itertools
+import unittest
+import numpy as np
+from yamb import solver, score_table
+from yamb.row_enum import ROW
+
+def brute_force(roll: np.ndarray, rerolls: int, values: np.ndarray) -> float:
+    """Expected worth of a roll with optimal keeps by trying every keep and every way the dice can land"""
+    if rerolls == 0:
+        return values[score_table.roll_to_index(roll)]
+    best = -np.inf
+    for keep in itertools.product(*[range(c + 1) for c in roll]):
+        keep = np.array(keep)
+        n = 5 - keep.sum()
+        total = 0.0
+        for dice in itertools.product(range(6), repeat=n):
+            total += brute_force(keep + np.bincount(dice, minlength=6), rerolls - 1, values)
+        best = max(best, total / 6**n)
+    return best
+
+class TestSolver(unittest.TestCase):
+    def test_sub_keeps(self):
+        table = solver.sub_keeps()
+        for i, roll in enumerate(score_table.ROLLS):
+            keeps = score_table.KEEPS[table[i]]
+            self.assertTrue(np.all(keeps <= roll))
+            self.assertEqual(np.prod(roll.astype(np.int64) + 1), len(set(table[i])))
+            np.testing.assert_array_equal(roll, keeps[0])
+
+    def test_brute_force(self):
+        rng = np.random.default_rng(0)
+        for row in [ROW.ONES.value, ROW.SKALA.value, ROW.YAMB.value]:
+            values = score_table.SCORE_TABLE[:, row].astype(np.float64)
+            for idx in rng.choice(score_table.NUM_ROLLS, size=3, replace=False):
+                roll = score_table.ROLLS[idx].astype(np.int64)
+                keep, expected = solver.best_keep(roll, 1, row=row)
+                self.assertAlmostEqual(brute_force(roll, 1, values), expected)
+                self.assertTrue(np.all(keep <= roll))
+        roll = np.array([2, 1, 1, 1, 0, 0])
+        keep, expected = solver.best_keep(roll, 2, row=ROW.SKALA.value)
+        # a 5 straight away, a 6 and then a 5 which swaps out the 1, or anything else and then a 5
+        self.assertAlmostEqual(45 / 6 + 50 / 36 + 4 / 6 * 45 / 6, expected)
+        np.testing.assert_array_equal([1, 1, 1, 1, 0, 0], keep)
+
+    def test_no_rerolls(self):
+        values = solver.best_of_rows([ROW.FULL.value, ROW.POKER.value])
+        keeps, roll_values = solver.solve(values, 0)
+        np.testing.assert_array_equal(score_table.KEEPS[keeps], score_table.ROLLS)
+        np.testing.assert_array_equal(values, roll_values)
+        with self.assertRaises(ValueError):
+            solver.solve(values, -1)
+
+    def test_batched(self):
+        rng = np.random.default_rng(1)
+        rolls = score_table.ROLLS[rng.integers(score_table.NUM_ROLLS, size=20)]
+        rows = rng.integers(len(ROW), size=20)
+        values = solver.best_of_rows([ROW.TRIS.value, ROW.MAX.value], offsets=[0, -10])
+        per_game_values = score_table.SCORE_TABLE[:, rows].T.astype(np.float64)
+        keeps_by_row, expected_by_row = solver.best_keeps(rolls, 2, rows=rows)
+        keeps_by_values, expected_by_values = solver.best_keeps(rolls, 2, values=values)
+        keeps_by_game, expected_by_game = solver.best_keeps(rolls, 2, values=per_game_values)
+        for i in range(20):
+            keep, expected = solver.best_keep(rolls[i], 2, row=rows[i])
+            np.testing.assert_array_equal(keep, keeps_by_row[i])
+            np.testing.assert_array_equal(keep, keeps_by_game[i])
+            self.assertAlmostEqual(expected, expected_by_row[i])
+            self.assertAlmostEqual(expected, expected_by_game[i])
+            keep, expected = solver.best_keep(rolls[i], 2, values=values)
+            np.testing.assert_array_equal(keep, keeps_by_values[i])
+            self.assertAlmostEqual(expected, expected_by_values[i])
+
+    def test_values_cache(self):
+        values = solver.best_of_rows([ROW.DVAPARA.value, ROW.FULL.value])
+        first = solver.values_tables(values, 2)
+        self.assertIs(first, solver.values_tables(values.copy(), 2))
+        np.testing.assert_array_equal(solver.solve(values, 2)[1], first[1])
+        with self.assertRaises(ValueError):
+            solver.values_tables(values[:10], 2)
@@ -0,0 +1,66 @@
+import unittest
+import numpy as np
+from yamb.agents import make_agent
+from yamb.dice_tape import dice_tape, dice_tapes
+from yamb.evaluation import play_games
+from yamb.yamb_vec_env import YambVecEnv
+from yamb.tournament import critical_value, paired_difference, rank, run_tournament
+
+class TestTournament(unittest.TestCase):
+    def test_dice_tapes(self):
+        tapes = dice_tapes(0, range(3, 7))
+        self.assertEqual((4, 56, 3, 5), tapes.shape)
+        np.testing.assert_array_equal(dice_tape(0, 5), tapes[2])
+        self.assertFalse(np.array_equal(dice_tape(1, 5), tapes[2]))
+        self.assertTrue(np.all((0 <= tapes) & (tapes < 6)))
+
+    def test_vec_env_rolls_from_tapes(self):
+        tapes = dice_tapes(0, range(4))
+        vec_env = YambVecEnv(2, flatten_grid=False)
+        vec_env.set_dice_tapes(tapes)
+        observation = vec_env.reset()
+        for i in range(2):
+            np.testing.assert_array_equal(np.bincount(tapes[i, 0, 0], minlength=6), observation["roll"][i])
+        # keep two dice of the first game, the other three are the first three faces on the tape
+        actions = np.zeros((2, 9), dtype=np.int64)
+        actions[0, :6] = np.bincount(tapes[0, 0, 0, :2], minlength=6)
+        observation, _, _, _ = vec_env.step(actions)
+        np.testing.assert_array_equal(actions[0, :6] + np.bincount(tapes[0, 0, 1, :3], minlength=6), observation["roll"][0])
+        np.testing.assert_array_equal(np.bincount(tapes[1, 0, 1], minlength=6), observation["roll"][1])
+
+    def test_same_games_whatever_the_batch(self):
+        tapes = dice_tapes(0, range(6))
+        first = play_games(make_agent("column"), 6, 2, seed=1, dice_tapes=tapes)
+        second = play_games(make_agent("column"), 6, 4, seed=2, dice_tapes=tapes)
+        self.assertEqual(first["rewards"], second["rewards"])
+
+    def test_paired_difference(self):
+        a = np.array([10.0, 12.0, 14.0])
+        pair = paired_difference(a, a - np.array([1.0, 2.0, 3.0]), z=2.0)
+        self.assertAlmostEqual(2.0, pair["mean"])
+        self.assertAlmostEqual(1 / np.sqrt(3), pair["se"])
+        self.assertAlmostEqual(2.0 - 2 / np.sqrt(3), pair["low"])
+        self.assertAlmostEqual(1.959964, critical_value(0.95, 1), places=5)
+        self.assertGreater(critical_value(0.95, 10), critical_value(0.95, 1))
+
+    def test_rank(self):
+        rng = np.random.default_rng(0)
+        luck = rng.normal(1000, 100, size=200)
+        scores = {"b": luck + 5 + rng.normal(0, 1, 200), "a": luck + 10 + rng.normal(0, 1, 200), "c": luck}
+        result = rank(scores, z=3.0)
+        self.assertEqual(["a", "b", "c"], result["ranking"])
+        self.assertTrue(result["settled"])
+        scores["b"] = luck + rng.normal(0, 1, 200)
+        self.assertFalse(rank(scores, z=3.0)["settled"])
+
+    def test_run_tournament(self):
+        specs = {"greedy": ("greedy", None), "column": ("column", None)}
+        result = run_tournament(specs, max_games=64, batch_games=16, num_envs=8)
+        self.assertEqual(["column", "greedy"], result["ranking"])
+        self.assertTrue(result["settled"])
+        self.assertEqual(16, result["games"])
+        self.assertEqual(16, len(result["scores"]["greedy"]))
+        parallel = run_tournament(specs, max_games=64, batch_games=16, num_envs=8, workers=2)
+        np.testing.assert_array_equal(result["scores"]["column"], parallel["scores"]["column"])
+        with self.assertRaises(ValueError):
+            run_tournament({"greedy": ("greedy", None)}, max_games=16)
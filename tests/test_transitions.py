@@ -0,0 +1,48 @@
+import unittest
+import numpy as np
+from yamb import transitions, score_table
+
+class TestTransitions(unittest.TestCase):
+    def test_asset(self):
+        records = transitions.table()
+        self.assertIsInstance(records, np.memmap)
+        self.assertFalse(records.flags.writeable)
+        # the asset is up to date with the rules, regenerate it with python -m yamb.transitions if not
+        np.testing.assert_array_equal(transitions.build(), records)
+
+    def test_dense(self):
+        probabilities = transitions.dense()
+        self.assertEqual((score_table.NUM_KEEPS, score_table.NUM_ROLLS), probabilities.shape)
+        np.testing.assert_allclose(1, probabilities.sum(axis=1))
+        # keeping all five dice means the roll doesn't change
+        keep_all = score_table.keep_to_index(score_table.ROLLS)
+        np.testing.assert_array_equal(np.eye(score_table.NUM_ROLLS), probabilities[keep_all])
+        # rerolling a single die
+        p = probabilities[score_table.keep_to_index([4, 0, 0, 0, 0, 0])]
+        self.assertAlmostEqual(1 / 6, p[score_table.roll_to_index([5, 0, 0, 0, 0, 0])])
+        self.assertAlmostEqual(1 / 6, p[score_table.roll_to_index([4, 0, 0, 0, 0, 1])])
+        # all five dice rerolled
+        self.assertAlmostEqual(1 / 6**5, probabilities[0, score_table.roll_to_index([0, 0, 0, 0, 0, 5])])
+
+    def test_expectation(self):
+        values = score_table.SCORE_TABLE.T.astype(np.float64)
+        np.testing.assert_allclose(values @ transitions.dense().T, transitions.expectation(values))
+        np.testing.assert_allclose(transitions.dense() @ values[3], transitions.expectation(values[3]))
+        # the result for a values array doesn't depend on what else it is batched with
+        np.testing.assert_array_equal(transitions.expectation(values)[3], transitions.expectation(values[3]))
+        np.testing.assert_array_equal(transitions.expectation(values)[:5], transitions.expectation(values[:5]))
+
+    def test_sample(self):
+        rng = np.random.default_rng(0)
+        keeps = rng.integers(score_table.NUM_KEEPS, size=1000)
+        rolls = score_table.ROLLS[transitions.sample(keeps, rng)]
+        self.assertTrue(np.all(rolls >= score_table.KEEPS[keeps]))
+
+        n = 60000
+        keep = score_table.keep_to_index([0, 2, 0, 0, 0, 2])
+        counts = np.bincount(transitions.sample(np.full(n, keep), rng), minlength=score_table.NUM_ROLLS)
+        np.testing.assert_allclose(transitions.dense()[keep], counts / n, atol=0.01)
+
+        rolls = transitions.sample_rolls(np.array([[0, 0, 0, 0, 0, 5], [1, 0, 0, 0, 0, 0]]), rng)
+        np.testing.assert_array_equal([0, 0, 0, 0, 0, 5], rolls[0])
+        self.assertEqual(5, rolls[1].sum())
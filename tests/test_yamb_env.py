@@ -1,4 +1,6 @@
 import unittest
+import os
+import unittest.mock
 import numpy as np
 from yamb.yamb_env import YambEnv
 from yamb.row_enum import ROW
@@ -38,19 +40,41 @@ class TestYambEnv(unittest.TestCase):
         
         
         # when we add stuff to other columns nothing should change
-        env.grid[ROW.ONES.value, COL.GORE.value] = 1
-        env.grid[ROW.ONES.value, COL.SLOBODNO.value] = 1
+        env.fill_grid_square(ROW.ONES.value, COL.GORE.value, 1)
+        env.fill_grid_square(ROW.ONES.value, COL.SLOBODNO.value, 1)
         self.assertEqual(ROW.ONES, ROW(env.get_next_dolje()))
         
         # when we fill out the rows in order, check the function works as expected
         rows = list(ROW)
         for row in rows[:-1]:
-            env.grid[row.value, COL.DOLJE.value] = 0
+            env.fill_grid_square(row.value, COL.DOLJE.value, 0)
             self.assertEqual(rows[row.value+1], ROW(env.get_next_dolje()))
         
-        # once we've filled everything out check that this returns nan
-        env.grid[rows[-1].value, COL.DOLJE.value] = 0
-        self.assertTrue(np.isnan(env.get_next_dolje()))
+        # once we've filled everything out check that this returns len(ROW)
+        env.fill_grid_square(rows[-1].value, COL.DOLJE.value, 0)
+        self.assertEqual(len(ROW), env.get_next_dolje())
+        
+        # replacing the grid recomputes the next row
+        grid = np.full((len(ROW), len(COL)), env.NAN)
+        grid[:ROW.TRIS.value, COL.DOLJE.value] = 0
+        env.grid = grid
+        self.assertEqual(ROW.TRIS, ROW(env.get_next_dolje()))
+
+    def test_grid_is_read_only(self):
+        env = YambEnv()
+        env.reset(seed=0)
+        # writing into the grid would bypass the running score and legality state
+        with self.assertRaises(ValueError):
+            env.grid[ROW.ONES.value, COL.DOLJE.value] = 3
+        self.assertEqual(env.NAN, env.grid[ROW.ONES.value, COL.DOLJE.value])
+        self.assertEqual(ROW.ONES, ROW(env.get_next_dolje()))
+        # the grid setter and fill_grid_square are the ways to change it
+        grid = env.grid.copy()
+        grid[ROW.ONES.value, COL.DOLJE.value] = 3
+        env.grid = grid
+        self.assertEqual(3, env.get_score())
+        self.assertEqual(ROW.TWOS, ROW(env.get_next_dolje()))
+        self.assertFalse(env.step_3_valid(ROW.ONES.value + len(ROW) * COL.DOLJE.value, {}))
         
     def test_get_next_gore(self):
         env = YambEnv()
@@ -60,19 +84,25 @@ class TestYambEnv(unittest.TestCase):
         
         
         # when we add stuff to other columns nothing should change
-        env.grid[ROW.YAMB.value, COL.DOLJE.value] = 1
-        env.grid[ROW.YAMB.value, COL.SLOBODNO.value] = 1
+        env.fill_grid_square(ROW.YAMB.value, COL.DOLJE.value, 1)
+        env.fill_grid_square(ROW.YAMB.value, COL.SLOBODNO.value, 1)
         self.assertEqual(ROW.YAMB, ROW(env.get_next_gore()))
         
         # when we fill out the rows in order, check the function works as expected
         rows = list(ROW)
         for row in reversed(rows[1:]):
-            env.grid[row.value, COL.GORE.value] = 0
+            env.fill_grid_square(row.value, COL.GORE.value, 0)
             self.assertEqual(rows[row.value-1], ROW(env.get_next_gore()))
         
-        # once we've filled everything out check that this returns nan
-        env.grid[rows[0].value, COL.GORE.value] = 0
-        self.assertTrue(np.isnan(env.get_next_gore()))
+        # once we've filled everything out check that this returns -1
+        env.fill_grid_square(rows[0].value, COL.GORE.value, 0)
+        self.assertEqual(-1, env.get_next_gore())
+        
+        # replacing the grid recomputes the next row
+        grid = np.full((len(ROW), len(COL)), env.NAN)
+        grid[ROW.TRIS.value:, COL.GORE.value] = 0
+        env.grid = grid
+        self.assertEqual(ROW.DVAPARA, ROW(env.get_next_gore()))
         
     def test_get_score(self):
         env = YambEnv()
@@ -526,4 +556,119 @@ class TestYambEnv(unittest.TestCase):
         self.assertFalse(truncated)
         self.assertEqual(observation["turn_number"], 2)
         self.assertEqual(observation["roll_number"], 0)
-        
\ No newline at end of file
+                
+    def test_incremental_score(self):
+        env = YambEnv()
+        env.reset(seed=0)
+        rng = np.random.default_rng(0)
+        sizes = [6, 6, 6, 6, 6, 6, 2, len(ROW), len(ROW) * len(COL)]
+        terminated = False
+        while not terminated:
+            mask = np.array(env.action_masks())
+            action = np.zeros(len(sizes), dtype=np.int64)
+            for i, part in enumerate(np.split(mask, np.cumsum(sizes)[:-1])):
+                if part.any():
+                    action[i] = rng.choice(np.flatnonzero(part))
+            observation, reward, terminated, truncated, info = env.step(action)
+            self.assertFalse(truncated)
+            
+            # recompute the score from scratch by replacing the whole grid
+            other = YambEnv()
+            other.grid = env.grid.copy()
+            self.assertEqual(other.get_score(), info["score"])
+            self.assertEqual(other.column_scores, info["column_scores"])
+            self.assertEqual(sum(info["column_scores"]), info["score"])
+            
+            # the legality state should also match the recomputed one
+            self.assertEqual(other.open_cells, env.open_cells)
+            self.assertEqual(other.num_open_cells, env.num_open_cells)
+            self.assertEqual(other.get_next_dolje(), env.get_next_dolje())
+            self.assertEqual(other.get_next_gore(), env.get_next_gore())
+        
+    def test_action_masks(self):
+        env = YambEnv()
+        env.reset(seed=1)
+        rng = np.random.default_rng(1)
+        terminated = False
+        while not terminated:
+            mask = env.action_masks()
+            self.assertEqual(np.bool_, mask.dtype)
+            self.assertEqual((108,), mask.shape)
+            
+            # compare against the validity checks used by step
+            keep = [k <= env.roll[i] and env.roll_number < 2 for i in range(6) for k in range(6)]
+            np.testing.assert_array_equal(mask[:36], keep)
+            first_roll = env.roll_number == 0
+            announce_row = [first_roll and env.valid_announce_row(i) for i in range(len(ROW))]
+            np.testing.assert_array_equal(mask[36:38], [first_roll and not env.need_to_announce(), any(announce_row)])
+            np.testing.assert_array_equal(mask[38:52], announce_row)
+            fill = [env.roll_number == 2 and env.step_3_valid(i, {}) for i in range(len(ROW) * len(COL))]
+            np.testing.assert_array_equal(mask[52:], fill)
+            
+            action = np.zeros(9, dtype=np.int64)
+            for i, part in enumerate(np.split(mask.copy(), np.cumsum([6, 6, 6, 6, 6, 6, 2, 14]))):
+                if part.any():
+                    action[i] = rng.choice(np.flatnonzero(part))
+            observation, reward, terminated, truncated, info = env.step(action)
+            self.assertFalse(truncated)
+            self.assertIs(mask, env.action_masks())
+        
+    def test_seed(self):
+        def play(seed):
+            env = YambEnv()
+            observation, _ = env.reset(seed=seed)
+            rolls = [observation["roll"].copy()]
+            for _ in range(3 * len(ROW)):
+                # reroll everything on the first two rolls and fill out slobodno in order
+                action = np.zeros(9, dtype=np.int64)
+                action[YambEnv.ACTION_ROW_COL_FILL_IDX] = env.turn_number + len(ROW) * COL.SLOBODNO.value
+                np.random.seed(len(rolls))  # the global random state shouldn't matter
+                observation, reward, terminated, truncated, info = env.step(action)
+                self.assertFalse(truncated)
+                rolls.append(observation["roll"].copy())
+            return np.array(rolls)
+        
+        np.testing.assert_array_equal(play(7), play(7))
+        self.assertFalse(np.array_equal(play(7), play(8)))
+        
+        # reseeding an environment part way through a block of dice restarts the game from scratch
+        env = YambEnv()
+        first, _ = env.reset(seed=3)
+        first = first["roll"].copy()
+        env.step(np.zeros(9, dtype=np.int64))
+        second, _ = env.reset(seed=3)
+        np.testing.assert_array_equal(first, second["roll"])
+        
+    def test_roll_dice(self):
+        env = YambEnv()
+        env.reset(seed=0)
+        for n in range(6):
+            roll = env.roll_dice(n)
+            self.assertEqual((6,), roll.shape)
+            self.assertEqual(n, roll.sum())
+        counts = sum(env.roll_dice(5) for _ in range(2 * YambEnv.DICE_BLOCK_SIZE))
+        self.assertTrue(np.all(np.abs(counts / counts.sum() - 1/6.) < 0.01))
+
+    def test_stats(self):
+        with unittest.mock.patch.dict(os.environ, {"YAMB_PROFILE": "0"}):
+            env = YambEnv()
+        env.reset(seed=0)
+        env.step(np.zeros(9, dtype=np.int64))
+        self.assertIsNone(env.profiler)
+        self.assertEqual({"phases": {}, "truncations": {}}, env.stats())
+        
+        with unittest.mock.patch.dict(os.environ, {"YAMB_PROFILE": "1"}):
+            env = YambEnv()
+        env.reset(seed=0)
+        env.action_masks()
+        env.step(np.zeros(9, dtype=np.int64))
+        action = np.zeros(9, dtype=np.int64)
+        action[0] = 6
+        env.step(action)
+        stats = env.stats()
+        self.assertEqual(1, stats["phases"]["action_masks"]["calls"])
+        self.assertEqual(2, stats["phases"]["step/check"]["calls"])
+        self.assertEqual(1, stats["phases"]["step/apply_keep"]["calls"])
+        self.assertNotIn("step/apply_fill", stats["phases"])
+        self.assertEqual({"keep": 1}, stats["truncations"])
+        self.assertFalse(YambEnv(profile=False).stats()["phases"])
@@ -0,0 +1,72 @@
+import unittest
+import copy
+import numpy as np
+from yamb.yamb_env import YambEnv
+from yamb.yamb_state import YambState
+from yamb.row_enum import ROW
+from yamb.col_enum import COL
+
+class TestYambState(unittest.TestCase):
+    def play(self, env: YambEnv, steps: int):
+        """Keeps every dice and fills out slobodno from the top"""
+        for _ in range(steps):
+            action = np.zeros(9, dtype=np.int64)
+            action[:6] = env.roll
+            action[YambEnv.ACTION_ROW_COL_FILL_IDX] = env.turn_number + len(ROW) * COL.SLOBODNO.value
+            env.step(action)
+    
+    def test_dtypes(self):
+        state = YambState()
+        self.assertEqual(np.int16, state.grid.dtype)
+        self.assertEqual(np.uint8, state.roll.dtype)
+        with self.assertRaises(AttributeError):
+            state.something_else = 1
+    
+    def test_snapshot_restore(self):
+        env = YambEnv()
+        env.reset(seed=0)
+        self.play(env, 10)
+        snapshot = env.state.snapshot()
+        self.assertEqual(snapshot, env.state)
+        
+        self.play(env, 10)
+        self.assertNotEqual(snapshot, env.state)
+        self.assertEqual(3, snapshot.turn_number)
+        
+        env.state.restore(snapshot)
+        self.assertEqual(snapshot, env.state)
+        self.assertEqual(snapshot.score, env.get_score())
+        self.assertEqual(snapshot.open_cells, env.open_cells)
+        
+        # restoring doesn't share any arrays with the snapshot
+        self.play(env, 10)
+        self.assertEqual(3, snapshot.turn_number)
+        self.assertNotEqual(snapshot, env.state)
+        
+    def test_pack_unpack(self):
+        env = YambEnv()
+        env.reset(seed=1)
+        self.play(env, 20)
+        data = env.state.pack()
+        self.assertEqual(YambState.PACKED_SIZE, len(data))
+        
+        state = YambState.unpack(data)
+        self.assertEqual(env.state, state)
+        np.testing.assert_array_equal(env.grid, state.grid)
+        np.testing.assert_array_equal(env.roll, state.roll)
+        self.assertEqual(env.get_score(), state.score)
+        self.assertEqual(env.next_dolje, state.next_dolje)
+        self.assertEqual(env.num_open_cells, state.num_open_cells)
+        
+        with self.assertRaises(ValueError):
+            YambState.unpack(data[:-1])
+            
+    def test_hash(self):
+        env = YambEnv()
+        env.reset(seed=2)
+        self.play(env, 5)
+        states = {env.state.snapshot(), copy.deepcopy(env.state), YambState.unpack(env.state.pack())}
+        self.assertEqual(1, len(states))
+        self.assertIn(env.state, states)
+        self.play(env, 1)
+        self.assertNotIn(env.state, states)
@@ -0,0 +1,74 @@
+import unittest
+import numpy as np
+from yamb import YambTurnEnv, FlattenGrid
+from yamb.yamb_state import YambState
+from yamb.yamb_turn_env import keep_dice
+from yamb.row_enum import ROW
+from yamb.col_enum import COL
+from stable_baselines3.common.env_checker import check_env
+
+class TestYambTurnEnv(unittest.TestCase):
+    def test_check_env(self):
+        check_env(FlattenGrid(YambTurnEnv()))
+
+    def test_random_game(self):
+        env = YambTurnEnv()
+        observation, _ = env.reset(seed=0)
+        rng = np.random.default_rng(0)
+        terminated = False
+        steps = 0
+        total_reward = 0
+        while not terminated:
+            mask = env.action_masks().copy()
+            self.assertEqual((YambTurnEnv.MASK_SIZE,), mask.shape)
+            self.assertEqual(0, observation["roll_number"])
+
+            # every square in the mask is valid and every other square isn't
+            targets = np.flatnonzero(mask[:YambTurnEnv.MASK_KEEP_POLICY_IDX])
+            for target in range(len(ROW) * len(COL)):
+                self.assertEqual(target in targets, env.check_target(target) is None)
+
+            action = np.array([rng.choice(targets), rng.integers(len(YambTurnEnv.KEEP_POLICIES))])
+            observation, reward, terminated, truncated, info = env.step(action)
+            self.assertFalse(truncated)
+            total_reward += reward
+            steps += 1
+
+        self.assertEqual(len(ROW) * len(COL), steps)
+        self.assertEqual(0, env.state.open_cells)
+        other = YambState()
+        other.set_grid(env.grid)
+        self.assertEqual(other.score, env.get_score())
+        self.assertEqual(env.get_score(), total_reward)
+
+    def test_invalid_target(self):
+        env = YambTurnEnv()
+        env.reset(seed=0)
+        # the gore column has to be filled from the bottom
+        observation, reward, terminated, truncated, info = env.step(np.array([len(ROW) * COL.GORE.value, 0]))
+        self.assertTrue(truncated)
+        self.assertEqual(env.truncation_penalty, reward)
+        self.assertIn("truncation_reason", info)
+
+        observation, reward, terminated, truncated, info = env.step(np.array([0, len(YambTurnEnv.KEEP_POLICIES)]))
+        self.assertTrue(truncated)
+
+    def test_announce(self):
+        env = YambTurnEnv()
+        env.reset(seed=0)
+        env.step(np.array([ROW.YAMB.value + len(ROW) * COL.NAJAVA.value, YambTurnEnv.KEEP_POLICY_STOP]))
+        self.assertNotEqual(YambState.NAN, env.grid[ROW.YAMB.value, COL.NAJAVA.value])
+        self.assertEqual(0, env.announced)
+        self.assertEqual(1, env.turn_number)
+
+    def test_keep_dice(self):
+        roll = np.array([2, 1, 0, 0, 1, 1], dtype=np.uint8)
+        np.testing.assert_array_equal(roll, keep_dice(YambTurnEnv.KEEP_POLICY_STOP, roll, ROW.ONES.value, 1))
+        np.testing.assert_array_equal([2, 0, 0, 0, 0, 0], keep_dice(YambTurnEnv.KEEP_POLICY_GREEDY, roll, ROW.ONES.value, 1))
+        np.testing.assert_array_equal([0, 0, 0, 0, 0, 1], keep_dice(YambTurnEnv.KEEP_POLICY_GREEDY, roll, ROW.SIXES.value, 1))
+        np.testing.assert_array_equal([2, 0, 0, 0, 0, 0], keep_dice(YambTurnEnv.KEEP_POLICY_MOST_COMMON, roll, ROW.YAMB.value, 1))
+        roll = np.array([0, 0, 0, 2, 0, 2], dtype=np.uint8)
+        np.testing.assert_array_equal([0, 0, 0, 0, 0, 2], keep_dice(YambTurnEnv.KEEP_POLICY_MOST_COMMON, roll, ROW.YAMB.value, 1))
+        # going for skala the extra one is rerolled
+        roll = np.array([2, 1, 1, 1, 0, 0], dtype=np.uint8)
+        np.testing.assert_array_equal([1, 1, 1, 1, 0, 0], keep_dice(YambTurnEnv.KEEP_POLICY_OPTIMAL, roll, ROW.SKALA.value, 2))
@@ -0,0 +1,125 @@
+import unittest
+import numpy as np
+from yamb.yamb_env import YambEnv
+from yamb.yamb_vec_env import YambVecEnv
+from yamb.row_enum import ROW
+from yamb.col_enum import COL
+
+def sample_masked_actions(masks: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Samples a random valid action for each row of masks"""
+    sizes = [6, 6, 6, 6, 6, 6, 2, len(ROW), len(ROW) * len(COL)]
+    actions = np.zeros((len(masks), len(sizes)), dtype=np.int64)
+    for i, mask in enumerate(masks):
+        for j, part in enumerate(np.split(mask, np.cumsum(sizes)[:-1])):
+            if part.any():
+                actions[i, j] = rng.choice(np.flatnonzero(part))
+    return actions
+
+def copy_game(vec_env: YambVecEnv, i: int) -> YambEnv:
+    env = YambEnv()
+    env.turn_number = vec_env.turn_number[i]
+    env.roll_number = vec_env.roll_number[i]
+    env.grid = vec_env.grid[i].copy()
+    env.roll = vec_env.roll[i].copy()
+    env.announced = vec_env.announced[i]
+    env.announced_row = vec_env.announced_row[i]
+    return env
+
+class TestYambVecEnv(unittest.TestCase):
+    def test_random_games_match_yamb_env(self):
+        rng = np.random.default_rng(0)
+        vec_env = YambVecEnv(8)
+        vec_env.seed(0)
+        vec_env.reset()
+        for step in range(len(ROW) * len(COL) * 3):
+            masks = vec_env.action_masks()
+            for i in range(vec_env.num_envs):
+                env = copy_game(vec_env, i)
+                np.testing.assert_array_equal(masks[i], env.action_masks())
+                self.assertEqual(vec_env.need_to_announce()[i], env.need_to_announce())
+
+            grids = vec_env.grid.copy()
+            observation, rewards, dones, infos = vec_env.step(sample_masked_actions(masks, rng))
+            for i in range(vec_env.num_envs):
+                self.assertNotIn("truncation_reason", infos[i])
+                if dones[i]:
+                    grids[i] = infos[i]["terminal_observation"]["grid"].reshape(len(ROW), len(COL)) * 145
+                else:
+                    grids[i] = vec_env.grid[i]
+                env = copy_game(vec_env, i)
+                env.grid = grids[i]
+                self.assertEqual(infos[i]["score"], env.get_score())
+
+        self.assertTrue(dones.all())
+        self.assertTrue(all(not info["TimeLimit.truncated"] for info in infos))
+        np.testing.assert_array_equal(vec_env.turn_number, 0)
+        np.testing.assert_array_equal(vec_env.score, 0)
+        np.testing.assert_array_equal(observation["roll_number"], 0)
+
+    def test_invalid_actions_truncate(self):
+        vec_env = YambVecEnv(3, flatten_grid=False)
+        vec_env.reset()
+        roll = vec_env.roll.copy()
+        actions = np.zeros((3, 9), dtype=np.int64)
+        # keep more dice than we have
+        actions[0, :6] = roll[0]
+        actions[0, 0] += 1
+        # announce a row which doesn't exist
+        actions[1, YambEnv.ACTION_ANNOUNCE_IDX] = 1
+        actions[1, YambEnv.ACTION_ANNOUNCE_ROW_IDX] = len(ROW)
+        # valid action
+        actions[2, :6] = roll[2]
+
+        observation, rewards, dones, infos = vec_env.step(actions)
+        np.testing.assert_array_equal(dones, [True, True, False])
+        np.testing.assert_array_equal(rewards, [vec_env.truncation_penalty, vec_env.truncation_penalty, 0])
+        self.assertIn("truncation_reason", infos[0])
+        self.assertIn("truncation_reason", infos[1])
+        self.assertTrue(infos[0]["TimeLimit.truncated"])
+        np.testing.assert_array_equal(infos[0]["terminal_observation"]["roll"], roll[0])
+        np.testing.assert_array_equal(observation["roll"][2], roll[2])
+        np.testing.assert_array_equal(observation["roll_number"], [0, 0, 1])
+
+    def test_seed(self):
+        vec_env = YambVecEnv(4)
+        vec_env.seed(123)
+        first = vec_env.reset()
+        vec_env.seed(123)
+        second = vec_env.reset()
+        np.testing.assert_array_equal(first["roll"], second["roll"])
+
+    def test_float32(self):
+        vec_env = YambVecEnv(4, float32=True)
+        reference = YambVecEnv(4)
+        vec_env.seed(0)
+        reference.seed(0)
+        observation = vec_env.reset()
+        expected = reference.reset()
+        self.assertEqual(np.float32, vec_env.observation_space["grid"].dtype)
+        for key in ["grid", "roll"]:
+            self.assertEqual(np.float32, observation[key].dtype)
+            np.testing.assert_array_equal(expected[key].astype(np.float32), observation[key])
+
+    def test_maskable_ppo(self):
+        from sb3_contrib import MaskablePPO
+        vec_env = YambVecEnv(4)
+        model = MaskablePPO("MultiInputPolicy", vec_env, n_steps=16, batch_size=32, n_epochs=1)
+        model.learn(total_timesteps=64)
+
+    def test_get_set_attr(self):
+        vec_env = YambVecEnv(3)
+        vec_env.seed(0)
+        vec_env.reset()
+        rolls = vec_env.get_attr("roll", [0, 2])
+        self.assertEqual(2, len(rolls))
+        np.testing.assert_array_equal(vec_env.roll[2], rolls[1])
+        self.assertEqual([-1000] * 3, vec_env.get_attr("truncation_penalty"))
+
+        grid = np.full((len(ROW), len(COL)), YambVecEnv.NAN)
+        grid[ROW.YAMB.value, COL.SLOBODNO.value] = 80
+        vec_env.set_attr("grid", grid, [1])
+        np.testing.assert_array_equal([0, 80, 0], vec_env.score)
+        vec_env.set_attr("truncation_penalty", -10)
+        self.assertEqual(-10, vec_env.truncation_penalty)
+        with self.assertRaises(ValueError):
+            vec_env.set_attr("truncation_penalty", -1, [0])
@@ -0,0 +1,108 @@
+import unittest
+import numpy as np
+from yamb import core, zobrist
+from yamb.yamb_state import YambState
+from yamb.zobrist import TranspositionTable
+from tests.test_core import sample_legal_action
+
+class TestZobrist(unittest.TestCase):
+    def test_apply_matches_state_key(self):
+        rng = np.random.default_rng(0)
+        for game in range(3):
+            state = core.new_game(rng)
+            key = zobrist.state_key(state)
+            while not core.is_terminal(state):
+                action = sample_legal_action(core.legal_actions(state), rng)
+                dice = core.roll_dice(rng, core.num_dice_to_roll(state, action))
+                key = zobrist.apply(key, state, action, dice)
+                core.apply(state, action, dice)
+                self.assertEqual(zobrist.state_key(state), key)
+                self.assertTrue(0 <= key < 2 ** 64)
+
+    def test_same_state_same_key(self):
+        rng = np.random.default_rng(1)
+        state = core.new_game(rng)
+        for _ in range(20):
+            core.step(state, sample_legal_action(core.legal_actions(state), rng), rng)
+        copy = YambState.unpack(state.pack())
+        self.assertEqual(zobrist.state_key(state), zobrist.state_key(copy))
+        # which row a turn that didn't announce would have announced doesn't matter
+        state.announced, state.announced_row = 0, 5
+        copy.announced, copy.announced_row = 0, 0
+        self.assertEqual(zobrist.state_key(state), zobrist.state_key(copy))
+        copy.announced = 1
+        self.assertNotEqual(zobrist.state_key(state), zobrist.state_key(copy))
+        copy.announced = 0
+        copy.roll_number = (copy.roll_number + 1) % 3
+        self.assertNotEqual(zobrist.state_key(state), zobrist.state_key(copy))
+
+    def test_grid_keys(self):
+        rng = np.random.default_rng(2)
+        grids, states = [], []
+        state = core.new_game(rng)
+        while not core.is_terminal(state):
+            core.step(state, sample_legal_action(core.legal_actions(state), rng), rng)
+            if state.roll_number == 0:
+                grids.append(state.grid.copy())
+                states.append(state.snapshot())
+        keys = zobrist.grid_keys(np.array(grids))
+        self.assertEqual((core.NUM_TURNS,), keys.shape)
+        self.assertEqual(core.NUM_TURNS, len(set(keys.tolist())))
+        for key, state in zip(keys.tolist(), states):
+            rest = zobrist.ROLL_NUMBER_KEYS[0] ^ zobrist.ANNOUNCE_KEYS[0]
+            for face, count in enumerate(state.roll):
+                rest ^= zobrist.ROLL_KEYS[face, count]
+            self.assertEqual(zobrist.state_key(state), key ^ int(rest))
+        self.assertEqual(0, zobrist.grid_keys(YambState().grid))
+
+class TestTranspositionTable(unittest.TestCase):
+    def test_get_and_store(self):
+        table = TranspositionTable(16)
+        self.assertIsNone(table.get(7))
+        table.store(7, 1.5, 3)
+        self.assertEqual((1.5, 3), table.get(7))
+        self.assertIsNone(table.get(7, min_depth=4))
+        # a shallower value doesn't replace a deeper one of the same key, a deeper one does
+        table.store(7, 2.5, 1)
+        self.assertEqual((1.5, 3), table.get(7))
+        table.store(7, 2.5, 5)
+        self.assertEqual((2.5, 5), table.get(7))
+        self.assertEqual(1, len(table))
+        self.assertEqual(dict(hits=3, misses=2, stores=2, replacements=0), table.stats)
+        self.assertEqual(0.6, table.hit_rate)
+        table.clear()
+        self.assertEqual(0, len(table))
+        self.assertIsNone(table.get(7))
+
+    def test_fixed_size(self):
+        for policy in zobrist.POLICIES:
+            with self.subTest(policy=policy):
+                table = TranspositionTable(64, bucket_size=4, policy=policy)
+                nbytes = table.nbytes
+                keys = np.random.default_rng(0).integers(2 ** 63, size=1000).tolist()
+                for i, key in enumerate(keys):
+                    table.store(key, float(i), i % 5)
+                self.assertEqual(64, len(table))
+                self.assertEqual(nbytes, table.nbytes)
+                self.assertEqual(1000 - 64, table.stats["replacements"])
+
+    def test_replacement(self):
+        # every key is in the one bucket
+        depth = TranspositionTable(2, bucket_size=2, policy="depth")
+        lru = TranspositionTable(2, bucket_size=2, policy="lru")
+        for table in [depth, lru]:
+            table.store(1, 1.0, 5)
+            table.store(2, 2.0, 1)
+            table.get(2)
+            table.store(3, 3.0, 2)
+        # depth replaces the shallowest and lru the one used longest ago
+        self.assertEqual([1, 3], [key for key in [1, 2, 3] if depth.get(key) is not None])
+        self.assertEqual([2, 3], [key for key in [1, 2, 3] if lru.get(key) is not None])
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            TranspositionTable(16, policy="fifo")
+        with self.assertRaises(ValueError):
+            TranspositionTable(2, bucket_size=4)
+        with self.assertRaises(ValueError):
+            TranspositionTable(16).store(1, 0.0, -1)
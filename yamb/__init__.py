@@ -1,4 +1,17 @@
 from .yamb_env import YambEnv
 from .col_enum import COL
 from .row_enum import ROW
-from .flatten_grid import FlattenGrid
\ No newline at end of file
+from .flatten_grid import FlattenGrid
+from .cell_values import CellValues
+from .yamb_state import YambState
+from .yamb_turn_env import YambTurnEnv
+
+def __getattr__(name):
+    # YambVecEnv imports stable_baselines3 and so torch, which is slow, so it is only imported when it's used
+    if name == "YambVecEnv":
+        from .yamb_vec_env import YambVecEnv
+        return YambVecEnv
+    if name == "SharedMemoryVecEnv":
+        from .shared_vec_env import SharedMemoryVecEnv
+        return SharedMemoryVecEnv
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
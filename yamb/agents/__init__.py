@@ -0,0 +1,19 @@
+"""Rule based players with the same predict as a stable_baselines3 model, which play many games at once."""
+from .base import Agent, decode_observation, fill_targets
+from .heuristics import GreedyAgent, ColumnAgent, LookaheadAgent
+
+AGENTS = {
+    "greedy": GreedyAgent,
+    "column": ColumnAgent,
+    "lookahead": LookaheadAgent,
+}
+
+def make_agent(name: str) -> Agent:
+    """
+    :param name: one of AGENTS
+
+    :return: a new agent
+    """
+    if name not in AGENTS:
+        raise ValueError(f"Agent {name} not one of {', '.join(AGENTS)}")
+    return AGENTS[name]()
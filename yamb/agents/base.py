@@ -0,0 +1,148 @@
+import numpy as np
+from abc import ABC, abstractmethod
+from typing import Optional, Tuple
+from numpy.typing import NDArray
+from ..row_enum import ROW
+from ..col_enum import COL
+from .. import core
+from .. import score_table
+from .. import solver
+
+
+def decode_observation(observation: dict) -> dict:
+    """Converts an observation in the YambEnv or FlattenGrid format, of a single game or stacked by a VecEnv,
+    into stacked integer arrays in the YambEnv format
+
+    :return: dict with turn_number, roll_number, announced and announced_row of shape (n,), grid of shape
+        (n, 14, 4) and roll of shape (n, 6)
+    """
+    roll = np.asarray(observation["roll"])
+    grid = np.asarray(observation["grid"])
+    n = len(roll) if roll.ndim == 2 else 1
+    # a flattened grid has the same number of dimensions as the roll, the unflattened grid has one more
+    if grid.ndim == roll.ndim:
+        grid = np.rint(grid * 145.0)
+        roll = np.rint(roll * 5.0 + 1.0)
+    games = {
+        key: np.asarray(observation[key], dtype=np.int64).reshape(n)
+        for key in ["turn_number", "roll_number", "announced", "announced_row"]
+    }
+    games["grid"] = grid.astype(np.int64).reshape(n, len(ROW), len(COL))
+    games["roll"] = roll.astype(np.int64).reshape(n, score_table.NUM_FACES)
+    return games
+
+def fill_targets(games: dict) -> NDArray[np.bool_]:
+    """Which grid squares each game is allowed to fill out at the end of its turn, given what it has announced
+
+    :param games: stacked observations in the format of decode_observation
+
+    :return: (n, 14, 4) boolean array
+    """
+    grid = games["grid"]
+    rows = np.arange(len(ROW))[None, :]
+    targets = grid == core.NAN
+    dolje = targets[:, :, COL.DOLJE.value]
+    next_dolje = np.where(dolje.any(axis=1), dolje.argmax(axis=1), len(ROW))
+    gore = targets[:, ::-1, COL.GORE.value]
+    next_gore = np.where(gore.any(axis=1), len(ROW) - 1 - gore.argmax(axis=1), -1)
+    targets[:, :, COL.DOLJE.value] &= rows == next_dolje[:, None]
+    targets[:, :, COL.GORE.value] &= rows == next_gore[:, None]
+    announced = games["announced"][:, None] != 0
+    targets[:, :, COL.NAJAVA.value] &= announced & (rows == games["announced_row"][:, None])
+    targets[:, :, :COL.NAJAVA.value] &= ~announced[:, :, None]
+    return targets
+
+def best_cells(scores: NDArray[np.float64], allowed: NDArray[np.bool_]) -> Tuple[NDArray[np.int64], NDArray[np.int64]]:
+    """
+    :param scores: (n, 14, 4) worth of filling out each grid square
+    :param allowed: (n, 14, 4) which grid squares can be chosen, at least one per game
+
+    :return: row and col of the best allowed grid square of each game, the first in row_col_fill order on ties
+    """
+    scores = np.where(allowed, scores, -np.inf)
+    # row_col_fill is ordered column by column
+    col, row = np.divmod(scores.transpose(0, 2, 1).reshape(len(scores), -1).argmax(axis=1), len(ROW))
+    return row, col
+
+
+class Agent(ABC):
+    """A player which chooses actions for many games at once from their observations, with the same predict as a
+    stable_baselines3 model so it can be used by evaluate_policy, scripts/evaluate.py and scripts/test.py.
+
+    Subclasses must implement keep, which chooses the dice to keep, and can override cell_offsets, the worth added
+    to the score of each grid square when choosing which to fill out.
+    """
+
+    def predict(
+        self,
+        observation: dict,
+        state: Optional[Tuple] = None,
+        episode_start: Optional[NDArray[np.bool_]] = None,
+        deterministic: bool = True,
+        action_masks: Optional[NDArray[np.bool_]] = None,
+    ) -> Tuple[NDArray[np.int64], None]:
+        """
+        :param observation: observation of a single game or stacked observations, in the YambEnv or FlattenGrid format
+        :param state: unused, the agents have no recurrent state
+        :param episode_start: unused
+        :param deterministic: unused, the agents are deterministic
+        :param action_masks: masks in the YambEnv.action_masks layout, the grid square filled out is always allowed by them
+
+        :return: actions of shape (9,) for a single game or (n, 9) for stacked observations, and None for the state
+        """
+        single = np.asarray(observation["roll"]).ndim == 1
+        games = decode_observation(observation)
+        masks = None if action_masks is None else np.asarray(action_masks).reshape(len(games["roll"]), core.MASK_SIZE)
+        actions = self.act(games, masks)
+        return (actions[0] if single else actions), None
+
+    def act(self, games: dict, masks: Optional[NDArray[np.bool_]] = None) -> NDArray[np.int64]:
+        """
+        :param games: stacked observations in the format of decode_observation
+        :param masks: optional (n, 108) action masks
+
+        :return: (n, 9) actions
+        """
+        actions = np.zeros((len(games["roll"]), 9), dtype=np.int64)
+        for roll_number in range(3):
+            idx = np.flatnonzero(games["roll_number"] == roll_number)
+            if len(idx) == 0:
+                continue
+            subset = {key: value[idx] for key, value in games.items()}
+            if roll_number == 2:
+                allowed = fill_targets(subset)
+                if masks is not None:
+                    fill = masks[idx, core.MASK_ROW_COL_FILL_IDX:].reshape(len(idx), len(COL), len(ROW))
+                    allowed &= fill.transpose(0, 2, 1)
+                row, col = best_cells(self.fill_scores(subset), allowed)
+                actions[idx, core.ACTION_ROW_COL_FILL_IDX] = row + len(ROW) * col
+                continue
+            keep, announce, announce_row = self.keep(subset, solver.MAX_REROLLS - roll_number)
+            actions[idx, :core.ACTION_ANNOUNCE_IDX] = keep
+            if roll_number == 0:
+                actions[idx, core.ACTION_ANNOUNCE_IDX] = announce
+                actions[idx, core.ACTION_ANNOUNCE_ROW_IDX] = np.where(announce, announce_row, 0)
+        return actions
+
+    def fill_scores(self, games: dict) -> NDArray[np.float64]:
+        """
+        :return: (n, 14, 4) worth of filling out each grid square with the current roll
+        """
+        values = score_table.SCORE_TABLE[score_table.roll_to_index(games["roll"])]
+        return values[:, :, None] + self.cell_offsets()
+
+    def cell_offsets(self) -> NDArray[np.float64]:
+        """
+        :return: (14, 4) worth added to the score of each grid square when choosing which to fill out
+        """
+        return np.zeros((len(ROW), len(COL)))
+
+    @abstractmethod
+    def keep(self, games: dict, rerolls: int) -> Tuple[NDArray[np.int64], NDArray[np.bool_], NDArray[np.int64]]:
+        """
+        :param games: stacked observations on the first or second roll, in the format of decode_observation
+        :param rerolls: how many rerolls are left, 2 on the first roll and 1 on the second
+
+        :return: dice to keep of shape (n, 6), and whether to announce and which row of shape (n,) which are only
+            used on the first roll
+        """
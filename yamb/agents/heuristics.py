@@ -0,0 +1,101 @@
+import functools
+import numpy as np
+from typing import Tuple
+from numpy.typing import NDArray
+from ..col_enum import COL
+from .. import core
+from .. import score_table
+from .. import solver
+from .. import transitions
+from .base import Agent, fill_targets, best_cells
+
+# worth of filling out a grid square in each column on top of its score, the dolje and gore columns have to be
+# filled in order so a good roll for their next square is taken while the slobodno column is kept for later
+COLUMN_BONUS = np.array([8.0, 8.0, 0.0, 0.0])
+
+
+@functools.lru_cache(maxsize=None)
+def row_pars() -> NDArray[np.float64]:
+    """
+    :return: (14,) expected score of a turn which sets out to fill out each row and keeps optimally
+    """
+    _, roll_values = solver.row_tables(solver.MAX_REROLLS)
+    # the first roll of a turn is a reroll of all five dice
+    pars = roll_values @ transitions.dense()[score_table.keep_to_index(np.zeros(score_table.NUM_FACES, dtype=np.int64))]
+    pars.flags.writeable = False
+    return pars
+
+def most_common_face(roll: NDArray[np.int64]) -> NDArray[np.int64]:
+    """
+    :param roll: (n, 6) rolls in multinomial format
+
+    :return: (n, 6) every die of the most common face of each roll, the highest face when there is a tie
+    """
+    batch = np.arange(len(roll))
+    face = score_table.NUM_FACES - 1 - roll[:, ::-1].argmax(axis=1)
+    keep = np.zeros_like(roll)
+    keep[batch, face] = roll[batch, face]
+    return keep
+
+
+class GreedyAgent(Agent):
+    """Keeps every die of the most common face and fills out the grid square which scores the most right now.
+    Only announces when it has to, the najava square it announces is the one which scores the most right now.
+    """
+    def keep(self, games: dict, rerolls: int) -> Tuple[NDArray[np.int64], NDArray[np.bool_], NDArray[np.int64]]:
+        grid = games["grid"]
+        announce = ~np.any(grid[:, :, :COL.NAJAVA.value] == core.NAN, axis=(1, 2))
+        values = score_table.SCORE_TABLE[score_table.roll_to_index(games["roll"])]
+        najava = np.where(grid[:, :, COL.NAJAVA.value] == core.NAN, values, -1)
+        return most_common_face(games["roll"]), announce, najava.argmax(axis=1)
+
+
+class ColumnAgent(Agent):
+    """Scores each grid square by its expected score with optimal keeps for its row, less the par of the row, plus
+    COLUMN_BONUS for the order the columns have to be filled in. On every roll it chooses the best grid square it can
+    still fill out, announcing it on the first roll when it's in the najava column, and keeps the solver's dice for
+    its row.
+    """
+    def cell_offsets(self) -> NDArray[np.float64]:
+        return COLUMN_BONUS[None, :] - row_pars()[:, None]
+
+    def keep(self, games: dict, rerolls: int) -> Tuple[NDArray[np.int64], NDArray[np.bool_], NDArray[np.int64]]:
+        keeps, roll_values = solver.row_tables(rerolls)
+        idx = score_table.roll_to_index(games["roll"])
+        allowed = fill_targets(games)
+        if rerolls == solver.MAX_REROLLS:
+            allowed[:, :, COL.NAJAVA.value] = games["grid"][:, :, COL.NAJAVA.value] == core.NAN
+        row, col = best_cells(roll_values[:, idx].T[:, :, None] + self.cell_offsets(), allowed)
+        keep = score_table.KEEPS[keeps[row, idx]].astype(np.int64)
+        return keep, col == COL.NAJAVA.value, row
+
+
+class LookaheadAgent(ColumnAgent):
+    """Scores grid squares the same as ColumnAgent but keeps the dice which maximise the expected score of the best
+    grid square at the end of the turn, solving the whole turn for every game with yamb.solver. On the first roll it
+    announces the najava square with the highest expected score when that beats not announcing.
+    """
+    def keep(self, games: dict, rerolls: int) -> Tuple[NDArray[np.int64], NDArray[np.bool_], NDArray[np.int64]]:
+        batch = np.arange(len(games["roll"]))
+        idx = score_table.roll_to_index(games["roll"])
+        offsets = self.cell_offsets()
+        allowed = fill_targets(games)
+        can_fill = allowed.any(axis=(1, 2))
+
+        # the worth of ending the turn with each roll is the score of the best grid square it can fill out
+        row_offsets = np.where(allowed, offsets, -np.inf).max(axis=2)
+        row_offsets[~can_fill] = 0.0
+        values = (score_table.SCORE_TABLE[None, :, :] + row_offsets[:, None, :]).max(axis=2)
+        keep, worth = solver.best_keeps(games["roll"], rerolls, values=values)
+        worth = np.where(can_fill, worth, -np.inf)
+
+        announce = np.zeros(len(batch), dtype=np.bool_)
+        row = np.zeros(len(batch), dtype=np.int64)
+        if rerolls == solver.MAX_REROLLS:
+            row_keeps, row_values = solver.row_tables(rerolls)
+            najava = row_values[:, idx].T + offsets[:, COL.NAJAVA.value]
+            najava = np.where(games["grid"][:, :, COL.NAJAVA.value] == core.NAN, najava, -np.inf)
+            row = najava.argmax(axis=1)
+            announce = najava[batch, row] > worth
+            keep = np.where(announce[:, None], score_table.KEEPS[row_keeps[row, idx]], keep)
+        return keep, announce, row
@@ -0,0 +1,211 @@
+"""Warm starting a MaskablePPO by imitating one of yamb.agents before reinforcement learning.
+
+Worker processes play games with the expert and write every step to a shard on disk, a directory holding one .npy
+per observation key in the FlattenGrid format (float32) along with action_masks.npy and actions.npy. The policy is
+trained on each shard with masked cross entropy as soon as it's ready while the workers carry on generating the next
+ones, at most max_pending shards ahead, so generation and training overlap and only one shard is ever in memory.
+
+The cross entropy only counts the parts of an action which are a choice: keeps on the first two rolls, the
+announcement on the first, its row only when announcing and the grid square on the last.
+"""
+import os
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from numpy.typing import NDArray
+from .row_enum import ROW
+from .col_enum import COL
+from . import core
+from .evaluation import shard_seeds
+
+OBSERVATION_KEYS = ("turn_number", "roll_number", "grid", "roll", "announced", "announced_row")
+# the sizes of the parts of the action space
+ACTION_DIMS = np.array([6] * 6 + [2, len(ROW), len(ROW) * len(COL)])
+
+
+def generate_shard(agent: str, num_games: int, num_envs: int, seed: Optional[int], path: str) -> str:
+    """Plays num_games games with agent and writes the observation, action mask and action of every step to path
+
+    :param agent: name of one of yamb.agents.AGENTS
+    :param num_envs: number of games stepped together
+    :param seed: seed of the dice
+
+    :return: path
+    """
+    from .agents import make_agent
+    from .yamb_vec_env import YambVecEnv
+    player = make_agent(agent)
+    num_envs = max(1, min(num_envs, num_games))
+    vec_env = YambVecEnv(num_envs, flatten_grid=True, float32=True)
+    vec_env.seed(seed)
+    observation = vec_env.reset()
+    steps: Dict[str, List[NDArray]] = {key: [] for key in OBSERVATION_KEYS + ("action_masks", "actions")}
+    # slot i plays games i, i + num_envs, ... so stop recording a slot once its next game is past num_games
+    while np.any(vec_env.game_ids < num_games):
+        masks = vec_env.action_masks()
+        actions, _ = player.predict(observation, action_masks=masks, deterministic=True)
+        playing = vec_env.game_ids < num_games
+        for key in OBSERVATION_KEYS:
+            steps[key].append(observation[key][playing])
+        steps["action_masks"].append(masks[playing])
+        steps["actions"].append(actions[playing].astype(np.int8))
+        observation, _, _, _ = vec_env.step(actions)
+    vec_env.close()
+    os.makedirs(path, exist_ok=True)
+    for key, values in steps.items():
+        np.save(os.path.join(path, f"{key}.npy"), np.concatenate(values))
+    return path
+
+def load_shard(path: str) -> Tuple[Dict[str, NDArray], NDArray[np.bool_], NDArray[np.int8]]:
+    """
+    :return: the observations, action masks and actions of the shard at path, memory mapped
+    """
+    def load(key):
+        return np.load(os.path.join(path, f"{key}.npy"), mmap_mode="r")
+    return {key: load(key) for key in OBSERVATION_KEYS}, load("action_masks"), load("actions")
+
+def stream_shards(
+    agent: str,
+    num_games: int,
+    directory: str,
+    games_per_shard: int = 64,
+    num_envs: int = 64,
+    workers: int = 1,
+    max_pending: Optional[int] = None,
+    seed: Optional[int] = None,
+) -> Iterator[str]:
+    """Generates shards of num_games games in total, in order, each generated by a worker process
+
+    :param directory: where to write the shards
+    :param workers: number of processes, 1 generates each shard in this process when it's asked for
+    :param max_pending: the most shards generated ahead of the one being consumed, 2 * workers by default
+
+    :return: iterator of the paths of the shards
+    """
+    sizes = [min(games_per_shard, num_games - start) for start in range(0, num_games, games_per_shard)]
+    seeds = shard_seeds(seed, len(sizes))
+    tasks = [
+        (agent, games, num_envs, s, os.path.join(directory, f"shard-{i:05d}"))
+        for i, (games, s) in enumerate(zip(sizes, seeds))
+    ]
+    if workers == 1:
+        for task in tasks:
+            yield generate_shard(*task)
+        return
+    max_pending = max_pending or 2 * workers
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for task in tasks:
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+            pending.append(pool.submit(generate_shard, *task))
+        while pending:
+            yield pending.popleft().result()
+
+def active_parts(masks: NDArray[np.bool_], actions: NDArray[np.integer]) -> NDArray[np.bool_]:
+    """
+    :param masks: (n, 108) action masks
+    :param actions: (n, 9) actions
+
+    :return: (n, 9) whether each part of each action was a choice, it had some legal value and for the announced
+        row the action announces
+    """
+    offsets = np.concatenate([[0], np.cumsum(ACTION_DIMS)[:-1]])
+    active = np.logical_or.reduceat(masks, offsets, axis=1)
+    active[:, core.ACTION_ANNOUNCE_ROW_IDX] &= actions[:, core.ACTION_ANNOUNCE_IDX] == 1
+    return active
+
+def masked_cross_entropy(
+    policy, observations: Dict[str, NDArray], masks: NDArray[np.bool_], actions: NDArray[np.integer],
+):
+    """
+    :param policy: the MaskableActorCriticPolicy of a MaskablePPO
+    :param observations: (n, ...) observations in the FlattenGrid format
+
+    :return: mean over the batch of the negative log likelihood of the active parts of actions, as a torch scalar
+    """
+    import torch
+    obs_tensor, _ = policy.obs_to_tensor(observations)
+    distribution = policy.get_distribution(obs_tensor, action_masks=masks)
+    actions_tensor = torch.as_tensor(np.asarray(actions, dtype=np.int64), device=policy.device)
+    log_probs = torch.stack([
+        part.log_prob(action) for part, action in zip(distribution.distributions, actions_tensor.unbind(1))
+    ], dim=1)
+    active = torch.as_tensor(active_parts(masks, actions), device=policy.device)
+    return -(log_probs * active).sum(dim=1).mean()
+
+def pretrain_shard(
+    model, path: str, batch_size: int = 256, epochs: int = 1, rng: Optional[np.random.Generator] = None,
+) -> float:
+    """Trains the policy of model on the shard at path with masked cross entropy, using the policy's optimizer
+
+    :param model: a MaskablePPO on FlattenGrid observations
+    :param epochs: passes over the shard
+
+    :return: the mean loss over the minibatches
+    """
+    import torch
+    rng = rng if rng is not None else np.random.default_rng()
+    observations, masks, actions = load_shard(path)
+    policy = model.policy
+    policy.set_training_mode(True)
+    losses = []
+    for _ in range(epochs):
+        order = rng.permutation(len(actions))
+        for start in range(0, len(order), batch_size):
+            # sorted so the reads of the memory mapped shard go forwards
+            idx = np.sort(order[start:start + batch_size])
+            batch = {key: value[idx] for key, value in observations.items()}
+            loss = masked_cross_entropy(policy, batch, masks[idx], actions[idx])
+            policy.optimizer.zero_grad()
+            loss.backward()
+            torch.nn.utils.clip_grad_norm_(policy.parameters(), model.max_grad_norm)
+            policy.optimizer.step()
+            losses.append(loss.item())
+    policy.set_training_mode(False)
+    return float(np.mean(losses))
+
+def behavior_clone(
+    model,
+    agent: str = "column",
+    num_games: int = 1024,
+    games_per_shard: int = 64,
+    num_envs: int = 64,
+    workers: int = 1,
+    directory: Optional[str] = None,
+    batch_size: int = 256,
+    epochs: int = 1,
+    seed: Optional[int] = None,
+    on_shard: Optional[Callable[[int, float], None]] = None,
+) -> List[float]:
+    """Pretrains the policy of model to imitate agent, training on each shard as soon as it has been generated
+
+    :param model: a MaskablePPO on FlattenGrid observations
+    :param agent: name of one of yamb.agents.AGENTS to imitate
+    :param workers: number of processes generating games while the policy trains
+    :param directory: where to keep the shards, None uses a temporary directory and deletes each shard once it has
+        been trained on
+    :param epochs: passes over each shard
+    :param on_shard: called with the index of each shard and its mean loss once it has been trained on
+
+    :return: the mean loss of each shard
+    """
+    keep = directory is not None
+    directory = directory if keep else tempfile.mkdtemp(prefix="yamb-bc-")
+    rng = np.random.default_rng(seed)
+    losses = []
+    try:
+        shards = stream_shards(agent, num_games, directory, games_per_shard, num_envs, workers, seed=seed)
+        for i, path in enumerate(shards):
+            losses.append(pretrain_shard(model, path, batch_size, epochs, rng))
+            if not keep:
+                shutil.rmtree(path)
+            if on_shard is not None:
+                on_shard(i, losses[-1])
+    finally:
+        if not keep:
+            shutil.rmtree(directory, ignore_errors=True)
+    return losses
@@ -0,0 +1,67 @@
+"""Features of what each grid square is worth with the current roll, so the policy doesn't have to learn the scoring
+rules from the counts of the dice.
+
+Both features are looked up in tables computed once, indexed by the roll number, the roll and the row, so adding
+them costs a gather per step. Grid squares the turn can't end in, see core.fill_targets, are -1.
+"""
+import functools
+import numpy as np
+from numpy.typing import NDArray
+from gymnasium import spaces, ObservationWrapper
+from .row_enum import ROW
+from .col_enum import COL
+from . import core
+from . import score_table
+from . import solver
+
+# the same scale as FlattenGrid's grid
+SCALE = 145.0
+
+
+@functools.lru_cache(maxsize=None)
+def cell_value_tables() -> NDArray[np.float64]:
+    """
+    :return: (3, 252, 14) array, [roll_number, roll, row] is the expected score of filling out row at the end of the
+        turn keeping optimally for it, from ROLLS[roll] on roll roll_number, scaled like FlattenGrid's grid. On the
+        last roll this is the score of the roll.
+    """
+    tables = np.stack([
+        solver.row_tables(solver.MAX_REROLLS - roll_number)[1].T for roll_number in range(solver.MAX_REROLLS + 1)
+    ]) / SCALE
+    tables.flags.writeable = False
+    return tables
+
+
+class CellValues(ObservationWrapper):
+    """Adds cell_values to the observation, the score of the current roll in each grid square, and optionally
+    cell_expectations, the expected score of each grid square after keeping optimally for it on the rerolls left.
+    They are flattened in row_col_fill order, the same as the fill part of the action, and scaled like FlattenGrid's
+    grid, with -1 for grid squares the turn can't end in.
+
+    Wrap a YambEnv, optionally in FlattenGrid, whose float dtype is used for the features.
+
+    :param expectations: whether to add cell_expectations as well
+    """
+    def __init__(self, env, expectations: bool = False):
+        super().__init__(env)
+        self.expectations = expectations
+        grid_space = env.observation_space["grid"]
+        self.dtype = grid_space.dtype if np.issubdtype(grid_space.dtype, np.floating) else np.dtype(np.float64)
+        self.tables = cell_value_tables().astype(self.dtype)
+        self._targets = np.zeros((len(COL), len(ROW)), dtype=np.bool_)
+        self._unreachable = np.full((len(COL), len(ROW)), -1, dtype=self.dtype)
+        box = spaces.Box(low=-1, high=1, shape=(len(ROW) * len(COL),), dtype=self.dtype)
+        observation_spaces = dict(env.observation_space.spaces, cell_values=box)
+        if expectations:
+            observation_spaces["cell_expectations"] = box
+        self.observation_space = spaces.Dict(observation_spaces)
+
+    def observation(self, obs: dict) -> dict:
+        state = self.env.unwrapped.state
+        targets = core.fill_targets(state, out=self._targets)
+        idx = score_table.roll_to_index_unchecked(state.roll)
+        obs = dict(obs)
+        obs["cell_values"] = np.where(targets, self.tables[solver.MAX_REROLLS, idx], self._unreachable).reshape(-1)
+        if self.expectations:
+            obs["cell_expectations"] = np.where(targets, self.tables[state.roll_number, idx], self._unreachable).reshape(-1)
+        return obs
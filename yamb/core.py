@@ -0,0 +1,309 @@
+"""The rules of yamb as plain functions on a YambState, without gymnasium.
+
+Actions are arrays of length 9 [num1s, num2s, num3s, num4s, num5s, num6s, announce, announce_row, row_col_fill],
+the same as YambEnv.action_space. Functions which roll dice take the dice or a np.random.Generator explicitly.
+"""
+import numpy as np
+from typing import Optional
+from numpy.typing import NDArray
+from .row_enum import ROW
+from .col_enum import COL
+from .yamb_state import YambState
+from . import score_table
+
+NAN = YambState.NAN
+NUM_TURNS = len(ROW) * len(COL)
+ACTION_ANNOUNCE_IDX = 6
+ACTION_ANNOUNCE_ROW_IDX = 7
+ACTION_ROW_COL_FILL_IDX = 8
+# offsets of each part of the action mask [num1s, ..., num6s, announce, announce_row, row_col_fill]
+MASK_ANNOUNCE_IDX = 6 * 6
+MASK_ANNOUNCE_ROW_IDX = MASK_ANNOUNCE_IDX + 2
+MASK_ROW_COL_FILL_IDX = MASK_ANNOUNCE_ROW_IDX + len(ROW)
+MASK_SIZE = MASK_ROW_COL_FILL_IDX + len(ROW) * len(COL)
+# the parts of an action which can be invalid, see truncation_kind
+TRUNCATION_KINDS = ("keep", "announce", "fill")
+# KEEP_MASKS[roll_to_index(roll)] is the num1s, ..., num6s part of the action mask for that roll
+KEEP_MASKS = (np.arange(6)[None, None, :] <= score_table.ROLLS[:, :, None]).reshape(score_table.NUM_ROLLS, -1)
+KEEP_MASKS.flags.writeable = False
+
+
+def legal_actions(state: YambState, out: Optional[NDArray[np.bool_]] = None) -> NDArray[np.bool_]:
+    """One hot encoded array whether each part of an action is valid, the format sb3_contrib expects for action masks
+
+    :param state: state of the game
+    :param out: optional buffer of size MASK_SIZE to write the mask into
+
+    :return: boolean array of size sum([6, 6, 6, 6, 6, 6, 2, 14, 56])
+    """
+    if out is None:
+        out = np.zeros(MASK_SIZE, dtype=np.bool_)
+    else:
+        out[:] = False
+
+    # can only keep dice that you have
+    if (state.roll_number == 0) or (state.roll_number == 1):
+        out[:MASK_ANNOUNCE_IDX] = KEEP_MASKS[score_table.roll_to_index_unchecked(state.roll)]
+
+    if state.roll_number == 0:
+        najava_open = state.open_mask[COL.NAJAVA.value]
+        out[MASK_ANNOUNCE_ROW_IDX:MASK_ROW_COL_FILL_IDX] = najava_open
+        out[MASK_ANNOUNCE_IDX] = state.num_open_cells > 0
+        out[MASK_ANNOUNCE_IDX + 1] = najava_open.any()
+
+    if state.roll_number == 2:
+        # row_col_fill is ordered column by column so this view is indexed [col, row]
+        fill_targets(state, out=out[MASK_ROW_COL_FILL_IDX:].reshape(len(COL), len(ROW)))
+
+    return out
+
+def fill_targets(state: YambState, out: Optional[NDArray[np.bool_]] = None) -> NDArray[np.bool_]:
+    """Which grid squares the current turn can still end by filling out, on the last roll these are the grid squares
+    legal_actions allows. On the first roll any open najava square can still be reached by announcing it.
+
+    :param state: state of the game
+    :param out: optional (4, 14) buffer to write into
+
+    :return: (4, 14) boolean array indexed [col, row], flattened it is in row_col_fill order
+    """
+    if out is None:
+        out = np.zeros((len(COL), len(ROW)), dtype=np.bool_)
+    else:
+        out[:] = False
+    if state.announced:
+        out[COL.NAJAVA.value, state.announced_row] = state.open_mask[COL.NAJAVA.value, state.announced_row]
+        return out
+    out[COL.SLOBODNO.value] = state.open_mask[COL.SLOBODNO.value]
+    if state.next_dolje < len(ROW):
+        out[COL.DOLJE.value, state.next_dolje] = True
+    if state.next_gore >= 0:
+        out[COL.GORE.value, state.next_gore] = True
+    if state.roll_number == 0:
+        out[COL.NAJAVA.value] = state.open_mask[COL.NAJAVA.value]
+    return out
+
+def check_keep(state: YambState, action: NDArray[np.int64]) -> Optional[str]:
+    """Checks the dice to keep on the first or second roll
+
+    :return: None if the action is valid otherwise the truncation reason
+    """
+    keep = action[:ACTION_ANNOUNCE_IDX]
+    if any( (state.roll - keep) < 0 ) or any(keep < 0):
+        return f"Can't keep {keep} when you only have {state.roll}"
+    return None
+
+def check_announce(state: YambState, action: NDArray[np.int64]) -> Optional[str]:
+    """Checks the announcement on the first roll
+
+    :return: None if the action is valid otherwise the truncation reason
+    """
+    if action[ACTION_ANNOUNCE_IDX] == 1:
+        if not valid_announce_row(state, action[ACTION_ANNOUNCE_ROW_IDX]):
+            return f"Announce row {action[ACTION_ANNOUNCE_ROW_IDX]} not valid"
+
+    if action[ACTION_ANNOUNCE_IDX] == 0:
+        if need_to_announce(state):
+            return "Only najava column left so must use it"
+
+    return None
+
+def check_fill(state: YambState, row_col_fill: int) -> Optional[str]:
+    """Checks the grid square to fill out on the last roll
+
+    :param row_col_fill: int indicating which row and col of the grid to fill out
+
+    :return: None if the action is valid otherwise the truncation reason
+    """
+    r, c = convert_row_col_fill(row_col_fill)
+    if not (state.open_cells >> row_col_fill) & 1:
+        return f"{r}, {c} already filled in "
+
+    if (c == COL.GORE.value) and (r != state.next_gore):
+        return f"Gore needed {ROW(state.next_gore)} but trying {ROW(r)}"
+
+    if (c == COL.DOLJE.value) and (r != state.next_dolje):
+        return f"Dolje needed {ROW(state.next_dolje)} but trying {ROW(r)}"
+
+    if state.announced and ((c != COL.NAJAVA.value) or (r != state.announced_row)):
+        return f"Announced {ROW(state.announced_row)} but trying to fill {ROW(r)}, {COL(c)}"
+
+    if (state.announced==0) and (c == COL.NAJAVA.value):
+        return f"Have not announced so cannot fill out najava column"
+
+    return None
+
+def check_action(state: YambState, action: NDArray[np.int64]) -> Optional[str]:
+    """Checks whether an action is valid on the current roll
+
+    :return: None if the action is valid otherwise the truncation reason
+    """
+    if state.roll_number == 2:
+        return check_fill(state, action[ACTION_ROW_COL_FILL_IDX])
+
+    reason = check_keep(state, action)
+    if reason is None and state.roll_number == 0:
+        reason = check_announce(state, action)
+    return reason
+
+def truncation_kind(state: YambState, action: NDArray[np.int64]) -> str:
+    """
+    :param action: an action which check_action has rejected
+
+    :return: which part of the action was invalid, one of TRUNCATION_KINDS
+    """
+    if state.roll_number == 2:
+        return "fill"
+    if check_keep(state, action) is not None:
+        return "keep"
+    return "announce"
+
+def valid_announce_row(state: YambState, row: int) -> bool:
+    """
+    :param row: a row which you which to announce
+
+    :return: bool indicated whether you can actually announce that row
+    """
+    if not 0 <= row < len(ROW):
+        return False
+
+    return bool((state.open_cells >> (row + len(ROW) * COL.NAJAVA.value)) & 1)
+
+def need_to_announce(state: YambState) -> bool:
+    """You must announce on your first roll when the rest of the grid has been filled
+    :return: whether you need to announce on your first roll
+    """
+    return state.num_open_cells == 0
+
+def num_dice_to_roll(state: YambState, action: NDArray[np.int64]) -> int:
+    """
+    :return: how many dice are rolled when a valid action is applied
+    """
+    if state.roll_number == 2:
+        return 5
+    return 5 - int(sum(action[:ACTION_ANNOUNCE_IDX]))
+
+def apply(state: YambState, action: NDArray[np.int64], dice: NDArray[np.int64]):
+    """Applies a valid action to the state in place, take a snapshot first if you need the state from before
+
+    :param state: state of the game
+    :param action: numpy array of length 9 which check_action has accepted
+    :param dice: the num_dice_to_roll(state, action) dice which were rolled, in multinomial format
+    """
+    if state.roll_number == 2:
+        # we are moving on to the next turn
+        r, c = convert_row_col_fill(action[ACTION_ROW_COL_FILL_IDX])
+        state.fill_grid_square(r, c, int(score_table.SCORE_TABLE[score_table.roll_to_index_unchecked(state.roll), r]))
+        state.roll_number = 0
+        state.turn_number += 1
+        state.announced = 0
+        state.announced_row = 0
+        state.roll[:] = dice
+        return
+
+    if state.roll_number == 0:
+        state.announced = int(action[ACTION_ANNOUNCE_IDX])
+        state.announced_row = int(action[ACTION_ANNOUNCE_ROW_IDX])
+    state.roll_number += 1
+    state.roll[:] = dice + action[:ACTION_ANNOUNCE_IDX]
+
+def roll_dice(rng: np.random.Generator, number_of_dice: int) -> NDArray[np.int64]:
+    """
+    :return: number_of_dice dice rolled with rng in multinomial format
+    """
+    return np.bincount(rng.integers(0, 6, size=number_of_dice), minlength=6)
+
+def step(state: YambState, action: NDArray[np.int64], rng: np.random.Generator) -> Optional[str]:
+    """Checks an action and if it is valid rolls the dice with rng and applies it to the state in place
+
+    :return: None if the action was applied otherwise the truncation reason
+    """
+    reason = check_action(state, action)
+    if reason is None:
+        apply(state, action, roll_dice(rng, num_dice_to_roll(state, action)))
+    return reason
+
+def new_game(rng: np.random.Generator) -> YambState:
+    """
+    :return: state at the start of a game with the first roll made using rng
+    """
+    state = YambState()
+    state.roll[:] = roll_dice(rng, 5)
+    return state
+
+def score(state: YambState) -> int:
+    """
+    :return: game score thus far, anything with an nan will be assigned zero
+    """
+    return state.score
+
+def is_terminal(state: YambState) -> bool:
+    """
+    :return: whether every grid square has been filled out
+    """
+    return state.turn_number >= NUM_TURNS
+
+def observation(state: YambState) -> dict:
+    """
+    :return: observation in the YambEnv format, the grid and roll are the state's own arrays
+    """
+    return {
+        "turn_number": state.turn_number,
+        "roll_number": state.roll_number,
+        "grid": state.grid,
+        "roll": state.roll,
+        "announced": state.announced,
+        "announced_row": state.announced_row,
+    }
+
+def flatten_observation(observation: dict, out: Optional[dict] = None, dtype: Optional[np.dtype] = None) -> dict:
+    """Converts an observation in the YambEnv format into the FlattenGrid format
+
+    :param observation: observation in the YambEnv format or a stack of them, which isn't changed
+    :param out: optional dict of preallocated grid (..., 56) and roll (..., 6) arrays, e.g. float32, to write into
+        instead of allocating new float64 arrays
+    :param dtype: dtype of the new grid and roll arrays when out is None, e.g. float32, float64 when None
+
+    :return: a new dict with the grid flattened and the grid and roll scaled to [-1, 1]
+    """
+    flattened = dict(observation)
+    grid = observation["grid"]
+    grid = grid.reshape(grid.shape[:-2] + (-1,))
+    if out is None and dtype is None:
+        flattened["grid"] = grid / 145.0
+        flattened["roll"] = (observation["roll"] - 1.0) / 5.0
+    elif out is None:
+        # the float64 result rounded, which is quicker than computing in dtype from the integers
+        flattened["grid"] = (grid / 145.0).astype(dtype, copy=False)
+        flattened["roll"] = ((observation["roll"] - 1.0) / 5.0).astype(dtype, copy=False)
+    else:
+        # computed in the dtype of out, for the small integers in a grid or roll float32 is exactly the float64 result
+        # rounded to float32
+        flattened["grid"] = np.divide(grid, 145.0, out=out["grid"], dtype=out["grid"].dtype)
+        flattened["roll"] = np.subtract(observation["roll"], 1.0, out=out["roll"], dtype=out["roll"].dtype)
+        flattened["roll"] /= 5.0
+    return flattened
+
+def convert_row_col_fill(row_col_to_fill: int) -> tuple:
+    """Converts a single index representing a grid square to fill in into two indices
+    representing a row and column to fill
+
+    :param row_col_to_fill: single index representing a grid square we want to fill
+
+    :return: row we want to fill in, col we want to fill in
+    """
+    assert 0 <= row_col_to_fill < len(ROW) * len(COL)
+    col_to_fill, row_to_fill = divmod(int(row_col_to_fill), len(ROW))
+    return row_to_fill, col_to_fill
+
+def convert_row_fill_col_fill(row_to_fill: int, col_to_fill: int) -> int:
+    """Converts two indices representing a row and column to fill into a single
+    index representing a grid square to fill
+
+    :param row_to_fill: row we want to fill in
+    :param col_to_fill: col we want to fill in
+
+    :return: single index representing a grid square we want to fill
+    """
+    assert 0 <= row_to_fill < len(ROW)
+    assert 0 <= col_to_fill < len(COL)
+    return row_to_fill + len(ROW) * col_to_fill
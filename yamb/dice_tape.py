@@ -0,0 +1,36 @@
+"""Pre-generated dice for playing the same games with different players, common random numbers.
+
+The tape of a game holds five faces for every roll of every turn, tape[turn, roll_number] being the faces rolled to
+reach that roll. Rolling n dice takes the first n faces, so players who keep different numbers of dice still see
+the same dice on every roll they share, and a player's choices never shift the dice of later turns.
+
+The tape of a game depends only on the seed and the game's number, so any subset of games can be generated on its
+own, for example by the worker which plays them.
+"""
+import numpy as np
+from typing import Iterable
+from numpy.typing import NDArray
+from .row_enum import ROW
+from .col_enum import COL
+from . import score_table
+
+NUM_TURNS = len(ROW) * len(COL)
+NUM_ROLLS = 3
+TAPE_SHAPE = (NUM_TURNS, NUM_ROLLS, score_table.NUM_DICE)
+
+
+def dice_tape(seed: int, game: int) -> NDArray[np.int8]:
+    """
+    :param seed: seed of the tournament or evaluation
+    :param game: number of the game
+
+    :return: (56, 3, 5) faces from 0 to 5 rolled on each roll of each turn
+    """
+    return np.random.default_rng([seed, game]).integers(0, score_table.NUM_FACES, size=TAPE_SHAPE, dtype=np.int8)
+
+def dice_tapes(seed: int, games: Iterable[int]) -> NDArray[np.int8]:
+    """
+    :return: (n, 56, 3, 5) the tapes of each of games
+    """
+    tapes = [dice_tape(seed, game) for game in games]
+    return np.stack(tapes) if tapes else np.empty((0,) + TAPE_SHAPE, dtype=np.int8)
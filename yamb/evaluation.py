@@ -0,0 +1,142 @@
+"""Evaluating a player over many games, stepping them together in a YambVecEnv and sharding them over processes.
+
+A player is anything with the predict of a stable_baselines3 model, a MaskablePPO or one of yamb.agents. Workers
+load their own player from a description, either the name of an agent or the path of a saved model, so nothing
+heavy is pickled between processes.
+
+Runs are reproducible for the same seed, number of games, num_envs and workers: each worker gets its own seed
+spawned from seed and every game slot of its YambVecEnv plays a fixed set of its games.
+"""
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence
+from numpy.typing import NDArray
+
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+def load_player(agent: Optional[str] = None, model_path: Optional[str] = None):
+    """
+    :param agent: name of one of yamb.agents.AGENTS, give either agent or model_path
+    :param model_path: path of a saved MaskablePPO
+
+    :return: a player with the predict of a stable_baselines3 model
+    """
+    if agent is not None:
+        from .agents import make_agent
+        return make_agent(agent)
+    # MaskablePPO imports torch, which is slow, so it is only imported when it's used
+    from sb3_contrib import MaskablePPO
+    return MaskablePPO.load(model_path)
+
+def play_games(
+    player, num_games: int, num_envs: int, seed: Optional[int] = None, dice_tapes: Optional[NDArray[np.int8]] = None,
+) -> dict:
+    """Plays num_games games with player, num_envs at a time, batching the player's decisions across them
+
+    :param player: a player with the predict of a stable_baselines3 model
+    :param seed: seed of the dice
+    :param dice_tapes: optional (num_games, 56, 3, 5) dice of each game, see yamb.dice_tape
+
+    :return: dict with the return of each game in rewards, in the order of the games, the number of games which
+        were truncated in truncations and the number of steps taken in steps, not counting the steps of the games
+        slots play once they have finished their share
+    """
+    if num_games < 1:
+        raise ValueError(f"Need at least one game but got {num_games}")
+    from .yamb_vec_env import YambVecEnv
+    num_envs = max(1, min(num_envs, num_games))
+    vec_env = YambVecEnv(num_envs, flatten_grid=True)
+    vec_env.seed(seed)
+    vec_env.set_dice_tapes(dice_tapes)
+    observation = vec_env.reset()
+    rewards = np.zeros(num_games)
+    returns = np.zeros(num_envs)
+    truncations = 0
+    steps = 0
+    # slot i plays games i, i + num_envs, ... so which games are played doesn't depend on how quickly they finish,
+    # a slot past its share keeps playing games which are thrown away until every slot has finished
+    while np.any(vec_env.game_ids < num_games):
+        actions, _ = player.predict(observation, action_masks=vec_env.action_masks(), deterministic=True)
+        game_ids = vec_env.game_ids.copy()
+        observation, step_rewards, dones, infos = vec_env.step(actions)
+        steps += int(np.count_nonzero(game_ids < num_games))
+        returns += step_rewards
+        for i in np.flatnonzero(dones):
+            if game_ids[i] < num_games:
+                rewards[game_ids[i]] = returns[i]
+                truncations += "truncation_reason" in infos[i]
+            returns[i] = 0
+    vec_env.close()
+    return {"rewards": rewards.tolist(), "truncations": truncations, "steps": steps}
+
+def _play_shard(agent: Optional[str], model_path: Optional[str], num_games: int, num_envs: int, seed: int) -> dict:
+    return play_games(load_player(agent, model_path), num_games, num_envs, seed)
+
+def shard_seeds(seed: Optional[int], workers: int) -> List[int]:
+    """
+    :return: independent seeds for each worker spawned from seed
+    """
+    return [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(seed).spawn(workers)]
+
+def evaluate(
+    num_games: int,
+    agent: Optional[str] = None,
+    model_path: Optional[str] = None,
+    num_envs: int = 64,
+    workers: int = 1,
+    seed: Optional[int] = None,
+) -> dict:
+    """Plays num_games games split evenly between workers processes, each of which steps num_envs games at once
+
+    :param agent: name of one of yamb.agents.AGENTS, give either agent or model_path
+    :param model_path: path of a saved MaskablePPO
+    :param workers: number of processes, 1 plays every game in this process
+
+    :return: summary of the games, see summarize
+    """
+    if (agent is None) == (model_path is None):
+        raise ValueError("Give either agent or model_path")
+    if num_games < 1:
+        raise ValueError(f"Need at least one game but got {num_games}")
+    shards = [len(s) for s in np.array_split(np.arange(num_games), workers)]
+    seeds = shard_seeds(seed, workers)
+    start = time.perf_counter()
+    if workers == 1:
+        results = [_play_shard(agent, model_path, shards[0], num_envs, seeds[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_play_shard, agent, model_path, games, num_envs, s)
+                for games, s in zip(shards, seeds) if games > 0
+            ]
+            results = [future.result() for future in futures]
+    seconds = time.perf_counter() - start
+    rewards = np.concatenate([result["rewards"] for result in results])
+    truncations = sum(result["truncations"] for result in results)
+    steps = sum(result["steps"] for result in results)
+    return summarize(rewards, truncations, steps, seconds)
+
+def summarize(rewards: Sequence[float], truncations: int, steps: int, seconds: float) -> dict:
+    """
+    :param rewards: return of each game
+    :param truncations: how many of the games were truncated
+    :param steps: how many environment steps were taken
+    :param seconds: how long it took
+
+    :return: dict with games, mean, std, min, max, quantiles, truncations, seconds, games_per_sec and steps_per_sec
+    """
+    rewards = np.asarray(rewards, dtype=np.float64)
+    return {
+        "games": len(rewards),
+        "mean": float(rewards.mean()),
+        "std": float(rewards.std()),
+        "min": float(rewards.min()),
+        "max": float(rewards.max()),
+        "quantiles": {q: float(v) for q, v in zip(QUANTILES, np.quantile(rewards, QUANTILES))},
+        "truncations": truncations,
+        "seconds": seconds,
+        "games_per_sec": len(rewards) / seconds,
+        "steps_per_sec": steps / seconds,
+    }
@@ -1,20 +1,46 @@
+import numpy as np
+from typing import Optional
 from gymnasium import spaces, ObservationWrapper
 from .row_enum import ROW
 from .col_enum import COL
+from . import core
+from .profiling import Profiler, profiling_enabled, merge_stats
 
 class FlattenGrid(ObservationWrapper):
-    def __init__(self, env):
+    """
+    :param profile: record counts and timings of observation, see stats(). None uses the YAMB_PROFILE environment variable.
+    :param float32: compute the grid and roll directly in float32 instead of in float64. Each observation gets new
+        arrays, so observations kept by a caller, e.g. the terminal observation of a vectorized environment which
+        resets, aren't overwritten by later ones.
+    """
+    def __init__(self, env, profile: Optional[bool] = None, float32: bool = False):
         super().__init__(env)
+        self.profiler = Profiler() if profiling_enabled(profile) else None
+        dtype = np.float32 if float32 else np.float64
+        # new arrays for every observation, reusing buffers would change observations the caller still holds
+        self._dtype = np.float32 if float32 else None
         self.observation_space = spaces.Dict({
             "turn_number": spaces.Discrete(len(ROW)*len(COL),start=0),
             "roll_number": spaces.Discrete(3,start=0),
-            "grid": spaces.Box(low=-1, high=1, shape=(len(ROW)*len(COL),), dtype=float),
-            "roll": spaces.Box(low=-1, high=1, shape=(6,), dtype=float),
+            "grid": spaces.Box(low=-1, high=1, shape=(len(ROW)*len(COL),), dtype=dtype),
+            "roll": spaces.Box(low=-1, high=1, shape=(6,), dtype=dtype),
             "announced": spaces.Discrete(2,start=0),
             "announced_row": spaces.Discrete(len(ROW), start=0),
         })
 
     def observation(self, obs):
-        obs["grid"] = obs["grid"].flatten() / 145.0
-        obs["roll"] = (obs["roll"] - 1.0) / 5.0 
-        return obs
\ No newline at end of file
+        if self.profiler is None:
+            return core.flatten_observation(obs, dtype=self._dtype)
+        t = self.profiler.now()
+        obs = core.flatten_observation(obs, dtype=self._dtype)
+        self.profiler.record("observation", t)
+        return obs
+
+    def stats(self) -> dict:
+        """
+        :return: stats of the wrapped environment merged with the observation stats of this wrapper
+        """
+        stats = [self.env.unwrapped.stats()] if hasattr(self.env.unwrapped, "stats") else []
+        if self.profiler is not None:
+            stats.append(self.profiler.stats())
+        return merge_stats(stats)
@@ -0,0 +1,224 @@
+"""Recording every step of every game to disk and replaying them, in a fixed width format small enough to keep all of
+the games of an evaluation.
+
+Each step is one RECORD_DTYPE record of RECORD_DTYPE.itemsize bytes: the number of the game, the state before the
+step without its grid, the action, the roll after the step, the reward, the score and the truncation code. The grid
+isn't stored since it takes 112 bytes, it is rebuilt by replaying the game from its first step, which is exact
+because the roll after every step is recorded.
+
+A GameLogRecorder writes shards of whole games as .npy files named {prefix}-{shard:05d}.npy, each of which a GameLog
+opens with np.load(mmap_mode="r") so only the records which are read are loaded.
+"""
+import glob
+import itertools
+import os
+import numpy as np
+from typing import Iterator, List, Optional, Tuple
+from numpy.typing import NDArray
+import gymnasium as gym
+from .row_enum import ROW
+from .col_enum import COL
+from .yamb_state import YambState
+from . import core
+from . import score_table
+
+RECORD_DTYPE = np.dtype([
+    # number of the game within its recorder
+    ("game", "<u4"),
+    # the state before the step, step is 3 * turn_number + roll_number, roll an index into score_table.ROLLS and
+    # announced is announced << 4 | announced_row
+    ("step", "u1"),
+    ("roll", "u1"),
+    ("announced", "u1"),
+    # the action, keep is the num1s, ..., num6s in base 6, announce is announce << 4 | announce_row
+    ("keep", "<u2"),
+    ("announce", "u1"),
+    ("fill", "u1"),
+    # the roll after the step, which holds the dice rolled
+    ("next_roll", "u1"),
+    ("reward", "<f4"),
+    # score after the step
+    ("score", "<i2"),
+    # 0 when the action was valid, otherwise 1 + the index of its truncation kind in core.TRUNCATION_KINDS
+    ("truncation", "u1"),
+])
+# the most steps in a game, a shard is only cut between games
+MAX_GAME_STEPS = 3 * len(ROW) * len(COL)
+_KEEP_POWERS = 6 ** np.arange(score_table.NUM_FACES, dtype=np.int64)
+_KEEP_POWERS_LIST = _KEEP_POWERS.tolist()
+# the largest value of each part of an action which fits in its field
+_ACTION_HIGHS = [5] * 6 + [1, 15, 255]
+# numbers the recorders of each process so that their default prefixes don't collide
+_recorder_ids = itertools.count()
+
+
+def pack_actions(actions: NDArray[np.int64]) -> Tuple[NDArray[np.int64], NDArray[np.int64], NDArray[np.int64]]:
+    """
+    :param actions: (n, 9) actions from the MultiDiscrete action space of YambEnv
+
+    :return: the keep, announce and fill fields of the actions
+    """
+    actions = np.asarray(actions, dtype=np.int64).reshape(-1, core.ACTION_ROW_COL_FILL_IDX + 1)
+    if np.any(actions < 0) or np.any(actions > _ACTION_HIGHS):
+        raise ValueError(f"Actions {actions} are outside the action space")
+    keep = actions[:, :core.ACTION_ANNOUNCE_IDX] @ _KEEP_POWERS
+    announce = actions[:, core.ACTION_ANNOUNCE_IDX] << 4 | actions[:, core.ACTION_ANNOUNCE_ROW_IDX]
+    return keep, announce, actions[:, core.ACTION_ROW_COL_FILL_IDX]
+
+def unpack_actions(records: NDArray) -> NDArray[np.int64]:
+    """
+    :param records: records of RECORD_DTYPE
+
+    :return: (n, 9) the actions of the records
+    """
+    actions = np.empty((len(records), core.ACTION_ROW_COL_FILL_IDX + 1), dtype=np.int64)
+    actions[:, :core.ACTION_ANNOUNCE_IDX] = records["keep"][:, None].astype(np.int64) // _KEEP_POWERS % 6
+    announce = records["announce"].astype(np.int64)
+    actions[:, core.ACTION_ANNOUNCE_IDX] = announce >> 4
+    actions[:, core.ACTION_ANNOUNCE_ROW_IDX] = announce & 15
+    actions[:, core.ACTION_ROW_COL_FILL_IDX] = records["fill"]
+    return actions
+
+
+class GameLogRecorder(gym.Wrapper):
+    """Records every step of a YambEnv, which may be wrapped in FlattenGrid or other observation wrappers, to
+    shards in directory. A shard is written once it holds shard_steps steps, at the end of the game which fills it,
+    and when the recorder is closed.
+
+    :param directory: where to write the shards, created if needed
+    :param prefix: name of this recorder's shards, None uses the process id and a counter so several recorders can
+        share directory
+    :param shard_steps: how many steps to hold in memory before writing a shard
+    """
+    def __init__(self, env: gym.Env, directory: str, prefix: Optional[str] = None, shard_steps: int = 1 << 20):
+        super().__init__(env)
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.prefix = prefix if prefix is not None else f"games-{os.getpid()}-{next(_recorder_ids)}"
+        self.shard_steps = shard_steps
+        self.records = np.zeros(shard_steps + MAX_GAME_STEPS, dtype=RECORD_DTYPE)
+        self.num_records = 0
+        self.num_shards = 0
+        self.game = -1
+
+    def reset(self, **kwargs):
+        if self.num_records >= self.shard_steps:
+            self.flush()
+        self.game += 1
+        return self.env.reset(**kwargs)
+
+    def step(self, action):
+        state = self.env.unwrapped.state
+        # plain ints are much quicker than NumPy on a single step
+        parts = [int(a) for a in np.asarray(action).reshape(-1)]
+        if not all(0 <= a <= high for a, high in zip(parts, _ACTION_HIGHS)):
+            raise ValueError(f"Action {parts} is outside the action space")
+        keep = sum(c * p for c, p in zip(parts, _KEEP_POWERS_LIST))
+        announce = parts[core.ACTION_ANNOUNCE_IDX] << 4 | parts[core.ACTION_ANNOUNCE_ROW_IDX]
+        step = 3 * state.turn_number + state.roll_number
+        roll = score_table.roll_to_index_unchecked(state.roll)
+        announced = state.announced << 4 | state.announced_row
+
+        observation, reward, terminated, truncated, info = self.env.step(action)
+        # a truncated step leaves the state as it was
+        truncation = 1 + core.TRUNCATION_KINDS.index(core.truncation_kind(state, action)) if truncated else 0
+        self.records[self.num_records] = (
+            self.game, step, roll, announced, keep, announce, parts[core.ACTION_ROW_COL_FILL_IDX],
+            score_table.roll_to_index_unchecked(state.roll), reward, state.score, truncation,
+        )
+        self.num_records += 1
+        return observation, reward, terminated, truncated, info
+
+    def flush(self):
+        """Writes the steps held in memory to a new shard
+        """
+        if self.num_records == 0:
+            return
+        path = os.path.join(self.directory, f"{self.prefix}-{self.num_shards:05d}.npy")
+        np.save(path, self.records[:self.num_records])
+        self.num_shards += 1
+        self.num_records = 0
+
+    def close(self):
+        self.flush()
+        super().close()
+
+
+class GameLog:
+    """Reads the shards written by GameLogRecorders to directory, memory mapped so nothing is loaded until it's used.
+
+    Games are numbered in the order of the shards' names and then the order they were played.
+    """
+    def __init__(self, directory: str):
+        self.paths = sorted(glob.glob(os.path.join(directory, "*.npy")))
+        self.shards = [np.load(path, mmap_mode="r") for path in self.paths]
+        for path, shard in zip(self.paths, self.shards):
+            if shard.dtype != RECORD_DTYPE:
+                raise ValueError(f"{path} isn't a game log, its dtype is {shard.dtype}")
+        # (shard, start, stop) of each game's records
+        self.games: List[Tuple[int, int, int]] = []
+        for i, shard in enumerate(self.shards):
+            starts = np.flatnonzero(np.diff(shard["game"], prepend=-1) != 0)
+            stops = np.append(starts[1:], len(shard))
+            self.games.extend((i, int(start), int(stop)) for start, stop in zip(starts, stops))
+
+    @property
+    def num_games(self) -> int:
+        return len(self.games)
+
+    @property
+    def num_steps(self) -> int:
+        return sum(len(shard) for shard in self.shards)
+
+    def game(self, i: int) -> NDArray:
+        """
+        :return: the records of the steps of game i
+        """
+        shard, start, stop = self.games[i]
+        return self.shards[shard][start:stop]
+
+    def batches(self, batch_size: int) -> Iterator[NDArray]:
+        """Streams every record in batches of at most batch_size, shard by shard, without loading whole shards
+
+        :return: iterator of arrays of records
+        """
+        for shard in self.shards:
+            for start in range(0, len(shard), batch_size):
+                yield shard[start:start + batch_size]
+
+    def replay(self, i: int) -> Iterator[Tuple[YambState, NDArray[np.int64], float]]:
+        """Plays game i again from its first roll with the recorded actions and dice, checking it matches the records
+
+        :return: iterator of the state before each step, which is changed in place by the next one so take a snapshot
+            to keep it, the action and the reward
+        """
+        records = self.game(i)
+        actions = unpack_actions(records)
+        state = YambState()
+        state.roll[:] = score_table.ROLLS[records[0]["roll"]]
+        for record, action in zip(records, actions):
+            announced = int(record["announced"])
+            if (
+                record["step"] != 3 * state.turn_number + state.roll_number
+                or record["roll"] != score_table.roll_to_index_unchecked(state.roll)
+                or announced != state.announced << 4 | state.announced_row
+            ):
+                raise ValueError(f"Game {i} doesn't replay, its state differs at step {record['step']}")
+            yield state, action, float(record["reward"])
+            if record["truncation"] != 0:
+                return
+            next_roll = score_table.ROLLS[record["next_roll"]].astype(np.int64)
+            dice = next_roll if state.roll_number == 2 else next_roll - action[:core.ACTION_ANNOUNCE_IDX]
+            core.apply(state, action, dice)
+            if state.score != record["score"]:
+                raise ValueError(f"Game {i} doesn't replay, its score differs at step {record['step']}")
+
+    def final_state(self, i: int) -> YambState:
+        """
+        :return: the state at the end of game i, by replaying it
+        """
+        state = None
+        for state, _, _ in self.replay(i):
+            pass
+        # the last step has been applied once replay finishes
+        return state
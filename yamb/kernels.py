@@ -0,0 +1,227 @@
+"""The rules of yamb as kernels over plain integer arrays, compiled with numba when it is installed.
+
+Rollouts, tablebases and solvers score, check and apply moves on single states in tight loops, where the Python
+overhead of YambState and core dominates. These kernels take the state as three arrays instead:
+
+- grid: (14, 4) integers indexed [row, col], YambState.NAN where not filled
+- roll: (6,) integers, the roll in multinomial format
+- meta: (4,) integers, turn_number, roll_number, announced and announced_row, see the META_ indices
+
+and an action as a (9,) integer array from YambEnv's action space. They agree exactly with YambEnv and core.
+
+When numba is installed each kernel is compiled with numba.njit on its first call for the dtypes of its arguments
+and cached on disk. Otherwise, or when the YAMB_KERNELS environment variable is numpy, the kernels are the plain
+Python and NumPy functions they are written as. BACKEND says which was picked, and with numba the Python version
+of a kernel is still available as kernel.py_func.
+"""
+import os
+from typing import Tuple
+import numpy as np
+from numpy.typing import NDArray
+from .row_enum import ROW
+from .col_enum import COL
+from .yamb_state import YambState
+
+ENV_VAR = "YAMB_KERNELS"
+KERNELS = (
+    "grid_square_value", "score", "next_dolje", "next_gore", "need_to_announce", "fill_valid", "action_valid", "apply",
+)
+META_TURN_NUMBER = 0
+META_ROLL_NUMBER = 1
+META_ANNOUNCED = 2
+META_ANNOUNCED_ROW = 3
+
+# numba treats globals as compile time constants, so the enums are looked up once here
+_NAN = YambState.NAN
+_NUM_ROWS, _NUM_COLS = len(ROW), len(COL)
+_ONES, _SIXES, _MAX, _MIN = ROW.ONES.value, ROW.SIXES.value, ROW.MAX.value, ROW.MIN.value
+_DVAPARA, _TRIS, _SKALA, _FULL, _YAMB = ROW.DVAPARA.value, ROW.TRIS.value, ROW.SKALA.value, ROW.FULL.value, ROW.YAMB.value
+_DOLJE, _GORE, _NAJAVA = COL.DOLJE.value, COL.GORE.value, COL.NAJAVA.value
+_ANNOUNCE_IDX, _ANNOUNCE_ROW_IDX, _ROW_COL_FILL_IDX = 6, 7, 8
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+BACKEND = "numba" if numba is not None and os.environ.get(ENV_VAR, "numba") != "numpy" else "numpy"
+
+def jit(fn):
+    # the kernels call each other by their global names, so they all have to be compiled or none of them
+    return numba.njit(cache=True)(fn) if BACKEND == "numba" else fn
+
+
+@jit
+def grid_square_value(row, roll):
+    """
+    :param row: which row do you want the grid square value for
+    :param roll: (6,) roll in multinomial format, which needn't have five dice
+
+    :return: grid square value, see YambEnv.get_grid_square_value
+    """
+    if row < 0 or row >= _NUM_ROWS:
+        raise IndexError("Row not found in possible rows")
+    if row <= _SIXES:
+        return (row + 1) * int(roll[row])
+    total = 0
+    for face in range(6):
+        total += (face + 1) * int(roll[face])
+    if row == _MAX or row == _MIN:
+        return total
+    if row == _SKALA:
+        small = large = True
+        for face in range(6):
+            small = small and int(roll[face]) == (1 if face < 5 else 0)
+            large = large and int(roll[face]) == (1 if face > 0 else 0)
+        return 45 if small else 50 if large else 0
+    if row == _FULL:
+        three = two = False
+        for face in range(6):
+            three = three or int(roll[face]) == 3
+            two = two or int(roll[face]) == 2
+        return total + 40 if three and two else 0
+    if row == _YAMB:
+        for face in range(6):
+            if int(roll[face]) >= 5:
+                return total + 60
+        return 0
+    # dvapara, tris and poker score every face with at least n dice
+    n, bonus, min_faces = (2, 10, 2) if row == _DVAPARA else (3, 20, 1) if row == _TRIS else (4, 50, 1)
+    s = faces = 0
+    for face in range(6):
+        if int(roll[face]) >= n:
+            s += n * (face + 1)
+            faces += 1
+    return s + bonus if faces >= min_faces else 0
+
+@jit
+def score(grid):
+    """
+    :return: game score of grid, anything with an nan will be assigned zero, see YambEnv.get_score
+    """
+    total = 0
+    for col in range(_NUM_COLS):
+        upper = 0
+        for row in range(_SIXES + 1):
+            value = int(grid[row, col])
+            if value != _NAN:
+                upper += value
+        total += upper + 30 if upper >= 60 else upper
+        for row in range(_DVAPARA, _NUM_ROWS):
+            value = int(grid[row, col])
+            if value != _NAN:
+                total += value
+        grid_max, grid_min, grid_ones = int(grid[_MAX, col]), int(grid[_MIN, col]), int(grid[_ONES, col])
+        if grid_max != _NAN and grid_min != _NAN and grid_ones != _NAN:
+            total += (grid_max - grid_min) * grid_ones
+    return total
+
+@jit
+def next_dolje(grid):
+    """
+    :return: the next row to fill out in the dolje column, len(ROW) once it has been completed
+    """
+    row = 0
+    while row < _NUM_ROWS and grid[row, _DOLJE] != _NAN:
+        row += 1
+    return row
+
+@jit
+def next_gore(grid):
+    """
+    :return: the next row to fill out in the gore column, -1 once it has been completed
+    """
+    row = _NUM_ROWS - 1
+    while row >= 0 and grid[row, _GORE] != _NAN:
+        row -= 1
+    return row
+
+@jit
+def need_to_announce(grid):
+    """
+    :return: whether the first roll has to announce, because only the najava column is left
+    """
+    for col in range(_NAJAVA):
+        for row in range(_NUM_ROWS):
+            if grid[row, col] == _NAN:
+                return False
+    return True
+
+@jit
+def fill_valid(grid, announced, announced_row, row_col_fill):
+    """
+    :param row_col_fill: int indicating which row and col of the grid to fill out
+
+    :return: whether the grid square can be filled out on the last roll, see YambEnv.step_3_valid
+    """
+    if row_col_fill < 0 or row_col_fill >= _NUM_ROWS * _NUM_COLS:
+        return False
+    col, row = row_col_fill // _NUM_ROWS, row_col_fill % _NUM_ROWS
+    if grid[row, col] != _NAN:
+        return False
+    if col == _GORE and row != next_gore(grid):
+        return False
+    if col == _DOLJE and row != next_dolje(grid):
+        return False
+    if announced:
+        return col == _NAJAVA and row == announced_row
+    return col != _NAJAVA
+
+@jit
+def action_valid(grid, roll, meta, action):
+    """
+    :return: whether the action is valid on the current roll, see core.check_action
+    """
+    if meta[META_ROLL_NUMBER] == 2:
+        return fill_valid(grid, meta[META_ANNOUNCED], meta[META_ANNOUNCED_ROW], action[_ROW_COL_FILL_IDX])
+    for face in range(6):
+        if action[face] < 0 or action[face] > roll[face]:
+            return False
+    if meta[META_ROLL_NUMBER] == 0:
+        if action[_ANNOUNCE_IDX] == 1:
+            row = action[_ANNOUNCE_ROW_IDX]
+            return 0 <= row < _NUM_ROWS and grid[row, _NAJAVA] == _NAN
+        if action[_ANNOUNCE_IDX] == 0:
+            return not need_to_announce(grid)
+    return True
+
+@jit
+def apply(grid, roll, meta, action, dice):
+    """Applies an action which action_valid has accepted to the arrays in place, see core.apply
+
+    :param dice: the dice which were rolled in multinomial format, five of them on the last roll
+    """
+    if meta[META_ROLL_NUMBER] == 2:
+        row_col_fill = action[_ROW_COL_FILL_IDX]
+        row = row_col_fill % _NUM_ROWS
+        grid[row, row_col_fill // _NUM_ROWS] = grid_square_value(row, roll)
+        meta[META_TURN_NUMBER] += 1
+        meta[META_ROLL_NUMBER] = 0
+        meta[META_ANNOUNCED] = 0
+        meta[META_ANNOUNCED_ROW] = 0
+        roll[:] = dice
+        return
+    if meta[META_ROLL_NUMBER] == 0:
+        meta[META_ANNOUNCED] = action[_ANNOUNCE_IDX]
+        meta[META_ANNOUNCED_ROW] = action[_ANNOUNCE_ROW_IDX]
+    meta[META_ROLL_NUMBER] += 1
+    for face in range(6):
+        roll[face] = dice[face] + action[face]
+
+
+def state_arrays(state: YambState) -> Tuple[NDArray[np.int16], NDArray[np.int64], NDArray[np.int64]]:
+    """
+    :return: copies of the grid, roll and meta of state for the kernels
+    """
+    meta = np.array([state.turn_number, state.roll_number, state.announced, state.announced_row], dtype=np.int64)
+    return state.grid.copy(), state.roll.astype(np.int64), meta
+
+def to_state(grid: NDArray[np.integer], roll: NDArray[np.integer], meta: NDArray[np.integer]) -> YambState:
+    """
+    :return: the YambState held by the arrays
+    """
+    state = YambState()
+    state.set_grid(grid)
+    state.roll[:] = roll
+    state.turn_number, state.roll_number, state.announced, state.announced_row = (int(m) for m in meta)
+    return state
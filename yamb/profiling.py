@@ -0,0 +1,83 @@
+"""Opt-in counters and timers for the phases of YambEnv and FlattenGrid.
+
+Profiling is turned on with the profile constructor flag or by setting the YAMB_PROFILE environment variable to 1.
+When it is off the environments hold no Profiler and only pay for an `is not None` check per call.
+
+With a SubprocVecEnv the stats of every worker can be combined with merge_stats(vec_env.env_method("stats")).
+"""
+import os
+from collections import defaultdict
+from time import perf_counter_ns
+from typing import Iterable, Optional
+
+ENV_VAR = "YAMB_PROFILE"
+
+
+def profiling_enabled(profile: Optional[bool] = None) -> bool:
+    """
+    :param profile: constructor flag, None to fall back on the YAMB_PROFILE environment variable
+
+    :return: whether profiling should be turned on
+    """
+    if profile is None:
+        return os.environ.get(ENV_VAR, "0") not in ("", "0")
+    return profile
+
+class Profiler:
+    """Call counts and cumulative nanoseconds per phase along with the number of truncations per reason
+    """
+    def __init__(self):
+        self.calls = defaultdict(int)
+        self.ns = defaultdict(int)
+        self.truncations = defaultdict(int)
+
+    @staticmethod
+    def now() -> int:
+        return perf_counter_ns()
+
+    def record(self, phase: str, start: int) -> int:
+        """Adds the time since start to a phase, consecutive phases can be chained as t = profiler.record(phase, t)
+
+        :param phase: name of the phase e.g. step/check
+        :param start: perf_counter_ns when the phase started
+
+        :return: perf_counter_ns now
+        """
+        now = perf_counter_ns()
+        self.calls[phase] += 1
+        self.ns[phase] += now - start
+        return now
+
+    def truncation(self, reason: str):
+        self.truncations[reason] += 1
+
+    def clear(self):
+        self.calls.clear()
+        self.ns.clear()
+        self.truncations.clear()
+
+    def stats(self) -> dict:
+        """
+        :return: {"phases": {phase: {"calls": int, "ns": int}}, "truncations": {reason: int}}
+        """
+        return {
+            "phases": {phase: {"calls": self.calls[phase], "ns": self.ns[phase]} for phase in self.calls},
+            "truncations": dict(self.truncations),
+        }
+
+def merge_stats(stats: Iterable[dict]) -> dict:
+    """Sums stats from several environments, for example the workers of a SubprocVecEnv
+
+    :param stats: dicts in the format returned by Profiler.stats
+
+    :return: a single dict in the same format
+    """
+    merged = {"phases": {}, "truncations": {}}
+    for s in stats:
+        for phase, counts in s["phases"].items():
+            total = merged["phases"].setdefault(phase, {"calls": 0, "ns": 0})
+            total["calls"] += counts["calls"]
+            total["ns"] += counts["ns"]
+        for reason, count in s["truncations"].items():
+            merged["truncations"][reason] = merged["truncations"].get(reason, 0) + count
+    return merged
@@ -0,0 +1,191 @@
+"""Canonical indexing of every roll of five dice together with a table of the grid square value of each roll.
+
+Rolls are in multinomial format, so roll[2] is the number of 3s. There are 252 of them and they are numbered
+0 to 251 in lexicographic order of their counts, so [0,0,0,0,0,5] is 0 and [5,0,0,0,0,0] is 251.
+
+The dice kept between rolls are numbered the same way. There are 462 keeps of between 0 and 5 dice,
+so [0,0,0,0,0,0] is 0 and [5,0,0,0,0,0] is 461.
+"""
+import itertools
+import numpy as np
+from typing import Union
+from numpy.typing import NDArray, ArrayLike
+from .row_enum import ROW
+
+NUM_DICE = 5
+NUM_FACES = 6
+# base 6 encoding of the counts, each count is between 0 and 5
+_CODE_POWERS = NUM_FACES ** np.arange(NUM_FACES - 1, -1, -1)
+
+
+def dvapara(cnts : np.array) -> int:
+    if not (sum(cnts >= 2) >= 2): return 0
+    s = 0
+    for i, cnt in enumerate(cnts):
+        if cnt >= 2:
+            s += 2 * (i+1)
+    return s + 10
+
+def tris(cnts : np.array) -> int:
+    if not any(cnts >= 3): return 0
+    s = 0
+    for i, cnt in enumerate(cnts):
+        if cnt >= 3:
+            s += 3 * (i+1)
+
+    return s + 20
+
+def skala(cnts : np.array) -> int:
+    if all(np.array([1,1,1,1,1,0]) == cnts):
+        return 45
+    elif all(np.array([0,1,1,1,1,1]) == cnts):
+        return 50
+    else:
+        return 0
+
+def full(cnts : np.array) -> int:
+    if not (any(cnts == 3) * any(cnts == 2)): return 0
+    s = sum( (i+1)*item for i, item in enumerate(cnts) )
+    return s + 40
+
+def poker(cnts : np.array) -> int:
+    if not any(cnts >= 4): return 0
+    s = 0
+    for i, cnt in enumerate(cnts):
+        if cnt >= 4:
+            s += 4 * (i+1)
+
+    return s + 50
+
+def yamb(cnts : np.array) -> int:
+    if not any(cnts >= 5): return 0
+    s = sum( (i+1)*item for i, item in enumerate(cnts) )
+    return s + 60
+
+def compute_grid_square_value(row: int, cnts: np.array) -> int:
+    """Reference implementation of the scoring rules, which is used to build SCORE_TABLE
+
+    :param row: which row do you want the grid square value for
+    :param cnts: array of size six which tells you tells you mapping of face value to how many dice
+    :return: grid square value
+    """
+    if ROW.ONES.value <= row <= ROW.SIXES.value:
+        return (row+1) * cnts[row]
+    elif row == ROW.MAX.value or row == ROW.MIN.value:
+        return sum( (i+1)*item for i, item in enumerate(cnts) )
+    elif row == ROW.DVAPARA.value:
+        return dvapara(cnts)
+    elif row == ROW.TRIS.value:
+        return tris(cnts)
+    elif row == ROW.SKALA.value:
+        return skala(cnts)
+    elif row == ROW.FULL.value:
+        return full(cnts)
+    elif row == ROW.POKER.value:
+        return poker(cnts)
+    elif row == ROW.YAMB.value:
+        return yamb(cnts)
+    else:
+        raise IndexError(f"Row {row} not found in possible rows")
+
+
+def _build_rolls() -> NDArray[np.uint8]:
+    rolls = set()
+    for dice in itertools.combinations_with_replacement(range(NUM_FACES), NUM_DICE):
+        rolls.add(tuple(np.bincount(dice, minlength=NUM_FACES)))
+    return np.array(sorted(rolls), dtype=np.uint8)
+
+# (252, 6) every roll of five dice, ROLLS[i] is the roll with index i
+ROLLS = _build_rolls()
+NUM_ROLLS = len(ROLLS)
+ROLLS.flags.writeable = False
+
+# maps the base 6 code of a roll to its index, -1 when the counts don't add up to five dice
+_CODE_TO_INDEX = np.full(NUM_FACES ** NUM_FACES, -1, dtype=np.int16)
+_CODE_TO_INDEX[ROLLS @ _CODE_POWERS] = np.arange(NUM_ROLLS)
+
+# (252, 14) SCORE_TABLE[i, row] is the grid square value of ROLLS[i] in that row
+SCORE_TABLE = np.array(
+    [[compute_grid_square_value(row.value, roll) for row in ROW] for roll in ROLLS.astype(np.int64)],
+    dtype=np.int16,
+)
+SCORE_TABLE.flags.writeable = False
+
+
+def _build_keeps() -> NDArray[np.uint8]:
+    keeps = [cnts for cnts in itertools.product(range(NUM_DICE + 1), repeat=NUM_FACES) if sum(cnts) <= NUM_DICE]
+    return np.array(keeps, dtype=np.uint8)
+
+# (462, 6) every keep of between 0 and 5 dice, KEEPS[i] is the keep with index i
+KEEPS = _build_keeps()
+NUM_KEEPS = len(KEEPS)
+KEEPS.flags.writeable = False
+_KEEP_CODE_TO_INDEX = np.full(NUM_FACES ** NUM_FACES, -1, dtype=np.int16)
+_KEEP_CODE_TO_INDEX[KEEPS @ _CODE_POWERS] = np.arange(NUM_KEEPS)
+
+
+def roll_to_index(cnts: ArrayLike) -> Union[int, NDArray[np.int64]]:
+    """
+    :param cnts: a roll in multinomial format of shape (6,) or a batch of rolls of shape (..., 6)
+
+    :return: index of the roll, or an array of indices of shape (...)
+    """
+    cnts = np.asarray(cnts)
+    if cnts.ndim == 1:
+        # checking a single roll in python is much quicker than the numpy reductions below
+        counts = cnts.tolist()
+        if len(counts) != NUM_FACES or min(counts) < 0 or max(counts) > NUM_DICE or sum(counts) != NUM_DICE:
+            raise ValueError(f"Roll {cnts} must contain exactly {NUM_DICE} dice")
+        return int(_CODE_TO_INDEX[int(cnts @ _CODE_POWERS)])
+
+    if np.any(cnts < 0) or np.any(cnts > NUM_DICE):
+        raise ValueError(f"Roll {cnts} must have between 0 and {NUM_DICE} of each face")
+
+    idx = _CODE_TO_INDEX[cnts @ _CODE_POWERS]
+    if np.any(idx < 0):
+        raise ValueError(f"Roll {cnts} must contain exactly {NUM_DICE} dice")
+
+    return int(idx) if idx.ndim == 0 else idx.astype(np.int64)
+
+def roll_to_index_unchecked(roll: NDArray[np.integer]) -> int:
+    """roll_to_index of a single roll without any checks, for the hot path where the roll is known to be five dice
+
+    :param roll: a roll in multinomial format of shape (6,)
+
+    :return: index of the roll
+    """
+    return int(_CODE_TO_INDEX[int(roll @ _CODE_POWERS)])
+
+def keep_to_index(cnts: ArrayLike) -> Union[int, NDArray[np.int64]]:
+    """
+    :param cnts: dice to keep in multinomial format of shape (6,) or a batch of them of shape (..., 6)
+
+    :return: index of the keep, or an array of indices of shape (...)
+    """
+    cnts = np.asarray(cnts)
+    if np.any(cnts < 0) or np.any(cnts > NUM_DICE):
+        raise ValueError(f"Keep {cnts} must have between 0 and {NUM_DICE} of each face")
+
+    idx = _KEEP_CODE_TO_INDEX[cnts @ _CODE_POWERS]
+    if np.any(idx < 0):
+        raise ValueError(f"Keep {cnts} must contain at most {NUM_DICE} dice")
+
+    return int(idx) if idx.ndim == 0 else idx.astype(np.int64)
+
+def index_to_roll(idx: ArrayLike) -> NDArray[np.uint8]:
+    """
+    :param idx: index of a roll or an array of indices
+
+    :return: the roll in multinomial format of shape (6,), or a batch of rolls of shape (..., 6)
+    """
+    return ROLLS[idx]
+
+def get_grid_square_values(rows: ArrayLike, cnts: ArrayLike) -> NDArray[np.int16]:
+    """Batched grid square values
+
+    :param rows: which rows do you want the grid square values for, shape (...)
+    :param cnts: rolls in multinomial format, shape (..., 6)
+
+    :return: grid square values, shape (...)
+    """
+    return SCORE_TABLE[roll_to_index(cnts), rows]
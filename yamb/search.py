@@ -0,0 +1,369 @@
+"""Playing a move by searching the rest of the turn over the real rules, with the game after the turn estimated by a
+leaf evaluator.
+
+The turn is searched exactly. Decision nodes are the legal keeps, announcements and grid squares of the action
+masks, and chance nodes are the exact distributions over the 252 rolls after a reroll from yamb.transitions, so
+with the worth of ending the turn in each grid square with each roll known, the best keeps are solved by
+yamb.solver. The leaves are the grids after the turn, one for each grid square the turn can end in and each value it
+can be filled out with. The value of the upper rows, max and min changes what the other grid squares in their column
+are worth so they get a leaf per value. The other rows only add their value to the score, so they get a single leaf
+whose estimate the value is added to.
+
+The leaves are estimated in rounds, each of which evaluates every leaf once, and the rounds are batched together:
+
+- RolloutEvaluator plays every leaf a few turns on with one of yamb.agents and estimates the rest of the game from
+  the pars of the rows left, all leaves of a round on the same dice so the differences between them aren't lost in
+  the luck of the rollouts, optionally split between worker processes
+- ValueEvaluator adds the value network of a MaskablePPO to the score of each leaf
+
+A Planner runs rounds until its budget of leaf evaluations or seconds per move is spent and averages them. With a
+yamb.zobrist.TranspositionTable it keeps the averages by the key of the leaf's grid, so the leaves of the later rolls
+of a turn, most of which were already leaves of its first roll, aren't evaluated again.
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from numpy.typing import NDArray
+from .row_enum import ROW
+from .col_enum import COL
+from .yamb_state import YambState
+from .agents import decode_observation
+from . import core
+from . import kernels
+from . import score_table
+from . import solver
+from . import zobrist
+from .dice_tape import dice_tapes
+
+# rows whose value changes what the rest of their column is worth, each value they can be filled with is its own leaf
+VALUE_ROWS = frozenset(range(ROW.ONES.value, ROW.MIN.value + 1))
+
+
+def leaf_grids(grid: NDArray[np.integer], cells: List[Tuple[int, int, int]]) -> NDArray[np.int64]:
+    """
+    :param cells: (row, col, value) of each leaf
+
+    :return: (k, 14, 4) grid with each of cells filled out
+    """
+    grids = np.repeat(np.asarray(grid, dtype=np.int64)[None], len(cells), axis=0)
+    for i, (row, col, value) in enumerate(cells):
+        grids[i, row, col] = value
+    return grids
+
+def leaf_vec_env(grids: NDArray[np.int64], turn_number: int, seed: int, rounds: int, flatten_grid: bool = False):
+    """
+    :param grids: (k, 14, 4) grids after the turn before turn_number
+    :param seed: seed of the dice tapes, see yamb.dice_tape
+    :param rounds: how many times to play each grid, the i-th time every grid is played on tape i
+
+    :return: a YambVecEnv with rounds * k games, game i * k + j is grid j on tape i, on the first roll of turn_number
+    """
+    from .yamb_vec_env import YambVecEnv
+    num_games = rounds * len(grids)
+    vec_env = YambVecEnv(num_games, flatten_grid=flatten_grid)
+    vec_env.set_dice_tapes(np.repeat(dice_tapes(seed, range(rounds)), len(grids), axis=0))
+    vec_env.grid[:] = np.tile(grids, (rounds, 1, 1))
+    vec_env.turn_number[:] = turn_number
+    vec_env.score[:] = vec_env.get_grid_scores(vec_env.grid)
+    vec_env.roll[:] = vec_env.roll_dice(np.full(num_games, score_table.NUM_DICE), np.arange(num_games))
+    return vec_env
+
+def par_estimates(grids: NDArray[np.int64], scores: NDArray[np.int64]) -> NDArray[np.float64]:
+    """
+    :param grids: (k, 14, 4) grids
+    :param scores: (k,) score of each grid
+
+    :return: (k,) estimated final score of each grid, its score plus the par of the row of each open grid square
+        less the COLUMN_BONUS of its column, the same worths as the ColumnAgent fills out grid squares by
+    """
+    from .agents.heuristics import COLUMN_BONUS, row_pars
+    pars = row_pars()[:, None] - COLUMN_BONUS[None, :]
+    return scores + ((grids == core.NAN) * pars[None]).sum(axis=(1, 2))
+
+def rollout(
+    agent: str, grids: NDArray[np.int64], turn_number: int, seed: int, rounds: int = 1, horizon: Optional[int] = None,
+) -> NDArray[np.float64]:
+    """Plays each grid rounds times with agent, all of the grids on the same dice each round
+
+    :param agent: name of one of yamb.agents.AGENTS
+    :param grids: (k, 14, 4) grids after the turn before turn_number
+    :param seed: seed of the dice tapes
+    :param horizon: how many turns to play before estimating the rest of the game with par_estimates, None plays
+        to the end of the game
+
+    :return: (rounds, k) estimated final score of each game
+    """
+    from .agents import make_agent
+    player = make_agent(agent)
+    vec_env = leaf_vec_env(grids, turn_number, seed, rounds)
+    turns = core.NUM_TURNS - turn_number if horizon is None else min(horizon, core.NUM_TURNS - turn_number)
+    infos = []
+    for _ in range(3 * turns):
+        games = {key: getattr(vec_env, key) for key in ("turn_number", "roll_number", "grid", "roll", "announced", "announced_row")}
+        _, _, _, infos = vec_env.step(player.act(games, vec_env.action_masks()))
+    if turn_number + turns == core.NUM_TURNS:
+        # every game finishes on the same step and is reset, so the final scores are only in the infos
+        scores = np.array([info["score"] for info in infos], dtype=np.float64)
+    else:
+        scores = par_estimates(vec_env.grid, vec_env.score)
+    return scores.reshape(rounds, len(grids))
+
+
+class RolloutEvaluator:
+    """Estimates leaves by playing them to the end of the game with a rule based agent, all leaves of a round on the
+    same dice. The leaves are split between workers processes, which are started on the first evaluation and kept
+    until close.
+
+    :param agent: name of one of yamb.agents.AGENTS
+    :param horizon: how many turns each rollout plays before estimating the rest of the game from the pars of the
+        rows left, see par_estimates, None plays to the end of the game. Shorter rollouts are quicker and their
+        estimates vary much less between rounds.
+    :param workers: number of processes, 1 plays the rollouts in this process
+    """
+    def __init__(self, agent: str = "column", horizon: Optional[int] = 4, workers: int = 1):
+        self.agent = agent
+        self.horizon = horizon
+        self.workers = workers
+        self.pool: Optional[ProcessPoolExecutor] = None
+
+    def evaluate(self, grids: NDArray[np.int64], turn_number: int, seed: int, rounds: int) -> NDArray[np.float64]:
+        """
+        :param grids: (k, 14, 4) grids after the turn before turn_number
+        :param seed: seed of the dice of the rounds
+        :param rounds: how many estimates of each grid
+
+        :return: (rounds, k) estimated final score of each grid
+        """
+        if self.workers == 1 or len(grids) < 2:
+            return rollout(self.agent, grids, turn_number, seed, rounds, self.horizon)
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        chunks = [chunk for chunk in np.array_split(grids, self.workers) if len(chunk) > 0]
+        futures = [self.pool.submit(rollout, self.agent, chunk, turn_number, seed, rounds, self.horizon) for chunk in chunks]
+        return np.concatenate([future.result() for future in futures], axis=1)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+
+class ValueEvaluator:
+    """Estimates leaves as their score plus the value network of a MaskablePPO on the first roll after them, each
+    round on a different roll shared by every leaf.
+
+    :param model: a MaskablePPO on FlattenGrid observations, whose rewards are the changes in score
+    """
+    def __init__(self, model):
+        self.model = model
+
+    def evaluate(self, grids: NDArray[np.int64], turn_number: int, seed: int, rounds: int) -> NDArray[np.float64]:
+        """
+        :param grids: (k, 14, 4) grids after the turn before turn_number
+        :param seed: seed of the rolls of the rounds
+        :param rounds: how many estimates of each grid
+
+        :return: (rounds, k) estimated final score of each grid
+        """
+        import torch
+        vec_env = leaf_vec_env(grids, turn_number, seed, rounds, flatten_grid=True)
+        observation, _ = self.model.policy.obs_to_tensor(vec_env.get_observation())
+        with torch.no_grad():
+            values = self.model.policy.predict_values(observation).cpu().numpy().reshape(-1)
+        return (vec_env.score + values.astype(np.float64)).reshape(rounds, len(grids))
+
+    def close(self):
+        pass
+
+
+class Planner:
+    """Chooses each action by searching the rest of the turn exactly and estimating the games after it with
+    evaluator, see the module docstring. It has the same predict as a stable_baselines3 model.
+
+    A round evaluates every leaf once. With max_nodes the rounds which fit in it are evaluated as one batch, at
+    least one. With max_seconds a first batch is timed and then as many more rounds as fit in the time left are
+    evaluated. With neither a single round is.
+
+    :param evaluator: RolloutEvaluator, ValueEvaluator or anything with the same evaluate and close
+    :param max_nodes: the most leaf evaluations per move
+    :param max_seconds: the most seconds per move, estimated from the rounds so far
+    :param seed: seed of the dice of the rounds
+    :param table: transposition table of the mean estimates of leaves, whose depth is the rounds averaged. Leaves
+        found in it aren't evaluated and the budget goes to the rest.
+
+    :param stats: leaves evaluated, leaves found in the table, rounds and seconds of the last move
+    """
+    def __init__(
+        self,
+        evaluator,
+        max_nodes: Optional[int] = None,
+        max_seconds: Optional[float] = None,
+        seed: Optional[int] = None,
+        table: Optional[zobrist.TranspositionTable] = None,
+    ):
+        self.evaluator = evaluator
+        self.max_nodes = max_nodes
+        self.max_seconds = max_seconds
+        self.table = table
+        self.rng = np.random.default_rng(seed)
+        self.stats: Dict[str, float] = {}
+
+    def predict(
+        self,
+        observation: dict,
+        state: Optional[Tuple] = None,
+        episode_start: Optional[NDArray[np.bool_]] = None,
+        deterministic: bool = True,
+        action_masks: Optional[NDArray[np.bool_]] = None,
+    ) -> Tuple[NDArray[np.int64], None]:
+        """
+        :param observation: observation of a single game or stacked observations, in the YambEnv or FlattenGrid format
+        :param state: unused
+        :param episode_start: unused
+        :param deterministic: unused, the search is deterministic given its seed
+        :param action_masks: masks in the YambEnv.action_masks layout, computed from the observation when None
+
+        :return: actions of shape (9,) for a single game or (n, 9) for stacked observations, and None for the state
+        """
+        single = np.asarray(observation["roll"]).ndim == 1
+        games = decode_observation(observation)
+        masks = None if action_masks is None else np.asarray(action_masks).reshape(len(games["roll"]), core.MASK_SIZE)
+        actions = np.zeros((len(games["roll"]), 9), dtype=np.int64)
+        for i in range(len(actions)):
+            meta = [games[key][i] for key in ("turn_number", "roll_number", "announced", "announced_row")]
+            game_state = kernels.to_state(games["grid"][i], games["roll"][i], meta)
+            actions[i] = self.plan(game_state, None if masks is None else masks[i])
+        return (actions[0] if single else actions), None
+
+    def plan(self, state: YambState, mask: Optional[NDArray[np.bool_]] = None) -> NDArray[np.int64]:
+        """
+        :param mask: the action mask of state, core.legal_actions(state) when None
+
+        :return: the action of shape (9,) with the highest expected final score
+        """
+        mask = core.legal_actions(state) if mask is None else mask
+        start = time.perf_counter()
+        cells, worths = self.cell_worths(state)
+        idx = score_table.roll_to_index_unchecked(state.roll)
+        action = np.zeros(9, dtype=np.int64)
+
+        fill_mask = mask[core.MASK_ROW_COL_FILL_IDX:]
+        if state.roll_number == 2:
+            # cells is in row_col_fill order
+            allowed = [i for i, (row, col) in enumerate(cells) if fill_mask[row + len(ROW) * col]]
+            best = allowed[int(np.argmax(worths[idx, allowed]))]
+            row, col = cells[best]
+            action[core.ACTION_ROW_COL_FILL_IDX] = row + len(ROW) * col
+            self.stats["seconds"] = time.perf_counter() - start
+            return action
+
+        rerolls = solver.MAX_REROLLS - state.roll_number
+        # (announce, announced row, cells the turn can end in), on the second roll the announcement is already made
+        options = [(0, 0, list(range(len(cells))))] if state.roll_number == 1 else []
+        if state.roll_number == 0 and mask[core.MASK_ANNOUNCE_IDX]:
+            options.append((0, 0, [i for i, (_, col) in enumerate(cells) if col != COL.NAJAVA.value]))
+        if state.roll_number == 0 and mask[core.MASK_ANNOUNCE_IDX + 1]:
+            for i, (row, col) in enumerate(cells):
+                if col == COL.NAJAVA.value and mask[core.MASK_ANNOUNCE_ROW_IDX + row]:
+                    options.append((1, row, [i]))
+        best_value = -np.inf
+        for announce, announce_row, option_cells in options:
+            keeps, values = solver.values_tables(worths[:, option_cells].max(axis=1), rerolls)
+            if values[idx] > best_value:
+                best_value = values[idx]
+                action[:core.ACTION_ANNOUNCE_IDX] = score_table.KEEPS[keeps[idx]]
+                action[core.ACTION_ANNOUNCE_IDX] = announce
+                action[core.ACTION_ANNOUNCE_ROW_IDX] = announce_row
+        self.stats["seconds"] = time.perf_counter() - start
+        return action
+
+    def cell_worths(self, state: YambState) -> Tuple[List[Tuple[int, int]], NDArray[np.float64]]:
+        """Estimates the final score of ending the turn in each grid square it can end in with each roll
+
+        :return: (row, col) of each grid square the turn can end in, in row_col_fill order, and a (252, n) array of
+            the estimated final score of ending the turn in each of them with each roll. On the last roll only the
+            current roll's row is estimated, the others are nan.
+        """
+        targets = core.fill_targets(state)
+        cols, rows = np.nonzero(targets)
+        cells = list(zip(rows.tolist(), cols.tolist()))
+        rolls = (
+            np.array([score_table.roll_to_index_unchecked(state.roll)]) if state.roll_number == 2
+            else np.arange(score_table.NUM_ROLLS)
+        )
+        # the leaves and which leaf and extra value each (roll, grid square) ends up in
+        leaves: List[Tuple[int, int, int]] = []
+        leaf_idx = np.zeros((len(rolls), len(cells)), dtype=np.int64)
+        offsets = np.zeros((len(rolls), len(cells)), dtype=np.float64)
+        for i, (row, col) in enumerate(cells):
+            values = score_table.SCORE_TABLE[rolls, row].astype(np.int64)
+            if row in VALUE_ROWS:
+                unique, inverse = np.unique(values, return_inverse=True)
+                leaf_idx[:, i] = len(leaves) + inverse.reshape(-1)
+                leaves.extend((row, col, int(value)) for value in unique)
+            else:
+                leaf_idx[:, i] = len(leaves)
+                offsets[:, i] = values
+                leaves.append((row, col, 0))
+
+        estimates = self.evaluate(leaf_grids(state.grid, leaves), state.turn_number + 1)
+        worths = np.full((score_table.NUM_ROLLS, len(cells)), np.nan)
+        worths[rolls] = estimates[leaf_idx] + offsets
+        return cells, worths
+
+    def evaluate(self, grids: NDArray[np.int64], turn_number: int) -> NDArray[np.float64]:
+        """Runs rounds of the evaluator on the leaves until the budget is spent
+
+        :param grids: (k, 14, 4) grids of the leaves
+        :param turn_number: the turn after the one being searched
+
+        :return: (k,) mean estimated final score of each leaf
+        """
+        self.stats.update(leaves=len(grids), cached=0, rounds=0)
+        if turn_number >= core.NUM_TURNS:
+            # the game is over so the leaves are exact
+            self.stats["rounds"] = 1
+            return np.array([kernels.score(grid) for grid in grids], dtype=np.float64)
+        if self.table is None:
+            return self.run_rounds(grids, turn_number)
+
+        keys = zobrist.grid_keys(grids).tolist()
+        means = np.zeros(len(grids))
+        missing = []
+        for i, key in enumerate(keys):
+            entry = self.table.get(key)
+            if entry is None:
+                missing.append(i)
+            else:
+                means[i] = entry[0]
+        self.stats.update(leaves=len(missing), cached=len(grids) - len(missing))
+        if missing:
+            means[missing] = self.run_rounds(grids[missing], turn_number)
+            for i in missing:
+                self.table.store(keys[i], means[i], self.stats["rounds"])
+        return means
+
+    def run_rounds(self, grids: NDArray[np.int64], turn_number: int) -> NDArray[np.float64]:
+        """
+        :return: (k,) mean estimated final score of each leaf over the rounds the budget has room for
+        """
+        start = time.perf_counter()
+        max_rounds = None if self.max_nodes is None else max(1, self.max_nodes // len(grids))
+        total = np.zeros(len(grids))
+        rounds = 0
+        batch = 1 if max_rounds is None or self.max_seconds is not None else max_rounds
+        while batch > 0:
+            total += self.evaluator.evaluate(grids, turn_number, int(self.rng.integers(2 ** 63)), batch).sum(axis=0)
+            rounds += batch
+            if self.max_seconds is None:
+                break
+            elapsed = time.perf_counter() - start
+            batch = int((self.max_seconds - elapsed) / (elapsed / rounds))
+            if max_rounds is not None:
+                batch = min(batch, max_rounds - rounds)
+        self.stats["rounds"] = rounds
+        return total / rounds
+
+    def close(self):
+        self.evaluator.close()
@@ -0,0 +1,351 @@
+"""A multiprocess vectorized yamb environment which passes everything on the hot path through shared memory.
+
+Each worker process owns a contiguous slice of the games and steps them together, with a YambVecEnv when the slice
+is big enough for batching to pay off and with a DummyVecEnv of YambEnvs when it isn't. The actions,
+observations, rewards, dones, action masks and terminal observations live in a single block of shared memory which
+the parent and the workers both view as NumPy arrays, so a step pickles nothing: the parent writes the actions,
+releases a semaphore per worker and waits on a shared semaphore for every worker to finish.
+
+Everything off the hot path, reset, seeding, get_attr, set_attr, env_method and the reasons for truncations, goes
+through a pipe per worker.
+"""
+import functools
+import multiprocessing as mp
+import traceback
+import numpy as np
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+from numpy.typing import NDArray
+import gymnasium as gym
+from stable_baselines3.common.vec_env import DummyVecEnv, VecEnv
+from stable_baselines3.common.vec_env.base_vec_env import VecEnvIndices, VecEnvObs, VecEnvStepReturn
+from .yamb_env import YambEnv
+from .yamb_vec_env import YambVecEnv
+from .flatten_grid import FlattenGrid
+from .row_enum import ROW
+from .col_enum import COL
+from . import core
+
+# what the workers are told to do through the shared command buffer
+_STEP = 0
+_CALL = 1
+_CLOSE = 2
+# arrays are laid out on cache lines so that workers writing neighbouring slices don't share them
+_ALIGNMENT = 64
+
+Layout = Dict[str, Tuple[Tuple[int, ...], str, int]]
+
+
+def buffer_layout(num_envs: int, num_workers: int, flatten_grid: bool, float32: bool = False) -> Tuple[Layout, int]:
+    """
+    :return: the shape, dtype and byte offset of every shared array by name, and the total number of bytes
+    """
+    grid_shape = (len(ROW) * len(COL),) if flatten_grid else (len(ROW), len(COL))
+    observation_dtype = ("float32" if float32 else "float64") if flatten_grid else "int64"
+    arrays = {
+        "command": ((1,), "int64"),
+        "errors": ((num_workers,), "bool"),
+        "actions": ((num_envs, 9), "int64"),
+        "rewards": ((num_envs,), "float32"),
+        "dones": ((num_envs,), "bool"),
+        "truncated": ((num_envs,), "bool"),
+        "score": ((num_envs,), "int64"),
+        "masks": ((num_envs, core.MASK_SIZE), "bool"),
+    }
+    for prefix in ["observation", "terminal"]:
+        arrays.update({
+            f"{prefix}/turn_number": ((num_envs,), "int64"),
+            f"{prefix}/roll_number": ((num_envs,), "int64"),
+            f"{prefix}/grid": ((num_envs,) + grid_shape, observation_dtype),
+            f"{prefix}/roll": ((num_envs, 6), observation_dtype),
+            f"{prefix}/announced": ((num_envs,), "int64"),
+            f"{prefix}/announced_row": ((num_envs,), "int64"),
+        })
+    layout = {}
+    offset = 0
+    for name, (shape, dtype) in arrays.items():
+        layout[name] = (shape, dtype, offset)
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        offset += -(-size // _ALIGNMENT) * _ALIGNMENT
+    return layout, offset
+
+def view_buffers(shm: SharedMemory, layout: Layout) -> Dict[str, NDArray]:
+    """
+    :return: NumPy views of every shared array by name
+    """
+    return {
+        name: np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+        for name, (shape, dtype, offset) in layout.items()
+    }
+
+def _observation_keys(buffers: Dict[str, NDArray], prefix: str) -> List[str]:
+    return [name.split("/", 1)[1] for name in buffers if name.startswith(prefix + "/")]
+
+def _make_env(flatten_grid: bool, float32: bool) -> gym.Env:
+    return FlattenGrid(YambEnv(), float32=float32) if flatten_grid else YambEnv()
+
+def _masks(env: VecEnv) -> NDArray[np.bool_]:
+    if isinstance(env, YambVecEnv):
+        return env.action_masks()
+    return np.stack(env.env_method("action_masks"))
+
+def _worker(
+    rank: int, start: int, stop: int, flatten_grid: bool, float32: bool, batched: bool, shm_name: str, layout: Layout,
+    work: mp.Semaphore, done: mp.Semaphore, remote,
+) -> None:
+    # the worker shares the parent's resource tracker, which forgets the block once the parent unlinks it
+    shm = SharedMemory(name=shm_name)
+    buffers = view_buffers(shm, layout)
+    if batched:
+        env = YambVecEnv(stop - start, flatten_grid=flatten_grid, float32=float32)
+    else:
+        env = DummyVecEnv([functools.partial(_make_env, flatten_grid, float32)] * (stop - start))
+    keys = _observation_keys(buffers, "observation")
+    reasons: Dict[int, str] = {}
+
+    def write(observation: Dict[str, NDArray]) -> None:
+        for key in keys:
+            buffers[f"observation/{key}"][start:stop] = observation[key]
+        buffers["masks"][start:stop] = _masks(env)
+
+    try:
+        while True:
+            work.acquire()
+            command = buffers["command"][0]
+            if command == _CLOSE:
+                break
+            try:
+                if command == _STEP:
+                    observation, rewards, dones, infos = env.step(buffers["actions"][start:stop])
+                    buffers["rewards"][start:stop] = rewards
+                    buffers["dones"][start:stop] = dones
+                    # for a finished game this is its final score, its slot has already been reset
+                    buffers["score"][start:stop] = [info.get("score", 0) for info in infos]
+                    reasons.clear()
+                    for i in np.flatnonzero(dones):
+                        info = infos[i]
+                        for key in keys:
+                            buffers[f"terminal/{key}"][start + i] = info["terminal_observation"][key]
+                        buffers["truncated"][start + i] = "truncation_reason" in info
+                        if "truncation_reason" in info:
+                            reasons[start + i] = info["truncation_reason"]
+                    write(observation)
+                else:
+                    name, args, kwargs = remote.recv()
+                    if name == "reset":
+                        if args[0] is not None:
+                            env.seed(args[0])
+                        write(env.reset())
+                        result = None
+                    elif name == "truncation_reasons":
+                        result = dict(reasons)
+                    else:
+                        result = getattr(env, name)(*args, **kwargs)
+                    remote.send(result)
+            except Exception:
+                buffers["errors"][rank] = True
+                remote.send(traceback.format_exc())
+            done.release()
+    finally:
+        buffers.clear()
+        shm.close()
+        remote.close()
+
+
+class SharedMemoryVecEnv(VecEnv):
+    """Steps num_envs games of yamb split between num_workers processes, each of which steps a contiguous slice of
+    the games, batched with a YambVecEnv when it has at least BATCHED_MIN_ENVS of them. Observations, rewards, dones
+    and action masks are written by the workers straight into shared memory so nothing is pickled on a step, and the
+    masks are computed by the workers as they step.
+
+    The rules, rewards, infos and automatic resets are the same as YambVecEnv.
+
+    :param num_envs: number of games to play in parallel
+    :param num_workers: number of worker processes, the games are split between them as evenly as possible
+    :param flatten_grid: whether observations are returned in the FlattenGrid format or the YambEnv format
+    :param float32: whether the flattened grid and roll are float32 instead of float64, see FlattenGrid
+    :param start_method: multiprocessing start method, forkserver when available like SubprocVecEnv
+    """
+    # a YambVecEnv step costs about as much as stepping this many YambEnvs one at a time
+    BATCHED_MIN_ENVS = 12
+
+    def __init__(
+        self, num_envs: int, num_workers: int, flatten_grid: bool = True, float32: bool = False,
+        start_method: Optional[str] = None,
+    ):
+        if not 1 <= num_workers <= num_envs:
+            raise ValueError(f"Need between 1 and {num_envs} workers not {num_workers}")
+        self.render_mode = None
+        self.flatten_grid = flatten_grid
+        self.float32 = float32
+        self.closed = False
+        self.waiting = False
+        self.slices = [(int(s[0]), int(s[-1]) + 1) for s in np.array_split(np.arange(num_envs), num_workers)]
+
+        layout, size = buffer_layout(num_envs, num_workers, flatten_grid, float32)
+        self.shm = SharedMemory(create=True, size=size)
+        self.buffers = view_buffers(self.shm, layout)
+        self.buffers["errors"][:] = False
+        self.observation_keys = _observation_keys(self.buffers, "observation")
+
+        if start_method is None:
+            start_method = "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn"
+        ctx = mp.get_context(start_method)
+        self.done = ctx.Semaphore(0)
+        self.works = [ctx.Semaphore(0) for _ in self.slices]
+        self.remotes = []
+        self.processes = []
+        for rank, (start, stop) in enumerate(self.slices):
+            remote, work_remote = ctx.Pipe()
+            batched = stop - start >= self.BATCHED_MIN_ENVS
+            args = (
+                rank, start, stop, flatten_grid, float32, batched, self.shm.name, layout, self.works[rank], self.done,
+                work_remote,
+            )
+            # daemon=True: if the main process crashes, we should not cause things to hang
+            process = ctx.Process(target=_worker, args=args, daemon=True)
+            process.start()
+            work_remote.close()
+            self.remotes.append(remote)
+            self.processes.append(process)
+
+        env = YambVecEnv(1, flatten_grid=flatten_grid, float32=float32)
+        super().__init__(num_envs, env.observation_space, env.action_space)
+
+    @property
+    def num_workers(self) -> int:
+        return len(self.slices)
+
+    def _signal(self, command: int, workers: Sequence[int]) -> None:
+        self.buffers["command"][0] = command
+        for rank in workers:
+            self.works[rank].release()
+
+    def _wait(self, workers: Sequence[int]) -> None:
+        for _ in workers:
+            self.done.acquire()
+        failed = np.flatnonzero(self.buffers["errors"])
+        if len(failed) > 0:
+            messages = [self.remotes[rank].recv() for rank in failed]
+            self.buffers["errors"][:] = False
+            raise RuntimeError("Worker failed:\n" + "\n".join(messages))
+
+    def _call(self, name: str, per_worker_args: Dict[int, tuple], kwargs: Optional[dict] = None) -> Dict[int, Any]:
+        """Calls a method of the vectorized environment of some of the workers through their pipes
+
+        :param per_worker_args: the arguments to call it with for each worker which should be called
+
+        :return: the result from each worker
+        """
+        workers = list(per_worker_args)
+        for rank in workers:
+            self.remotes[rank].send((name, per_worker_args[rank], kwargs or {}))
+        self._signal(_CALL, workers)
+        self._wait(workers)
+        return {rank: self.remotes[rank].recv() for rank in workers}
+
+    def _observation(self, prefix: str, idx=slice(None)) -> Dict[str, NDArray]:
+        # copies, the shared buffers are overwritten on the next step
+        return {key: self.buffers[f"{prefix}/{key}"][idx].copy() for key in self.observation_keys}
+
+    def reset(self) -> VecEnvObs:
+        """Reset every game - remember this also includes rolling the dice
+
+        :return: stacked observations of the initial states
+        """
+        self._call("reset", {rank: (self._seeds[start],) for rank, (start, _) in enumerate(self.slices)})
+        self._reset_seeds()
+        return self._observation("observation")
+
+    def step_async(self, actions: NDArray[np.int64]) -> None:
+        self.buffers["actions"][:] = np.asarray(actions, dtype=np.int64).reshape(self.num_envs, -1)
+        self._signal(_STEP, range(self.num_workers))
+        self.waiting = True
+
+    def step_wait(self) -> VecEnvStepReturn:
+        """
+        :return: observations, rewards, dones, infos the same as YambVecEnv.step_wait
+        """
+        self._wait(range(self.num_workers))
+        self.waiting = False
+        dones = self.buffers["dones"].copy()
+        truncated = self.buffers["truncated"]
+        infos: List[dict] = [{"score": s} for s in self.buffers["score"].tolist()]
+        done_idx = np.flatnonzero(dones)
+        if len(done_idx) > 0:
+            truncated_idx = done_idx[truncated[done_idx]]
+            if len(truncated_idx) > 0:
+                reasons = {}
+                workers = {self._worker_of(i) for i in truncated_idx}
+                for result in self._call("truncation_reasons", {rank: () for rank in workers}).values():
+                    reasons.update(result)
+                for i in truncated_idx:
+                    infos[i] = {"truncation_reason": reasons[i]}
+            for i in done_idx:
+                infos[i]["terminal_observation"] = self._observation("terminal", i)
+                infos[i]["TimeLimit.truncated"] = bool(truncated[i])
+        return self._observation("observation"), self.buffers["rewards"].copy(), dones, infos
+
+    def action_masks(self) -> NDArray[np.bool_]:
+        """
+        :return: (num_envs, sum([6, 6, 6, 6, 6, 6, 2, 14, 56])) masks of the current observations, the same layout
+            as YambEnv.action_masks
+        """
+        return self.buffers["masks"].copy()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        if self.waiting:
+            self._wait(range(self.num_workers))
+        self._signal(_CLOSE, range(self.num_workers))
+        for process in self.processes:
+            process.join()
+        for remote in self.remotes:
+            remote.close()
+        self.buffers = {}
+        self.shm.close()
+        self.shm.unlink()
+        self.closed = True
+
+    def _worker_of(self, i: int) -> int:
+        return next(rank for rank, (start, stop) in enumerate(self.slices) if start <= i < stop)
+
+    def _per_worker_indices(self, indices: VecEnvIndices) -> Dict[int, List[int]]:
+        """
+        :return: the indices local to each worker's slice, for the workers which have any of indices
+        """
+        local: Dict[int, List[int]] = {}
+        for i in self._get_indices(indices):
+            rank = self._worker_of(i)
+            local.setdefault(rank, []).append(i - self.slices[rank][0])
+        return local
+
+    def get_attr(self, attr_name: str, indices: VecEnvIndices = None) -> List[Any]:
+        """See YambVecEnv.get_attr
+        """
+        local = self._per_worker_indices(indices)
+        results = self._call("get_attr", {rank: (attr_name, idx) for rank, idx in local.items()})
+        return [value for rank in local for value in results[rank]]
+
+    def set_attr(self, attr_name: str, value: Any, indices: VecEnvIndices = None) -> None:
+        """See YambVecEnv.set_attr, shared attributes are set in every worker
+        """
+        local = self._per_worker_indices(indices)
+        self._call("set_attr", {rank: (attr_name, value, idx) for rank, idx in local.items()})
+
+    def env_method(self, method_name: str, *method_args, indices: VecEnvIndices = None, **method_kwargs) -> List[Any]:
+        """See YambVecEnv.env_method, action_masks is answered from shared memory without asking the workers
+        """
+        if method_name == "action_masks":
+            return list(self.buffers["masks"][list(self._get_indices(indices))])
+        local = self._per_worker_indices(indices)
+        results = self._call(
+            "env_method",
+            {rank: (method_name,) + method_args for rank in local},
+            {"indices": None, **method_kwargs},
+        )
+        return [results[rank][i] for rank, idx in local.items() for i in idx]
+
+    def env_is_wrapped(self, wrapper_class: Type[gym.Wrapper], indices: VecEnvIndices = None) -> List[bool]:
+        return [False for _ in self._get_indices(indices)]
@@ -0,0 +1,164 @@
+"""Exact expected value maximising keeps for a single turn.
+
+What a turn is worth is given by values, an array of size 252 where values[i] is the worth of ending the turn with
+ROLLS[i], for example SCORE_TABLE[:, row] when the turn is going to fill out that row. The solver works backwards:
+with no rerolls left a roll is worth values[roll] and with k rerolls left it is worth the most, over the keeps
+it contains, of the expected worth of the roll after rerolling the rest of the dice with k - 1 rerolls left.
+
+Keeps are indices into score_table.KEEPS and the expectations over rerolls come from yamb.transitions. The tables
+for the 14 rows are solved once on first use, after that best_keep for a row is a lookup. The tables for the most
+recent VALUES_CACHE_SIZE values arrays are cached as well, so repeated queries against the same values are lookups too.
+"""
+import functools
+import numpy as np
+from typing import Optional, Tuple
+from numpy.typing import NDArray, ArrayLike
+from . import score_table
+from . import transitions
+
+# the most rerolls in a turn
+MAX_REROLLS = 2
+# a roll of five different faces contains the most keeps
+MAX_SUB_KEEPS = 2 ** score_table.NUM_DICE
+# how many values arrays best_keep and best_keeps keep the solved tables of
+VALUES_CACHE_SIZE = 1024
+
+
+@functools.lru_cache(maxsize=None)
+def sub_keeps() -> NDArray[np.int64]:
+    """
+    :return: (252, 32) array, [roll] are the indices of the keeps which can be made from ROLLS[roll], the most
+        dice first, padded with the keep of all five dice
+    """
+    table = np.empty((score_table.NUM_ROLLS, MAX_SUB_KEEPS), dtype=np.int64)
+    sizes = score_table.KEEPS.sum(axis=1, dtype=np.int64)
+    for i, roll in enumerate(score_table.ROLLS):
+        keeps = np.flatnonzero(np.all(score_table.KEEPS <= roll, axis=1))
+        keeps = keeps[np.argsort(-sizes[keeps], kind="stable")]
+        table[i] = keeps[0]
+        table[i, :len(keeps)] = keeps
+    table.flags.writeable = False
+    return table
+
+def roll_worths(values: ArrayLike, rerolls: int) -> NDArray[np.float64]:
+    """
+    :param values: worth of ending the turn with each roll, shape (..., 252)
+    :param rerolls: how many rerolls are left
+
+    :return: what each roll is worth when keeping optimally, shape (..., 252)
+    """
+    if rerolls < 0:
+        raise ValueError(f"Rerolls {rerolls} can't be negative")
+    roll_values = np.asarray(values, dtype=np.float64)
+    candidates = sub_keeps()
+    for _ in range(rerolls):
+        roll_values = transitions.expectation(roll_values)[..., candidates].max(axis=-1)
+    return roll_values
+
+def solve(values: ArrayLike, rerolls: int) -> Tuple[NDArray[np.int64], NDArray[np.float64]]:
+    """
+    :param values: worth of ending the turn with each roll, shape (..., 252)
+    :param rerolls: how many rerolls are left
+
+    :return: best keep of each roll and what each roll is worth when keeping optimally, both of shape (..., 252)
+    """
+    roll_values = np.asarray(values, dtype=np.float64)
+    candidates = sub_keeps()
+    if rerolls == 0:
+        # with no rerolls left every die is kept
+        return np.broadcast_to(candidates[:, 0], roll_values.shape), roll_values
+    candidate_values = transitions.expectation(roll_worths(roll_values, rerolls - 1))[..., candidates]
+    best = candidate_values.argmax(axis=-1)
+    keeps = candidates[np.arange(score_table.NUM_ROLLS), best]
+    return keeps, np.take_along_axis(candidate_values, best[..., None], axis=-1)[..., 0]
+
+@functools.lru_cache(maxsize=None)
+def row_tables(rerolls: int) -> Tuple[NDArray[np.int64], NDArray[np.float64]]:
+    """
+    :return: best keeps and roll worths of shape (14, 252) when the turn is going to fill out each row
+    """
+    keeps, values = solve(score_table.SCORE_TABLE.T, rerolls)
+    keeps.flags.writeable = False
+    values.flags.writeable = False
+    return keeps, values
+
+@functools.lru_cache(maxsize=VALUES_CACHE_SIZE)
+def _values_tables(values: bytes, rerolls: int) -> Tuple[NDArray[np.int64], NDArray[np.float64]]:
+    keeps, roll_values = solve(np.frombuffer(values, dtype=np.float64), rerolls)
+    keeps.flags.writeable = False
+    roll_values.flags.writeable = False
+    return keeps, roll_values
+
+def values_tables(values: ArrayLike, rerolls: int) -> Tuple[NDArray[np.int64], NDArray[np.float64]]:
+    """Cached solve of a single values array
+
+    :param values: worth of ending the turn with each roll, array of size 252
+
+    :return: best keep of each roll and what each roll is worth, both of size 252
+    """
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    if values.shape != (score_table.NUM_ROLLS,):
+        raise ValueError(f"Values must have shape ({score_table.NUM_ROLLS},) not {values.shape}")
+    return _values_tables(values.tobytes(), rerolls)
+
+def best_of_rows(rows: ArrayLike, offsets: Optional[ArrayLike] = None) -> NDArray[np.float64]:
+    """Worth of each roll when the turn can fill out any of rows, for example the open cells of the grid
+
+    :param rows: rows the turn can fill out
+    :param offsets: worth added to each of rows, for example an estimate of what filling it out gives up
+
+    :return: array of size 252
+    """
+    values = score_table.SCORE_TABLE[:, np.asarray(rows, dtype=np.int64)].astype(np.float64)
+    if offsets is not None:
+        values += np.asarray(offsets, dtype=np.float64)
+    return values.max(axis=1)
+
+def best_keep(
+    roll: ArrayLike, rerolls: int, row: Optional[int] = None, values: Optional[ArrayLike] = None
+) -> Tuple[NDArray[np.int64], float]:
+    """
+    :param roll: the roll in multinomial format
+    :param rerolls: how many rerolls are left
+    :param row: the row the turn is going to fill out, give either row or values
+    :param values: worth of ending the turn with each roll, array of size 252
+
+    :return: the dice to keep in multinomial format and the expected worth of the turn
+    """
+    idx = score_table.roll_to_index(roll)
+    if row is not None:
+        keeps, roll_values = row_tables(rerolls)
+        return score_table.KEEPS[keeps[row, idx]].astype(np.int64), float(roll_values[row, idx])
+    keeps, roll_values = values_tables(values, rerolls)
+    return score_table.KEEPS[keeps[idx]].astype(np.int64), float(roll_values[idx])
+
+def best_keeps(
+    rolls: ArrayLike, rerolls: int, rows: Optional[ArrayLike] = None, values: Optional[ArrayLike] = None
+) -> Tuple[NDArray[np.int64], NDArray[np.float64]]:
+    """Batched best_keep. Rows and values of shape (252,) are cached lookups, values of shape (n, 252) are solved
+    on every call in a single batched pass which only looks at the keeps of each game's own roll on the last step.
+
+    :param rolls: rolls in multinomial format, shape (n, 6)
+    :param rerolls: how many rerolls are left
+    :param rows: the row each turn is going to fill out, shape (n,), give either rows or values
+    :param values: worth of ending each turn with each roll, shape (252,) or (n, 252)
+
+    :return: dice to keep of shape (n, 6) and expected worths of shape (n,)
+    """
+    idx = score_table.roll_to_index(np.asarray(rolls).reshape(-1, score_table.NUM_FACES))
+    if rows is not None:
+        keeps, roll_values = row_tables(rerolls)
+        rows = np.asarray(rows, dtype=np.int64)
+        return score_table.KEEPS[keeps[rows, idx]].astype(np.int64), roll_values[rows, idx]
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        keeps, roll_values = values_tables(values, rerolls)
+        return score_table.KEEPS[keeps[idx]].astype(np.int64), roll_values[idx]
+    # only the keeps of each game's own roll are needed on the last step
+    if rerolls == 0:
+        return score_table.ROLLS[idx].astype(np.int64), values[np.arange(len(idx)), idx]
+    batch = np.arange(len(idx))[:, None]
+    candidates = sub_keeps()[idx]
+    candidate_values = transitions.expectation(roll_worths(values, rerolls - 1))[batch, candidates]
+    best = candidate_values.argmax(axis=-1)[:, None]
+    return score_table.KEEPS[candidates[batch, best][:, 0]].astype(np.int64), candidate_values[batch, best][:, 0]
@@ -0,0 +1,143 @@
+"""Comparing players on the same dice, common random numbers.
+
+Every player plays game g with the dice tape of game g (see yamb.dice_tape), so the luck of the dice is shared and
+cancels out of the difference between two players' scores on the same game. The ranking is judged on these paired
+differences, whose spread is much smaller than that of the scores themselves.
+
+Games are played in rounds of batch_games. After each round every pair of players adjacent in the ranking gets a
+confidence interval on its mean paired difference and the tournament stops early once none of them contain zero.
+The intervals are Bonferroni corrected for the number of pairs and the number of rounds which could be looked at,
+so stopping early doesn't inflate the chance of a wrong ranking beyond 1 - confidence.
+"""
+import itertools
+import math
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+from typing import Callable, Dict, List, Optional, Tuple
+from numpy.typing import NDArray
+from .dice_tape import dice_tapes
+from .evaluation import load_player, play_games
+
+# name of each player and how to load it, (agent, model_path) as in yamb.evaluation.load_player
+PlayerSpecs = Dict[str, Tuple[Optional[str], Optional[str]]]
+
+# players loaded by each worker process once, by _load_players
+_players: dict = {}
+
+
+def _load_players(specs: PlayerSpecs):
+    _players.clear()
+    _players.update({name: load_player(agent, model_path) for name, (agent, model_path) in specs.items()})
+
+def _play_block(name: str, seed: int, start: int, stop: int, num_envs: int) -> List[float]:
+    # the games are numbered start to stop - 1 so their tapes are the same whichever worker plays them
+    tapes = dice_tapes(seed, range(start, stop))
+    return play_games(_players[name], stop - start, num_envs, seed=seed, dice_tapes=tapes)["rewards"]
+
+def critical_value(confidence: float, comparisons: int) -> float:
+    """
+    :param confidence: chance that every one of the intervals contains the true difference, e.g. 0.95
+    :param comparisons: number of intervals looked at
+
+    :return: number of standard errors either side of the mean which the Bonferroni corrected intervals span
+    """
+    return NormalDist().inv_cdf(1 - (1 - confidence) / (2 * comparisons))
+
+def paired_difference(a: NDArray[np.float64], b: NDArray[np.float64], z: float) -> dict:
+    """
+    :param a: score of the first player in each game
+    :param b: score of the second player in the same games
+    :param z: standard errors either side of the mean, see critical_value
+
+    :return: dict with the mean difference a - b, its standard error and the low and high ends of its interval
+    """
+    differences = a - b
+    se = differences.std(ddof=1) / math.sqrt(len(differences)) if len(differences) > 1 else math.inf
+    mean = float(differences.mean())
+    return {"mean": mean, "se": se, "low": mean - z * se, "high": mean + z * se}
+
+def rank(scores: Dict[str, NDArray[np.float64]], z: float) -> dict:
+    """
+    :param scores: score of each player in each game, the same games for every player
+    :param z: standard errors either side of the mean, see critical_value
+
+    :return: dict with the players best first in ranking, the paired difference of every pair in pairs and whether
+        every pair adjacent in the ranking is separated in settled
+    """
+    ranking = sorted(scores, key=lambda name: scores[name].mean(), reverse=True)
+    pairs = {
+        (a, b): paired_difference(scores[a], scores[b], z) for a, b in itertools.combinations(ranking, 2)
+    }
+    settled = all(pairs[(a, b)]["low"] > 0 for a, b in zip(ranking, ranking[1:]))
+    return {"ranking": ranking, "pairs": pairs, "settled": settled}
+
+def run_tournament(
+    specs: PlayerSpecs,
+    max_games: int,
+    batch_games: int = 256,
+    seed: int = 0,
+    num_envs: int = 64,
+    workers: int = 1,
+    confidence: float = 0.95,
+    on_round: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """Plays rounds of batch_games games with every player on the same dice until the ranking is settled or
+    max_games have been played
+
+    :param specs: name of each player and how to load it
+    :param seed: seed of the dice tapes
+    :param num_envs: number of games each worker steps together
+    :param workers: number of processes, 1 plays every game in this process
+    :param confidence: chance of the whole ranking being right when the tournament stops early
+    :param on_round: called with the result so far after every round
+
+    :return: the result of rank along with the number of games played in games and the scores of each player in
+        scores
+    """
+    if len(specs) < 2:
+        raise ValueError("A tournament needs at least two players")
+    if max_games < 1:
+        raise ValueError(f"Max games {max_games} must be positive")
+    rounds = math.ceil(max_games / batch_games)
+    z = critical_value(confidence, rounds * len(specs) * (len(specs) - 1) // 2)
+    scores = {name: np.empty(0) for name in specs}
+    pool = ProcessPoolExecutor(workers, initializer=_load_players, initargs=(specs,)) if workers > 1 else None
+    if pool is None:
+        _load_players(specs)
+    try:
+        for start in range(0, max_games, batch_games):
+            stop = min(start + batch_games, max_games)
+            blocks = [(b[0], b[-1] + 1) for b in np.array_split(np.arange(start, stop), workers) if len(b) > 0]
+            tasks = [(name, seed, int(a), int(b), num_envs) for name in specs for a, b in blocks]
+            if pool is None:
+                results = [_play_block(*task) for task in tasks]
+            else:
+                results = [future.result() for future in [pool.submit(_play_block, *task) for task in tasks]]
+            for (name, *_), rewards in zip(tasks, results):
+                scores[name] = np.concatenate([scores[name], rewards])
+            result = rank(scores, z)
+            result.update(games=stop, scores=scores)
+            if on_round is not None:
+                on_round(result)
+            if result["settled"]:
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return result
+
+def format_result(result: dict) -> str:
+    """
+    :return: the ranking with the mean score of each player and the paired differences of adjacent players
+    """
+    scores = result["scores"]
+    lines = [f"After {result['games']} games, {'settled' if result['settled'] else 'not settled'}"]
+    for i, name in enumerate(result["ranking"]):
+        lines.append(f"{i + 1:3d}. {name:30s} mean {scores[name].mean():8.1f}  std {scores[name].std():7.1f}")
+    for a, b in zip(result["ranking"], result["ranking"][1:]):
+        pair = result["pairs"][(a, b)]
+        lines.append(
+            f"     {a} - {b}: {pair['mean']:+.1f} [{pair['low']:+.1f}, {pair['high']:+.1f}] (se {pair['se']:.2f})"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,130 @@
+"""Where the dice end up after keeping some of them and rerolling the rest.
+
+For each of the 462 keeps in score_table.KEEPS the distribution over the 252 rolls in score_table.ROLLS is stored
+sparsely in assets/transitions.npy, one record per (keep, roll) which can happen, sorted by keep then roll. Each
+record's probability is weight / 6 ** (number of dice rerolled), so the probabilities are exact.
+
+The file is memory mapped read only so every process which loads it shares one physical copy. It is generated by
+running python -m yamb.transitions.
+
+sample draws from the sparse records directly. expectation instead multiplies by dense(), the records expanded
+into a (462, 252) float64 matrix of probabilities which each process builds once and keeps, about 0.9 MB. The
+solver and agents take expectations of large batches, for which the product is about four times quicker than
+summing the sparse records.
+"""
+import functools
+import math
+import os
+import numpy as np
+from numpy.typing import NDArray, ArrayLike
+from . import score_table
+
+ASSET_PATH = os.path.join(os.path.dirname(__file__), "assets", "transitions.npy")
+DTYPE = np.dtype([("keep", "<u2"), ("roll", "u1"), ("weight", "<u2")])
+# the most ways five dice can land, 6 ** 5
+MAX_WEIGHT = score_table.NUM_FACES ** score_table.NUM_DICE
+
+
+def build() -> NDArray:
+    """
+    :return: the records of the asset, computed from scratch
+    """
+    keeps = score_table.KEEPS.astype(np.int64)
+    sizes = keeps.sum(axis=1)
+    records = []
+    for keep_idx, keep in enumerate(keeps):
+        n = score_table.NUM_DICE - sizes[keep_idx]
+        # the ways n rerolled dice can land are the keeps of n dice, weighted by the number of orders they land in
+        for outcome in keeps[sizes == n]:
+            weight = math.factorial(n) // math.prod(math.factorial(c) for c in outcome)
+            records.append((keep_idx, score_table.roll_to_index(keep + outcome), weight))
+    table = np.array(records, dtype=DTYPE)
+    return table[np.lexsort((table["roll"], table["keep"]))]
+
+def save(path: str = ASSET_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.save(path, build())
+
+@functools.lru_cache(maxsize=None)
+def table() -> NDArray:
+    """
+    :return: the records of the asset memory mapped read only, with fields keep, roll and weight
+    """
+    return np.load(ASSET_PATH, mmap_mode="r")
+
+@functools.lru_cache(maxsize=None)
+def offsets() -> NDArray[np.int64]:
+    """
+    :return: (463,) array, the records of keep i are table()[offsets[i]:offsets[i + 1]]
+    """
+    offsets = np.searchsorted(table()["keep"], np.arange(score_table.NUM_KEEPS + 1))
+    offsets.flags.writeable = False
+    return offsets
+
+@functools.lru_cache(maxsize=None)
+def denominators() -> NDArray[np.int64]:
+    """
+    :return: (462,) array, 6 ** the number of dice each keep rerolls
+    """
+    denominators = score_table.NUM_FACES ** (score_table.NUM_DICE - score_table.KEEPS.sum(axis=1, dtype=np.int64))
+    denominators.flags.writeable = False
+    return denominators
+
+@functools.lru_cache(maxsize=None)
+def dense() -> NDArray[np.float64]:
+    """
+    :return: (462, 252) array, [keep, roll] is the probability of ending up with ROLLS[roll] after keeping
+        KEEPS[keep] and rerolling the rest of the dice
+    """
+    records = table()
+    matrix = np.zeros((score_table.NUM_KEEPS, score_table.NUM_ROLLS))
+    matrix[records["keep"], records["roll"]] = records["weight"] / denominators()[records["keep"]]
+    matrix.flags.writeable = False
+    return matrix
+
+def expectation(values: ArrayLike) -> NDArray[np.float64]:
+    """
+    :param values: worth of each roll, shape (..., 252)
+
+    :return: expected worth after each keep, shape (..., 462)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    # a product per values array rather than one for the whole batch, so the result for a values array is the same
+    # whatever else it is batched with
+    return np.matmul(values[..., None, :], dense().T)[..., 0, :]
+
+@functools.lru_cache(maxsize=None)
+def _sample_keys() -> NDArray[np.int64]:
+    # keep * MAX_WEIGHT + the running weight of each record within its keep, increasing across the whole table
+    records = table()
+    weights = records["weight"].astype(np.int64)
+    cumulative = np.cumsum(weights)
+    cumulative -= np.repeat(cumulative[offsets()[:-1]] - weights[offsets()[:-1]], np.diff(offsets()))
+    keys = records["keep"].astype(np.int64) * MAX_WEIGHT + cumulative
+    keys.flags.writeable = False
+    return keys
+
+def sample(keeps: ArrayLike, rng: np.random.Generator) -> NDArray[np.int64]:
+    """
+    :param keeps: indices of the keeps, shape (...)
+    :param rng: generator to roll the dice with
+
+    :return: indices of the rolls after rerolling the dice which weren't kept, shape (...)
+    """
+    keeps = np.asarray(keeps, dtype=np.int64)
+    draws = rng.integers(0, denominators()[keeps])
+    records = np.searchsorted(_sample_keys(), keeps * MAX_WEIGHT + draws, side="right")
+    return table()["roll"][records].astype(np.int64)
+
+def sample_rolls(keeps: ArrayLike, rng: np.random.Generator) -> NDArray[np.uint8]:
+    """
+    :param keeps: dice kept in multinomial format, shape (..., 6)
+    :param rng: generator to roll the dice with
+
+    :return: rolls after rerolling the dice which weren't kept in multinomial format, shape (..., 6)
+    """
+    return score_table.ROLLS[sample(score_table.keep_to_index(keeps), rng)]
+
+if __name__ == "__main__":
+    save()
+    print(f"Saved {len(build())} transitions to {ASSET_PATH}")
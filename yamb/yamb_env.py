@@ -5,33 +5,48 @@ import gymnasium as gym
 from gymnasium import spaces
 from .row_enum import ROW
 from .col_enum import COL
-import pygame
+from . import score_table
+from . import core
+from .yamb_state import YambState
+from .profiling import Profiler, profiling_enabled
 
 class YambEnv(gym.Env):
     """
+    The state of the game is held in a YambState and the attributes below are forwarded to it. The rules are in yamb.core.
+    
     :param turn_number: This tells us which turn we are on. There are 14 * 4 turns in yamb each consisting of 3 rolls.
     :param roll_number: Each round in yamb consists of three rolls. This tells you which roll we are on.
     :param grid: This is the 14 * 4 grid in yamb which needs to be filled out. -145 indicates not filled.
     :param roll: This tells us the roll we just had in multinomial format. This means roll[2] is the number of 3s.
     :param announced: This tells us whether we have announced in our current turn.
     :param announced_row: This tells us the row we have announced in our current turn.
+    :param score: This is the game score thus far, kept up to date along with column_scores as grid squares are filled.
+    :param open_cells: Bitboard of the grid squares which haven't been filled, bit row_col_fill is set when that square is open.
+    :param num_open_cells: This tells us how many grid squares outside the najava column haven't been filled.
+    :param next_dolje: This is the next row to fill out in the dolje column, len(ROW) once it has been completed.
+    :param next_gore: This is the next row to fill out in the gore column, -1 once it has been completed.
+    :param profile: record counts and timings of each phase, see stats(). None uses the YAMB_PROFILE environment variable.
     """
     RENDER_FPS = 10
-    NAN = -145
-    ACTION_ANNOUNCE_IDX = 6
-    ACTION_ANNOUNCE_ROW_IDX = 7
-    ACTION_ROW_COL_FILL_IDX = 8
+    NAN = core.NAN
+    ACTION_ANNOUNCE_IDX = core.ACTION_ANNOUNCE_IDX
+    ACTION_ANNOUNCE_ROW_IDX = core.ACTION_ANNOUNCE_ROW_IDX
+    ACTION_ROW_COL_FILL_IDX = core.ACTION_ROW_COL_FILL_IDX
     SCREEN_WIDTH = 640
     SCREEN_HEIGHT = 480
+    MASK_ANNOUNCE_IDX = core.MASK_ANNOUNCE_IDX
+    MASK_ANNOUNCE_ROW_IDX = core.MASK_ANNOUNCE_ROW_IDX
+    MASK_ROW_COL_FILL_IDX = core.MASK_ROW_COL_FILL_IDX
+    MASK_SIZE = core.MASK_SIZE
+    # number of dice sampled from np_random at a time, see roll_dice
+    DICE_BLOCK_SIZE = 4096
     
-    def __init__(self):
+    def __init__(self, profile: Optional[bool] = None):
         super().__init__()
-        self.turn_number = 0
-        self.roll_number = 0
-        self.grid = np.full((len(ROW), len(COL)), self.NAN)
-        self.roll = np.array([0, 0, 0, 0, 0, 0])
-        self.announced = 0
-        self.announced_row = 0
+        self.profiler = Profiler() if profiling_enabled(profile) else None
+        # the action mask is written into the same buffer every time, see action_masks
+        self._action_mask = np.zeros(self.MASK_SIZE, dtype=np.bool_)
+        self.state = YambState()
         
         self.observation_space = spaces.Dict({
             "turn_number": spaces.Discrete(len(ROW)*len(COL),start=0),
@@ -47,6 +62,10 @@ class YambEnv(gym.Env):
         
         self.truncation_penalty = -1000
         
+        # faces of dice which have been sampled but not rolled yet
+        self._dice = np.empty(0, dtype=np.int8)
+        self._dice_idx = 0
+        
         # pygame parameters and objects
         self.screen = None
         self.clock = None
@@ -56,15 +75,19 @@ class YambEnv(gym.Env):
         
         :return: observation of the initial state along with auxiliary information
         """
-        np.random.seed(seed)
-        self.turn_number = 0
-        self.roll_number = 0
-        for row in ROW:
-            for col in COL:
-                self.grid[row.value, col.value] = self.NAN
-        self.roll = np.random.multinomial(5, [1/6.]*6)
-        self.announced = 0
-        self.announced_row = 0
+        profiler = self.profiler
+        if profiler is not None:
+            t = profiler.now()
+        super().reset(seed=seed)
+        if seed is not None:
+            # throw away dice sampled before reseeding so that the game is reproducible
+            self._dice_idx = len(self._dice)
+        self.state = YambState()
+        if profiler is not None:
+            t = profiler.record("reset/new_state", t)
+        self.roll = self.roll_dice(5)
+        if profiler is not None:
+            t = profiler.record("reset/roll_dice", t)
         return self.get_observation(), {}
     
     def step(self, action : NDArray[np.int64]) -> Tuple[dict, float, bool, bool, dict]:
@@ -81,56 +104,50 @@ class YambEnv(gym.Env):
             info:dict other relevant information for example the score / why the game truncated?
         """
         
-        prev_score = self.get_score()
-        
-        valid, info = True, {}
-        if self.roll_number == 0:
-            valid = self.step_1_valid(action, info)
-        
-        if self.roll_number == 1:
-            valid = self.step_2_valid(action, info)
-        
-        if self.roll_number == 2:
-            valid = self.step_3_valid(action[YambEnv.ACTION_ROW_COL_FILL_IDX], info)
-        
-        if not valid:
+        profiler = self.profiler
+        if profiler is not None:
+            t = profiler.now()
+        prev_score = self.score
+        
+        info = {}
+        reason = core.check_action(self.state, action)
+        if profiler is not None:
+            t = profiler.record("step/check", t)
+        if reason is not None:
+            info["truncation_reason"] = reason
+            if profiler is not None:
+                profiler.truncation(core.truncation_kind(self.state, action))
             return self.get_observation(), self.truncation_penalty, False, True, info
         
         # if the action is valid, we can mutate the state
-        if self.roll_number == 0:
-            self.roll_number += 1
-            keep = action[:self.ACTION_ANNOUNCE_IDX]
-            number_of_dice_to_roll = sum(self.roll - keep)
-            self.roll = np.random.multinomial(number_of_dice_to_roll, [1/6.]*6) + keep
-            self.announced = action[self.ACTION_ANNOUNCE_IDX]
-            self.announced_row = action[self.ACTION_ANNOUNCE_ROW_IDX]
-        elif self.roll_number == 1:
-            self.roll_number += 1
-            keep = action[:self.ACTION_ANNOUNCE_IDX]
-            number_of_dice_to_roll = sum(self.roll - keep)
-            self.roll = np.random.multinomial(number_of_dice_to_roll, [1/6.]*6) + keep
-        elif self.roll_number == 2:
-            # we are moving on to the next turn
-            self.roll_number = 0
-            self.turn_number += 1
-            self.announced = 0
-            self.announced_row = 0
-            r, c = YambEnv.convert_row_col_fill(action[YambEnv.ACTION_ROW_COL_FILL_IDX])
-            self.grid[r, c] = self.get_grid_square_value(r, self.roll)
-            self.roll = np.random.multinomial(5, [1/6.]*6)
-        
-        info["score"] = self.get_score()
+        dice = self.roll_dice(core.num_dice_to_roll(self.state, action))
+        if profiler is not None:
+            t = profiler.record("step/roll_dice", t)
+            # filling a grid square is where the scoring happens
+            phase = "step/apply_fill" if self.roll_number == 2 else "step/apply_keep"
+        core.apply(self.state, action, dice)
+        if profiler is not None:
+            t = profiler.record(phase, t)
+        
+        info["score"] = self.score
+        info["column_scores"] = list(self.column_scores)
         reward = info["score"] - prev_score
-        terminated = True if self.turn_number >= len(ROW)*len(COL) else False
+        terminated = core.is_terminal(self.state)
         
         if self.render_mode == "human":
             self.render()
-            
-        return self.get_observation(), reward, terminated, False, info
+        
+        observation = self.get_observation()
+        if profiler is not None:
+            profiler.record("step/info_and_observation", t)
+        return observation, reward, terminated, False, info
     
     def render(self):
         """Displays the state of the game - there is no interaction with the user here
         """
+        # pygame is only imported once we render so that training workers don't pay for it
+        import pygame
+        
         if self.screen is None:
             pygame.init()
             self.screen = pygame.display.set_mode((self.SCREEN_WIDTH, self.SCREEN_HEIGHT), pygame.RESIZABLE)
@@ -252,55 +269,37 @@ class YambEnv(gym.Env):
     
     def close(self):
         if self.screen is not None:
+            import pygame
             pygame.display.quit()
             pygame.quit()
         
     def get_observation(self) -> dict:
-        observation = {
-            "turn_number": self.turn_number,
-            "roll_number": self.roll_number,
-            "grid": self.grid,
-            "roll": self.roll,
-            "announced": self.announced,
-            "announced_row": self.announced_row,
-        }
-        return observation
-    
-    def action_masks(self) -> List[bool]:
-        """Returns a one hot encoded list whether an action is valid
-        
-        :return: list of size sum([6, 6, 6, 6, 6, 6, 2, 14, 56])
+        return core.observation(self.state)
+    
+    def action_masks(self) -> NDArray[np.bool_]:
+        """Returns a one hot encoded array whether an action is valid. The same buffer is overwritten
+        on every call so copy it if you need to keep it.
+        
+        :return: boolean array of size sum([6, 6, 6, 6, 6, 6, 2, 14, 56])
         """
-        num1s = [False] * 6
-        num2s = [False] * 6
-        num3s = [False] * 6
-        num4s = [False] * 6
-        num5s = [False] * 6
-        num6s = [False] * 6
-        announce = [False] * 2
-        announce_row = [False] * len(ROW)
-        row_col_fill = [False] * len(ROW) * len(COL)
-        
-        # can only keep dice that you have
-        if (self.roll_number == 0) or (self.roll_number == 1):
-            num1s = [True] * (self.roll[0] + 1) + [False] * (5 - self.roll[0])
-            num2s = [True] * (self.roll[1] + 1) + [False] * (5 - self.roll[1])
-            num3s = [True] * (self.roll[2] + 1) + [False] * (5 - self.roll[2])
-            num4s = [True] * (self.roll[3] + 1) + [False] * (5 - self.roll[3])
-            num5s = [True] * (self.roll[4] + 1) + [False] * (5 - self.roll[4])
-            num6s = [True] * (self.roll[5] + 1) + [False] * (5 - self.roll[5])
-        
-        if self.roll_number == 0:
-            announce_row = [self.valid_announce_row(i) for i in range(len(ROW))]
-            announce = [not self.need_to_announce(), any(announce_row)]
-            
-        if self.roll_number == 2:
-            for i in range(len(COL)*len(ROW)):
-                row_col_fill[i] = self.step_3_valid(i, {})
-                
-        mask = num1s + num2s + num3s + num4s + num5s + num6s + announce + announce_row + row_col_fill
+        if self.profiler is None:
+            return core.legal_actions(self.state, out=self._action_mask)
+        t = self.profiler.now()
+        mask = core.legal_actions(self.state, out=self._action_mask)
+        self.profiler.record("action_masks", t)
         return mask
+    
+    def stats(self) -> dict:
+        """Counts and cumulative nanoseconds of each phase of step, reset and action_masks along with the number of
+        truncations for each kind of invalid action (keep, announce or fill). Use yamb.profiling.merge_stats to combine
+        the stats of several environments.
         
+        :return: {"phases": {phase: {"calls": int, "ns": int}}, "truncations": {reason: int}}, empty when not profiling
+        """
+        if self.profiler is None:
+            return {"phases": {}, "truncations": {}}
+        return self.profiler.stats()
+    
     def step_1_valid(self, action: NDArray[np.int64], info: dict) -> bool:
         """Checks whether an action of type 1 is valid
         
@@ -311,22 +310,10 @@ class YambEnv(gym.Env):
         
         unused: row_col_fill
         """
-        keep = action[:self.ACTION_ANNOUNCE_IDX]
-        if any( (self.roll - keep) < 0 ):
-            info["truncation_reason"] = f"Can't keep {keep} when you only have {self.roll}"
-            return False
-        
-        if action[self.ACTION_ANNOUNCE_IDX] == 1:
-            if not self.valid_announce_row(action[self.ACTION_ANNOUNCE_ROW_IDX]):
-                info["truncation_reason"] = f"Announce row {ROW(action[self.ACTION_ANNOUNCE_ROW_IDX])} not valid"
-                return False
-            
-        if action[self.ACTION_ANNOUNCE_IDX] == 0:
-            if self.need_to_announce():
-                info["truncation_reason"] = "Only najava column left so must use it"
-                return False
-            
-        return True
+        reason = core.check_keep(self.state, action) or core.check_announce(self.state, action)
+        if reason is not None:
+            info["truncation_reason"] = reason
+        return reason is None
     
     def step_2_valid(self, action: NDArray[np.int64], info: dict) -> bool:
         """Checks whether an action of type 2 is valid
@@ -338,12 +325,10 @@ class YambEnv(gym.Env):
         
         unused: announce, announce_row, row_col_fill
         """
-        keep = action[:self.ACTION_ANNOUNCE_IDX]
-        if any( (self.roll - keep) < 0 ):
-            info["truncation_reason"] = f"Can't keep {keep} when you only have {self.roll}"
-            return False
-        
-        return True
+        reason = core.check_keep(self.state, action)
+        if reason is not None:
+            info["truncation_reason"] = reason
+        return reason is None
     
     def step_3_valid(self, row_col_fill: int, info: dict) -> bool:
         """Checks whether an action of type 3 is valid
@@ -352,28 +337,10 @@ class YambEnv(gym.Env):
         
         :return: whether the action was valid or not, truncation reason will be added to info dict
         """
-        r, c = YambEnv.convert_row_col_fill(row_col_fill)
-        if self.grid[r, c] != self.NAN:
-            info["truncation_reason"] = f"{r}, {c} already filled in "
-            return False
-        
-        if (c == COL.GORE.value) and (r != self.get_next_gore()):
-            info["truncation_reason"] = f"Gore needed {ROW(self.get_next_gore())} but trying {ROW(r)}"
-            return False
-        
-        if (c == COL.DOLJE.value) and (r != self.get_next_dolje()):
-            info["truncation_reason"] = f"Dolje needed {ROW(self.get_next_dolje())} but trying {ROW(r)}"
-            return False
-        
-        if self.announced and ((c != COL.NAJAVA.value) or (r != self.announced_row)):
-            info["truncation_reason"] = f"Announced {ROW(self.announced_row)} but trying to fill {ROW(r)}, {COL(c)}"
-            return False
-        
-        if (self.announced==0) and (c == COL.NAJAVA.value):
-            info["truncation_reason"] = f"Have not announced so cannot fill out najava column"
-            return False
-        
-        return True
+        reason = core.check_fill(self.state, row_col_fill)
+        if reason is not None:
+            info["truncation_reason"] = reason
+        return reason is None
     
     def valid_announce_row(self, row: int) -> bool:
         """
@@ -381,72 +348,130 @@ class YambEnv(gym.Env):
         
         :return: bool indicated whether you can actually announce that row
         """
-        if row not in ROW:
-            return False
-        
-        if self.grid[row, COL.NAJAVA.value] == self.NAN:
-            return True
-        else:
-            return False
+        return core.valid_announce_row(self.state, row)
         
     def need_to_announce(self) -> bool:
         """You must announce on your first roll when the rest of the grid has been filled
         :return: whether you need to announce on your first roll
         """
-        for col in [COL.DOLJE, COL.GORE, COL.SLOBODNO]:
-            for row in ROW:
-                if self.grid[row.value, col.value] == self.NAN:
-                    # there's something you can fill out
-                    return False
-                
-        return True
+        return core.need_to_announce(self.state)
+    
+    def roll_dice(self, number_of_dice: int) -> NDArray[np.int64]:
+        """Rolls dice using this environment's np_random. Dice are sampled from np_random in blocks
+        so rolling is usually just a slice of the block.
+        
+        :param number_of_dice: how many dice to roll
+        
+        :return: the roll in multinomial format
+        """
+        if self._dice_idx + number_of_dice > len(self._dice):
+            self._dice = self.np_random.integers(0, 6, size=self.DICE_BLOCK_SIZE, dtype=np.int8)
+            self._dice_idx = 0
+        faces = self._dice[self._dice_idx:self._dice_idx + number_of_dice]
+        self._dice_idx += number_of_dice
+        return np.bincount(faces, minlength=6)
+    
+    @property
+    def turn_number(self) -> int:
+        return self.state.turn_number
+    
+    @turn_number.setter
+    def turn_number(self, turn_number: int):
+        self.state.turn_number = turn_number
+    
+    @property
+    def roll_number(self) -> int:
+        return self.state.roll_number
+    
+    @roll_number.setter
+    def roll_number(self, roll_number: int):
+        self.state.roll_number = roll_number
+    
+    @property
+    def grid(self) -> NDArray[np.int16]:
+        """A read only view of the grid, the score and legality state are kept up to date by fill_grid_square and
+        the grid setter so writing into the grid would leave them wrong
+        """
+        grid = self.state.grid.view()
+        grid.flags.writeable = False
+        return grid
+    
+    @grid.setter
+    def grid(self, grid: NDArray[np.int64]):
+        """Replacing the whole grid recomputes the running score of every column and the legality state
+        """
+        self.state.set_grid(grid)
+    
+    @property
+    def roll(self) -> NDArray[np.uint8]:
+        return self.state.roll
+    
+    @roll.setter
+    def roll(self, roll: NDArray[np.int64]):
+        self.state.roll[:] = roll
+    
+    @property
+    def announced(self) -> int:
+        return self.state.announced
+    
+    @announced.setter
+    def announced(self, announced: int):
+        self.state.announced = announced
+    
+    @property
+    def announced_row(self) -> int:
+        return self.state.announced_row
+    
+    @announced_row.setter
+    def announced_row(self, announced_row: int):
+        self.state.announced_row = announced_row
+    
+    @property
+    def score(self) -> int:
+        return self.state.score
+    
+    @property
+    def column_scores(self) -> List[int]:
+        return self.state.column_scores
+    
+    @property
+    def open_cells(self) -> int:
+        return self.state.open_cells
+    
+    @property
+    def num_open_cells(self) -> int:
+        return self.state.num_open_cells
+    
+    @property
+    def next_dolje(self) -> int:
+        return self.state.next_dolje
+    
+    @property
+    def next_gore(self) -> int:
+        return self.state.next_gore
+    
+    def fill_grid_square(self, row: int, col: int, value: int):
+        """Writes a value into an open grid square, see YambState.fill_grid_square
+        """
+        self.state.fill_grid_square(row, col, value)
     
     def get_score(self) -> int:
         """
         :return: game score thus far, anything with an nan will be assigned zero
         """
-        result = 0
-        for col in COL:
-            A = 0
-            for row in [ROW.ONES, ROW.TWOS, ROW.THREES, ROW.FOURS, ROW.FIVES, ROW.SIXES]:
-                A += 0 if self.grid[row.value, col.value] == self.NAN else self.grid[row.value, col.value]
-                
-            if (A >= 60):
-                A += 30
-            
-            if (self.grid[ROW.MAX.value, col.value] == self.NAN) or \
-            (self.grid[ROW.MIN.value, col.value] == self.NAN) or \
-            (self.grid[ROW.ONES.value, col.value] == self.NAN):
-                B = 0
-            else:
-                B = self.grid[ROW.MAX.value, col.value] - self.grid[ROW.MIN.value, col.value]
-                B *= self.grid[ROW.ONES.value, col.value] 
-            
-            C = 0
-            for row in [ROW.DVAPARA, ROW.TRIS, ROW.SKALA, ROW.FULL, ROW.POKER, ROW.YAMB]:
-                C += 0 if self.grid[row.value, col.value] == self.NAN else self.grid[row.value, col.value]
-                
-            result = result + A + B + C
-                
-        return result
+        return self.score
     
-    def get_next_dolje(self) -> Optional[int]:
+    def get_next_dolje(self) -> int:
         """
-        Gets the next row we need to fill out in the dolje column, if we've completed it return nan
+        Gets the next row we need to fill out in the dolje column, if we've completed it return len(ROW)
         """
-        for row in ROW:
-            if self.grid[row.value, COL.DOLJE.value] == self.NAN: return row.value
-        
-        return np.nan
+        return self.next_dolje
     
-    def get_next_gore(self) -> Optional[int]:
+    def get_next_gore(self) -> int:
         """
-        Gets the next row we need to fill out in the gore column, if we've completed it return nan
+        Gets the next row we need to fill out in the gore column, if we've completed it return -1
         """
-        for row in reversed(ROW):
-            if self.grid[row.value, COL.GORE.value] == self.NAN: return row.value
-        
-        return np.nan
+        return self.next_gore
     
     @staticmethod
     def get_grid_square_value(row: int, cnts: np.array) -> int:
@@ -455,87 +480,21 @@ class YambEnv(gym.Env):
         :param cnts: array of size six which tells you tells you mapping of face value to how many dice
         :return: grid square value
         """
-        
-        if row == ROW.ONES.value:
-            return 1 * cnts[0]
-        elif row == ROW.TWOS.value:
-            return 2 * cnts[1]
-        elif row == ROW.THREES.value:
-            return 3 * cnts[2]
-        elif row == ROW.FOURS.value:
-            return 4 * cnts[3]
-        elif row == ROW.FIVES.value:
-            return 5 * cnts[4]
-        elif row == ROW.SIXES.value:
-            return 6 * cnts[5]
-        elif row == ROW.MAX.value:
-            return sum( (i+1)*item for i, item in enumerate(cnts) )
-        elif row == ROW.MIN.value:
-            return sum( (i+1)*item for i, item in enumerate(cnts) )
-        elif row == ROW.DVAPARA.value:
-            return YambEnv.dvapara(cnts)
-        elif row == ROW.TRIS.value:
-            return YambEnv.tris(cnts)
-        elif row == ROW.SKALA.value:
-            return YambEnv.skala(cnts)
-        elif row == ROW.FULL.value:
-            return YambEnv.full(cnts)
-        elif row == ROW.POKER.value:
-            return YambEnv.poker(cnts)
-        elif row == ROW.YAMB.value:
-            return YambEnv.yamb(cnts)
-        else:
+        if not 0 <= row < len(ROW):
             raise IndexError(f"Row {row} not found in possible rows")
+
+        try:
+            return int(score_table.SCORE_TABLE[score_table.roll_to_index(cnts), row])
+        except ValueError:
+            # not a roll of five dice so it isn't in the table
+            return score_table.compute_grid_square_value(row, cnts)
     
-    @staticmethod
-    def dvapara(cnts : np.array) -> int:
-        if not (sum(cnts >= 2) >= 2): return 0
-        s = 0
-        for i, cnt in enumerate(cnts):
-            if cnt >= 2:
-                s += 2 * (i+1)
-        return s + 10
-    
-    @staticmethod
-    def tris(cnts : np.array) -> int:
-        if not any(cnts >= 3): return 0
-        s = 0
-        for i, cnt in enumerate(cnts):
-            if cnt >= 3:
-                s += 3 * (i+1)
-                
-        return s + 20
-    
-    @staticmethod
-    def skala(cnts : np.array) -> int:
-        if all(np.array([1,1,1,1,1,0]) == cnts):
-            return 45
-        elif all(np.array([0,1,1,1,1,1]) == cnts):
-            return 50
-        else:
-            return 0
-    
-    @staticmethod
-    def full(cnts : np.array) -> int:
-        if not (any(cnts == 3) * any(cnts == 2)): return 0
-        s = sum( (i+1)*item for i, item in enumerate(cnts) )
-        return s + 40
-    
-    @staticmethod
-    def poker(cnts : np.array) -> int:
-        if not any(cnts >= 4): return 0
-        s = 0
-        for i, cnt in enumerate(cnts):
-            if cnt >= 4:
-                s += 4 * (i+1)
-        
-        return s + 50
-    
-    @staticmethod
-    def yamb(cnts : np.array) -> int:
-        if not any(cnts >= 5): return 0
-        s = sum( (i+1)*item for i, item in enumerate(cnts) )
-        return s + 60
+    dvapara = staticmethod(score_table.dvapara)
+    tris = staticmethod(score_table.tris)
+    skala = staticmethod(score_table.skala)
+    full = staticmethod(score_table.full)
+    poker = staticmethod(score_table.poker)
+    yamb = staticmethod(score_table.yamb)
     
     @staticmethod
     def convert_row_col_fill(row_col_to_fill: int) -> Tuple[int, int]:
@@ -546,9 +505,7 @@ class YambEnv(gym.Env):
         
         :return: row we want to fill in, col we want to fill in
         """
-        assert 0 <= row_col_to_fill < len(ROW) * len(COL)
-        col_to_fill, row_to_fill = divmod(row_col_to_fill, len(ROW))
-        return row_to_fill, col_to_fill
+        return core.convert_row_col_fill(row_col_to_fill)
     
     @staticmethod
     def convert_row_fill_col_fill(row_to_fill: int, col_to_fill: int) -> int:
@@ -560,6 +517,4 @@ class YambEnv(gym.Env):
         
         :return: single index representing a grid square we want to fill
         """
-        assert 0 <= row_to_fill < len(ROW)
-        assert 0 <= col_to_fill < len(COL)
-        return row_to_fill + len(ROW) * col_to_fill
\ No newline at end of file
+        return core.convert_row_fill_col_fill(row_to_fill, col_to_fill)
\ No newline at end of file
@@ -0,0 +1,228 @@
+import numpy as np
+from numpy.typing import ArrayLike
+from .row_enum import ROW
+from .col_enum import COL
+
+# looking up enum members is slow so the ones used on every fill are plain ints
+_NUM_ROWS = len(ROW)
+_ONES, _SIXES, _MAX, _MIN, _DVAPARA = ROW.ONES.value, ROW.SIXES.value, ROW.MAX.value, ROW.MIN.value, ROW.DVAPARA.value
+_DOLJE, _GORE, _NAJAVA = COL.DOLJE.value, COL.GORE.value, COL.NAJAVA.value
+
+class YambState:
+    """The state of a game of yamb, independent of any environment. Two states are equal when their grid, roll,
+    turn_number, roll_number, announced and announced_row are equal, the rest is derived from those and kept
+    up to date as grid squares are filled. Don't mutate a state while it is used as a key in a dict or set.
+
+    :param turn_number: This tells us which turn we are on. There are 14 * 4 turns in yamb each consisting of 3 rolls.
+    :param roll_number: Each round in yamb consists of three rolls. This tells you which roll we are on.
+    :param grid: int16 (14, 4) grid in yamb which needs to be filled out. -145 indicates not filled.
+    :param roll: uint8 (6,) roll we just had in multinomial format. This means roll[2] is the number of 3s.
+    :param announced: This tells us whether we have announced in our current turn.
+    :param announced_row: This tells us the row we have announced in our current turn.
+    :param score: This is the game score thus far, kept up to date along with column_scores as grid squares are filled.
+    :param open_cells: Bitboard of the grid squares which haven't been filled, bit row_col_fill is set when that square is open.
+    :param open_mask: bool (4, 14) array indexed [col, row] which is True when that grid square hasn't been filled.
+    :param num_open_cells: This tells us how many grid squares outside the najava column haven't been filled.
+    :param next_dolje: This is the next row to fill out in the dolje column, len(ROW) once it has been completed.
+    :param next_gore: This is the next row to fill out in the gore column, -1 once it has been completed.
+    """
+    NAN = -145
+    GRID_DTYPE = np.dtype("<i2")
+    ROLL_DTYPE = np.dtype(np.uint8)
+    # size of pack(): the grid, the roll, then turn_number, roll_number, announced, announced_row as one byte each
+    PACKED_SIZE = len(ROW) * len(COL) * GRID_DTYPE.itemsize + 6 * ROLL_DTYPE.itemsize + 4
+
+    __slots__ = (
+        "turn_number", "roll_number", "grid", "roll", "announced", "announced_row",
+        "score", "column_scores", "upper_sums", "lower_sums",
+        "open_cells", "open_mask", "num_open_cells", "next_dolje", "next_gore",
+    )
+
+    def __init__(self):
+        self.turn_number = 0
+        self.roll_number = 0
+        self.grid = np.full((len(ROW), len(COL)), self.NAN, dtype=self.GRID_DTYPE)
+        self.roll = np.zeros(6, dtype=self.ROLL_DTYPE)
+        self.announced = 0
+        self.announced_row = 0
+        # an empty grid, the same as set_grid would compute
+        self.score = 0
+        self.column_scores = [0] * len(COL)
+        self.upper_sums = [0] * len(COL)
+        self.lower_sums = [0] * len(COL)
+        self.open_cells = (1 << (len(ROW) * len(COL))) - 1
+        self.open_mask = np.ones((len(COL), len(ROW)), dtype=np.bool_)
+        self.num_open_cells = len(ROW) * COL.NAJAVA.value
+        self.next_dolje = 0
+        self.next_gore = len(ROW) - 1
+
+    def set_grid(self, grid: ArrayLike):
+        """Replacing the whole grid recomputes the running score of every column and the legality state
+
+        :param grid: (14, 4) grid, -145 indicates not filled
+        """
+        self.grid = np.array(grid, dtype=self.GRID_DTYPE)
+        self.open_mask = (self.grid == self.NAN).T.copy()
+        # a single pass over the grid in python is quicker than numpy for 56 squares
+        nan = self.NAN
+        open_cells = 0
+        self.upper_sums = [0] * len(COL)
+        self.lower_sums = [0] * len(COL)
+        for col, column in enumerate(self.grid.T.tolist()):
+            upper_sum = lower_sum = 0
+            for row, value in enumerate(column):
+                if value == nan:
+                    open_cells |= 1 << (row + _NUM_ROWS * col)
+                elif row <= _SIXES:
+                    upper_sum += value
+                elif row >= _DVAPARA:
+                    lower_sum += value
+            self.upper_sums[col] = upper_sum
+            self.lower_sums[col] = lower_sum
+        self.open_cells = open_cells
+        self.num_open_cells = (open_cells & ((1 << (_NUM_ROWS * _NAJAVA)) - 1)).bit_count()
+        self.next_dolje = self._find_next_dolje(0)
+        self.next_gore = self._find_next_gore(_NUM_ROWS - 1)
+        self.column_scores = [self.get_column_score(col) for col in range(len(COL))]
+        self.score = sum(self.column_scores)
+
+    def fill_grid_square(self, row: int, col: int, value: int):
+        """Writes a value into an open grid square and updates the running score of its column
+        and the legality state in constant time
+
+        :param row: row of the grid square
+        :param col: col of the grid square
+        :param value: value to write, see YambEnv.get_grid_square_value
+        """
+        self.grid[row, col] = value
+        self.open_mask[col, row] = False
+        self.open_cells &= ~(1 << (row + _NUM_ROWS * col))
+        if col != _NAJAVA:
+            self.num_open_cells -= 1
+        if col == _DOLJE and row == self.next_dolje:
+            self.next_dolje = self._find_next_dolje(row + 1)
+        if col == _GORE and row == self.next_gore:
+            self.next_gore = self._find_next_gore(row - 1)
+
+        if row <= _SIXES:
+            self.upper_sums[col] += value
+        elif row >= _DVAPARA:
+            self.lower_sums[col] += value
+        column_score = self.get_column_score(col)
+        self.score += column_score - self.column_scores[col]
+        self.column_scores[col] = column_score
+
+    def get_column_score(self, col: int) -> int:
+        """
+        :param col: which col do you want the score for
+
+        :return: A + B + C for that column from the running sums, anything with an nan will be assigned zero
+        """
+        A = self.upper_sums[col]
+        if (A >= 60):
+            A += 30
+
+        grid_max = int(self.grid[_MAX, col])
+        grid_min = int(self.grid[_MIN, col])
+        grid_ones = int(self.grid[_ONES, col])
+        if (grid_max == self.NAN) or (grid_min == self.NAN) or (grid_ones == self.NAN):
+            B = 0
+        else:
+            B = (grid_max - grid_min) * grid_ones
+
+        return A + B + self.lower_sums[col]
+
+    def _find_next_dolje(self, row: int) -> int:
+        while row < _NUM_ROWS and not self.open_mask[_DOLJE, row]:
+            row += 1
+        return row
+
+    def _find_next_gore(self, row: int) -> int:
+        while row >= 0 and not self.open_mask[_GORE, row]:
+            row -= 1
+        return row
+
+    def snapshot(self) -> "YambState":
+        """
+        :return: an independent copy of this state
+        """
+        state = YambState.__new__(YambState)
+        state.turn_number = self.turn_number
+        state.roll_number = self.roll_number
+        state.grid = self.grid.copy()
+        state.roll = self.roll.copy()
+        state.announced = self.announced
+        state.announced_row = self.announced_row
+        state.score = self.score
+        state.column_scores = self.column_scores.copy()
+        state.upper_sums = self.upper_sums.copy()
+        state.lower_sums = self.lower_sums.copy()
+        state.open_cells = self.open_cells
+        state.open_mask = self.open_mask.copy()
+        state.num_open_cells = self.num_open_cells
+        state.next_dolje = self.next_dolje
+        state.next_gore = self.next_gore
+        return state
+
+    def restore(self, snapshot: "YambState"):
+        """Overwrites this state in place with a snapshot, the snapshot can be restored again later
+
+        :param snapshot: state returned by snapshot()
+        """
+        self.turn_number = snapshot.turn_number
+        self.roll_number = snapshot.roll_number
+        self.grid[:] = snapshot.grid
+        self.roll[:] = snapshot.roll
+        self.announced = snapshot.announced
+        self.announced_row = snapshot.announced_row
+        self.score = snapshot.score
+        self.column_scores[:] = snapshot.column_scores
+        self.upper_sums[:] = snapshot.upper_sums
+        self.lower_sums[:] = snapshot.lower_sums
+        self.open_cells = snapshot.open_cells
+        self.open_mask[:] = snapshot.open_mask
+        self.num_open_cells = snapshot.num_open_cells
+        self.next_dolje = snapshot.next_dolje
+        self.next_gore = snapshot.next_gore
+
+    def pack(self) -> bytes:
+        """
+        :return: the state as PACKED_SIZE bytes, see unpack
+        """
+        return (
+            self.grid.tobytes()
+            + self.roll.tobytes()
+            + bytes((self.turn_number, self.roll_number, self.announced, self.announced_row))
+        )
+
+    @classmethod
+    def unpack(cls, data: bytes) -> "YambState":
+        """
+        :param data: bytes returned by pack
+
+        :return: the state which was packed
+        """
+        if len(data) != cls.PACKED_SIZE:
+            raise ValueError(f"Expected {cls.PACKED_SIZE} bytes but got {len(data)}")
+        grid_size = len(ROW) * len(COL) * cls.GRID_DTYPE.itemsize
+        # set_grid computes everything else so there's no need to build an empty state first
+        state = cls.__new__(cls)
+        state.set_grid(np.frombuffer(data, dtype=cls.GRID_DTYPE, count=len(ROW) * len(COL)).reshape(len(ROW), len(COL)))
+        state.roll = np.frombuffer(data, dtype=cls.ROLL_DTYPE, count=6, offset=grid_size).copy()
+        state.turn_number, state.roll_number, state.announced, state.announced_row = data[grid_size + 6:]
+        return state
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, YambState):
+            return NotImplemented
+        return self.pack() == other.pack()
+
+    def __hash__(self) -> int:
+        return hash(self.pack())
+
+    def __repr__(self) -> str:
+        return (
+            f"YambState(turn_number={self.turn_number}, roll_number={self.roll_number}, "
+            f"roll={self.roll.tolist()}, announced={self.announced}, announced_row={self.announced_row}, "
+            f"score={self.score})"
+        )
@@ -0,0 +1,136 @@
+import numpy as np
+from typing import Tuple, Optional
+from numpy.typing import NDArray
+from gymnasium import spaces
+from .row_enum import ROW
+from .col_enum import COL
+from . import core
+from . import solver
+from .yamb_env import YambEnv
+
+
+def keep_dice(policy: int, roll: NDArray[np.uint8], row: int, rerolls: int) -> NDArray[np.int64]:
+    """
+    :param policy: index into YambTurnEnv.KEEP_POLICIES
+    :param roll: the roll in multinomial format
+    :param row: the row which is going to be filled out at the end of the turn
+    :param rerolls: how many rerolls are left in the turn
+
+    :return: the dice to keep in multinomial format
+    """
+    if policy == YambTurnEnv.KEEP_POLICY_STOP:
+        return roll.astype(np.int64)
+    if policy == YambTurnEnv.KEEP_POLICY_GREEDY:
+        return solver.best_keep(roll, 1, row=row)[0]
+    if policy == YambTurnEnv.KEEP_POLICY_OPTIMAL:
+        return solver.best_keep(roll, rerolls, row=row)[0]
+    # keep every die of the most common face, the highest face when there is a tie
+    keep = np.zeros(6, dtype=np.int64)
+    face = 5 - int(np.argmax(roll[::-1]))
+    keep[face] = roll[face]
+    return keep
+
+class YambTurnEnv(YambEnv):
+    """A YambEnv where each step is a whole turn, so a game is 56 steps instead of 168. On the first roll of each turn
+    the agent chooses the grid square to fill out at the end of the turn and a policy for which dice to keep, then
+    the environment rolls twice more keeping dice with that policy and fills out the grid square.
+    Choosing a square in the najava column announces it.
+
+    The observation, reward and scoring are the same as YambEnv and the observation is always on the first roll.
+
+    Keep policies:
+        stop: keep every die, so the first roll is the one which gets filled out
+        greedy: keep the dice which maximise the expected value of the grid square after the next roll
+        most_common: keep every die of the most common face
+        optimal: keep the dice which maximise the expected value of the grid square at the end of the turn, see yamb.solver
+    """
+    KEEP_POLICIES = ("stop", "greedy", "most_common", "optimal")
+    KEEP_POLICY_STOP = 0
+    KEEP_POLICY_GREEDY = 1
+    KEEP_POLICY_MOST_COMMON = 2
+    KEEP_POLICY_OPTIMAL = 3
+    # [row_col_fill, keep_policy]
+    ACTION_TARGET_IDX = 0
+    ACTION_KEEP_POLICY_IDX = 1
+    MASK_KEEP_POLICY_IDX = len(ROW) * len(COL)
+    MASK_SIZE = MASK_KEEP_POLICY_IDX + len(KEEP_POLICIES)
+
+    def __init__(self, profile: Optional[bool] = None):
+        super().__init__(profile)
+        self.action_space = spaces.MultiDiscrete(np.array([len(ROW) * len(COL), len(self.KEEP_POLICIES)]))
+
+    def step(self, action : NDArray[np.int64]) -> Tuple[dict, float, bool, bool, dict]:
+        """Plays a whole turn
+
+        :param action: numpy array of length 2 [row_col_fill, keep_policy]
+
+        :return: observation, reward, terminated, truncated, info the same as YambEnv.step
+        """
+        prev_score = self.score
+
+        info = {}
+        target = int(action[self.ACTION_TARGET_IDX])
+        policy = int(action[self.ACTION_KEEP_POLICY_IDX])
+        reason = self.check_target(target)
+        if reason is None and not 0 <= policy < len(self.KEEP_POLICIES):
+            reason = f"Keep policy {policy} not valid"
+        if reason is not None:
+            info["truncation_reason"] = reason
+            if self.profiler is not None:
+                self.profiler.truncation("turn")
+            return self.get_observation(), self.truncation_penalty, False, True, info
+
+        row, col = core.convert_row_col_fill(target)
+        turn_action = np.zeros(9, dtype=np.int64)
+        turn_action[core.ACTION_ANNOUNCE_IDX] = int(col == COL.NAJAVA.value)
+        turn_action[core.ACTION_ANNOUNCE_ROW_IDX] = row if col == COL.NAJAVA.value else 0
+        for rerolls in range(solver.MAX_REROLLS, 0, -1):
+            turn_action[:core.ACTION_ANNOUNCE_IDX] = keep_dice(policy, self.roll, row, rerolls)
+            core.apply(self.state, turn_action, self.roll_dice(core.num_dice_to_roll(self.state, turn_action)))
+        turn_action[core.ACTION_ROW_COL_FILL_IDX] = target
+        core.apply(self.state, turn_action, self.roll_dice(5))
+
+        info["score"] = self.score
+        info["column_scores"] = list(self.column_scores)
+        reward = info["score"] - prev_score
+        terminated = core.is_terminal(self.state)
+
+        if self.render_mode == "human":
+            self.render()
+
+        return self.get_observation(), reward, terminated, False, info
+
+    def check_target(self, row_col_fill: int) -> Optional[str]:
+        """Checks the grid square chosen on the first roll can be filled out at the end of the turn
+
+        :param row_col_fill: int indicating which row and col of the grid to fill out
+
+        :return: None if the grid square is valid otherwise the truncation reason
+        """
+        row, col = core.convert_row_col_fill(row_col_fill)
+        if col == COL.NAJAVA.value:
+            return None if core.valid_announce_row(self.state, row) else f"Announce row {row} not valid"
+        if core.need_to_announce(self.state):
+            return "Only najava column left so must use it"
+        return core.check_fill(self.state, row_col_fill)
+
+    def action_masks(self) -> NDArray[np.bool_]:
+        """Returns a one hot encoded array whether an action is valid. The same buffer is overwritten
+        on every call so copy it if you need to keep it.
+
+        :return: boolean array of size sum([56, 4])
+        """
+        mask = self._action_mask
+        mask[:] = False
+        open_mask = self.state.open_mask
+        # row_col_fill is ordered column by column so this view is indexed [col, row]
+        target = mask[:self.MASK_KEEP_POLICY_IDX].reshape(len(COL), len(ROW))
+        target[COL.NAJAVA.value] = open_mask[COL.NAJAVA.value]
+        if not core.need_to_announce(self.state):
+            target[COL.SLOBODNO.value] = open_mask[COL.SLOBODNO.value]
+            if self.next_dolje < len(ROW):
+                target[COL.DOLJE.value, self.next_dolje] = True
+            if self.next_gore >= 0:
+                target[COL.GORE.value, self.next_gore] = True
+        mask[self.MASK_KEEP_POLICY_IDX:] = True
+        return mask
@@ -0,0 +1,354 @@
+import numpy as np
+from typing import Any, List, Optional, Type
+from numpy.typing import NDArray
+import gymnasium as gym
+from stable_baselines3.common.vec_env import VecEnv
+from stable_baselines3.common.vec_env.base_vec_env import VecEnvIndices, VecEnvObs, VecEnvStepReturn
+from .yamb_env import YambEnv
+from .flatten_grid import FlattenGrid
+from .row_enum import ROW
+from .col_enum import COL
+from . import score_table
+from . import core
+
+class YambVecEnv(VecEnv):
+    """Steps num_envs games of yamb at once, keeping the state of every game in stacked arrays.
+    The rules, rewards and truncations are the same as YambEnv, and games which finish are reset automatically.
+
+    :param num_envs: number of games to play in parallel
+    :param flatten_grid: whether observations are returned in the FlattenGrid format or the YambEnv format
+    :param float32: whether the flattened grid and roll are float32 instead of float64, see FlattenGrid
+
+    :param turn_number: (num_envs,) which turn each game is on
+    :param roll_number: (num_envs,) which roll each game is on
+    :param grid: (num_envs, 14, 4) the grid of each game. -145 indicates not filled.
+    :param roll: (num_envs, 6) the roll of each game in multinomial format
+    :param announced: (num_envs,) whether each game has announced in its current turn
+    :param announced_row: (num_envs,) the row each game has announced in its current turn
+    :param score: (num_envs,) the score of each game thus far
+    :param game_ids: (num_envs,) the number of the game each slot is playing, slot i plays games i, i + num_envs, ...
+    :param dice_tapes: optional (num_games, 56, 3, 5) dice of each game, see yamb.dice_tape and set_dice_tapes
+    """
+    NAN = core.NAN
+    NUM_CELLS = core.NUM_TURNS
+    MASK_ANNOUNCE_IDX = core.MASK_ANNOUNCE_IDX
+    MASK_ANNOUNCE_ROW_IDX = core.MASK_ANNOUNCE_ROW_IDX
+    MASK_ROW_COL_FILL_IDX = core.MASK_ROW_COL_FILL_IDX
+    MASK_SIZE = core.MASK_SIZE
+    # attributes which hold one entry per game, get_attr and set_attr index these per game
+    STACKED_ATTRS = ("turn_number", "roll_number", "grid", "roll", "announced", "announced_row", "score")
+
+    def __init__(self, num_envs: int, flatten_grid: bool = True, float32: bool = False):
+        self.render_mode = None
+        self.flatten_grid = flatten_grid
+        self.float32 = float32
+        self.turn_number = np.zeros(num_envs, dtype=np.int64)
+        self.roll_number = np.zeros(num_envs, dtype=np.int64)
+        self.grid = np.full((num_envs, len(ROW), len(COL)), self.NAN, dtype=np.int64)
+        self.roll = np.zeros((num_envs, 6), dtype=np.int64)
+        self.announced = np.zeros(num_envs, dtype=np.int64)
+        self.announced_row = np.zeros(num_envs, dtype=np.int64)
+        self.score = np.zeros(num_envs, dtype=np.int64)
+        self.truncation_penalty = -1000
+        self.rng = np.random.default_rng()
+        self.actions = np.zeros((num_envs, 9), dtype=np.int64)
+        self.game_ids = np.arange(num_envs)
+        self.dice_tapes: Optional[NDArray[np.int8]] = None
+
+        env = FlattenGrid(YambEnv(), float32=float32) if flatten_grid else YambEnv()
+        super().__init__(num_envs, env.observation_space, env.action_space)
+
+    def reset(self) -> VecEnvObs:
+        """Reset every game - remember this also includes rolling the dice
+
+        :return: stacked observations of the initial states
+        """
+        if self._seeds[0] is not None:
+            self.rng = np.random.default_rng(self._seeds[0])
+        self._reset_seeds()
+        self.game_ids = np.arange(self.num_envs)
+        self._reset_games(np.arange(self.num_envs))
+        return self.get_observation()
+
+    def step_async(self, actions: NDArray[np.int64]) -> None:
+        self.actions = np.asarray(actions, dtype=np.int64).reshape(self.num_envs, -1)
+
+    def step_wait(self) -> VecEnvStepReturn:
+        """Run one timestep of every game, see YambEnv.step for the rules of a single game
+
+        :return: observations, rewards, dones, infos
+        """
+        action = self.actions
+        keep = action[:, :YambEnv.ACTION_ANNOUNCE_IDX]
+        announce = action[:, YambEnv.ACTION_ANNOUNCE_IDX]
+        announce_row = action[:, YambEnv.ACTION_ANNOUNCE_ROW_IDX]
+        row_col_fill = action[:, YambEnv.ACTION_ROW_COL_FILL_IDX]
+
+        first_roll = self.roll_number == 0
+        last_roll = self.roll_number == 2
+        valid = self.valid_actions(action)
+
+        # if the action is valid, we can mutate the state
+        idx = np.flatnonzero(valid & first_roll)
+        self.announced[idx] = announce[idx]
+        self.announced_row[idx] = announce_row[idx]
+
+        idx = np.flatnonzero(valid & ~last_roll)
+        self.roll_number[idx] += 1
+        self.roll[idx] = self.roll_dice(5 - keep[idx].sum(axis=1), idx) + keep[idx]
+
+        # these games are moving on to the next turn
+        idx = np.flatnonzero(valid & last_roll)
+        r, c = row_col_fill[idx] % len(ROW), row_col_fill[idx] // len(ROW)
+        self.grid[idx, r, c] = score_table.get_grid_square_values(r, self.roll[idx])
+        self.roll_number[idx] = 0
+        self.turn_number[idx] += 1
+        self.announced[idx] = 0
+        self.announced_row[idx] = 0
+        self.roll[idx] = self.roll_dice(np.full(len(idx), 5), idx)
+        prev_score = self.score[idx]
+        self.score[idx] = self.get_grid_scores(self.grid[idx])
+
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+        rewards[idx] = self.score[idx] - prev_score
+        rewards[~valid] = self.truncation_penalty
+        terminated = self.turn_number >= self.NUM_CELLS
+        truncated = ~valid
+        dones = terminated | truncated
+
+        infos: List[dict] = [{"score": s} for s in self.score.tolist()]
+        for i in np.flatnonzero(truncated):
+            infos[i] = {"truncation_reason": self.truncation_reason(i, action[i])}
+
+        observation = self.get_observation()
+        done_idx = np.flatnonzero(dones)
+        if len(done_idx) > 0:
+            for i in done_idx:
+                infos[i]["terminal_observation"] = {key: value[i] for key, value in observation.items()}
+                infos[i]["TimeLimit.truncated"] = bool(truncated[i] and not terminated[i])
+            self.game_ids[done_idx] += self.num_envs
+            self._reset_games(done_idx)
+            observation = self.get_observation()
+
+        return observation, rewards, dones, infos
+
+    def close(self) -> None:
+        pass
+
+    def get_attr(self, attr_name: str, indices: VecEnvIndices = None) -> List[Any]:
+        """Attributes in STACKED_ATTRS are returned per game, every other attribute is shared by all the games
+        """
+        value = getattr(self, attr_name)
+        if attr_name in self.STACKED_ATTRS:
+            return [value[i] for i in self._get_indices(indices)]
+        return [value for _ in self._get_indices(indices)]
+
+    def set_attr(self, attr_name: str, value: Any, indices: VecEnvIndices = None) -> None:
+        """Attributes in STACKED_ATTRS are set for the games in indices, every other attribute is shared by all the
+        games so it can only be set for all of them
+        """
+        idx = list(self._get_indices(indices))
+        if attr_name in self.STACKED_ATTRS:
+            getattr(self, attr_name)[idx] = value
+            if attr_name == "grid":
+                self.score[idx] = self.get_grid_scores(self.grid[idx])
+            return
+        if sorted(idx) != list(range(self.num_envs)):
+            raise ValueError(f"{attr_name} is shared by all the games so it can't be set for only some of them")
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name: str, *method_args, indices: VecEnvIndices = None, **method_kwargs) -> List[Any]:
+        """Calls a batched method, for example action_masks or get_score, and splits the result per game
+        """
+        result = getattr(self, method_name)(*method_args, **method_kwargs)
+        return [result[i] for i in self._get_indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class: Type[gym.Wrapper], indices: VecEnvIndices = None) -> List[bool]:
+        return [False for _ in self._get_indices(indices)]
+
+    def get_observation(self) -> dict:
+        if self.flatten_grid:
+            dtype = np.float32 if self.float32 else np.float64
+            out = {
+                "grid": np.empty((self.num_envs, self.NUM_CELLS), dtype=dtype),
+                "roll": np.empty((self.num_envs, 6), dtype=dtype),
+            }
+            flattened = core.flatten_observation({"grid": self.grid, "roll": self.roll}, out)
+            grid = flattened["grid"]
+            roll = flattened["roll"]
+        else:
+            grid = self.grid.copy()
+            roll = self.roll.copy()
+
+        observation = {
+            "turn_number": self.turn_number.copy(),
+            "roll_number": self.roll_number.copy(),
+            "grid": grid,
+            "roll": roll,
+            "announced": self.announced.copy(),
+            "announced_row": self.announced_row.copy(),
+        }
+        return observation
+
+    def get_score(self) -> NDArray[np.int64]:
+        """
+        :return: (num_envs,) game score thus far of each game
+        """
+        return self.score.copy()
+
+    def action_masks(self) -> NDArray[np.bool_]:
+        """Returns one hot encoded masks whether an action is valid, in the same layout as YambEnv.action_masks
+
+        :return: (num_envs, sum([6, 6, 6, 6, 6, 6, 2, 14, 56])) boolean array
+        """
+        masks = np.zeros((self.num_envs, self.MASK_SIZE), dtype=bool)
+
+        # can only keep dice that you have
+        keep_roll = (self.roll_number < 2)[:, None, None]
+        keep = np.arange(6)[None, None, :] <= self.roll[:, :, None]
+        masks[:, :self.MASK_ANNOUNCE_IDX] = (keep & keep_roll).reshape(self.num_envs, -1)
+
+        first_roll = self.roll_number == 0
+        najava_open = self.grid[:, :, COL.NAJAVA.value] == self.NAN
+        masks[:, self.MASK_ANNOUNCE_IDX] = first_roll & ~self.need_to_announce()
+        masks[:, self.MASK_ANNOUNCE_IDX + 1] = first_roll & najava_open.any(axis=1)
+        masks[:, self.MASK_ANNOUNCE_ROW_IDX:self.MASK_ROW_COL_FILL_IDX] = najava_open & first_roll[:, None]
+
+        masks[:, self.MASK_ROW_COL_FILL_IDX:] = self.fill_masks() & (self.roll_number == 2)[:, None]
+        return masks
+
+    def fill_masks(self) -> NDArray[np.bool_]:
+        """Which grid squares each game is allowed to fill out if it were on its last roll
+
+        :return: (num_envs, 56) boolean array indexed by row_col_fill
+        """
+        rows = np.arange(len(ROW))[None, :]
+        allowed = self.grid == self.NAN
+        allowed[:, :, COL.DOLJE.value] &= rows == self.get_next_dolje()[:, None]
+        allowed[:, :, COL.GORE.value] &= rows == self.get_next_gore()[:, None]
+        announced = self.announced[:, None] != 0
+        allowed[:, :, COL.NAJAVA.value] &= announced & (rows == self.announced_row[:, None])
+        allowed[:, :, :COL.NAJAVA.value] &= ~announced[:, :, None]
+        # row_col_fill is ordered column by column
+        return allowed.transpose(0, 2, 1).reshape(self.num_envs, -1)
+
+    def valid_actions(self, action: NDArray[np.int64]) -> NDArray[np.bool_]:
+        """Checks which games the actions are valid for, see YambEnv.step_1_valid, step_2_valid and step_3_valid
+
+        :param action: (num_envs, 9) array
+            [num1s, num2s, num3s, num4s, num5s, num6s, announce, announce_row, row_col_fill]
+
+        :return: (num_envs,) boolean array
+        """
+        keep = action[:, :YambEnv.ACTION_ANNOUNCE_IDX]
+        announce = action[:, YambEnv.ACTION_ANNOUNCE_IDX]
+        announce_row = action[:, YambEnv.ACTION_ANNOUNCE_ROW_IDX]
+        row_col_fill = action[:, YambEnv.ACTION_ROW_COL_FILL_IDX]
+        envs = np.arange(self.num_envs)
+
+        valid_keep = np.all((keep >= 0) & (keep <= self.roll), axis=1)
+
+        valid_row = (announce_row >= 0) & (announce_row < len(ROW))
+        najava_open = self.grid[envs, np.clip(announce_row, 0, len(ROW) - 1), COL.NAJAVA.value] == self.NAN
+        valid_announce = np.where(announce == 1, valid_row & najava_open, True)
+        valid_announce &= np.where(announce == 0, ~self.need_to_announce(), True)
+
+        valid_cell = (row_col_fill >= 0) & (row_col_fill < self.NUM_CELLS)
+        valid_fill = valid_cell & self.fill_masks()[envs, np.clip(row_col_fill, 0, self.NUM_CELLS - 1)]
+
+        return np.select(
+            [self.roll_number == 0, self.roll_number == 1],
+            [valid_keep & valid_announce, valid_keep],
+            valid_fill,
+        )
+
+    def truncation_reason(self, i: int, action: NDArray[np.int64]) -> str:
+        """Explains why the action for game i was not valid
+        """
+        keep = action[:YambEnv.ACTION_ANNOUNCE_IDX]
+        if self.roll_number[i] == 2:
+            c, r = divmod(int(action[YambEnv.ACTION_ROW_COL_FILL_IDX]), len(ROW))
+            return f"Can't fill out row {r}, col {c}"
+        if np.any((keep < 0) | (keep > self.roll[i])):
+            return f"Can't keep {keep} when you only have {self.roll[i]}"
+        if action[YambEnv.ACTION_ANNOUNCE_IDX] == 1:
+            return f"Announce row {action[YambEnv.ACTION_ANNOUNCE_ROW_IDX]} not valid"
+        return "Only najava column left so must use it"
+
+    def need_to_announce(self) -> NDArray[np.bool_]:
+        """
+        :return: (num_envs,) whether each game needs to announce on its first roll
+        """
+        return ~np.any(self.grid[:, :, :COL.NAJAVA.value] == self.NAN, axis=(1, 2))
+
+    def get_next_dolje(self) -> NDArray[np.int64]:
+        """
+        :return: (num_envs,) next row to fill out in the dolje column, len(ROW) if it has been completed
+        """
+        empty = self.grid[:, :, COL.DOLJE.value] == self.NAN
+        return np.where(empty.any(axis=1), empty.argmax(axis=1), len(ROW))
+
+    def get_next_gore(self) -> NDArray[np.int64]:
+        """
+        :return: (num_envs,) next row to fill out in the gore column, -1 if it has been completed
+        """
+        empty = self.grid[:, ::-1, COL.GORE.value] == self.NAN
+        return np.where(empty.any(axis=1), len(ROW) - 1 - empty.argmax(axis=1), -1)
+
+    def set_dice_tapes(self, dice_tapes: Optional[NDArray[np.int8]]) -> None:
+        """Plays game g with the dice of dice_tapes[g] instead of the generator, games past the end of the tapes
+        go back to the generator. Set them before reset so that every game is played from the start of its tape.
+
+        :param dice_tapes: (num_games, 56, 3, 5) faces from 0 to 5, see yamb.dice_tape, or None to stop using tapes
+        """
+        self.dice_tapes = dice_tapes
+
+    def roll_dice(self, number_of_dice: NDArray[np.int64], idx: Optional[NDArray[np.int64]] = None) -> NDArray[np.int64]:
+        """Rolls a number of dice for several games at once
+
+        :param number_of_dice: (k,) how many dice to roll for each game
+        :param idx: (k,) the games rolling, already on the turn and roll the dice are for. Needed to roll from the
+            dice tapes, without them the dice come from the generator.
+
+        :return: (k, 6) rolls in multinomial format
+        """
+        k = len(number_of_dice)
+        faces = self.rng.integers(0, 6, size=(k, 5))
+        if self.dice_tapes is not None and idx is not None:
+            games, turns = self.game_ids[idx], self.turn_number[idx]
+            # after the last turn of a game there is nothing left on its tape
+            on_tape = (games < len(self.dice_tapes)) & (turns < self.NUM_CELLS)
+            faces[on_tape] = self.dice_tapes[games[on_tape], turns[on_tape], self.roll_number[idx][on_tape]]
+        # dice which aren't rolled land on a seventh face which is then dropped
+        faces[np.arange(5)[None, :] >= number_of_dice[:, None]] = 6
+        faces += 7 * np.arange(k)[:, None]
+        return np.bincount(faces.ravel(), minlength=7 * k).reshape(k, 7)[:, :6]
+
+    def _reset_games(self, idx: NDArray[np.int64]) -> None:
+        self.turn_number[idx] = 0
+        self.roll_number[idx] = 0
+        self.grid[idx] = self.NAN
+        self.roll[idx] = self.roll_dice(np.full(len(idx), 5), idx)
+        self.announced[idx] = 0
+        self.announced_row[idx] = 0
+        self.score[idx] = 0
+
+    @staticmethod
+    def get_grid_scores(grid: NDArray[np.int64]) -> NDArray[np.int64]:
+        """Vectorized YambEnv.get_score
+
+        :param grid: (k, 14, 4) grids
+
+        :return: (k,) score of each grid, anything with an nan will be assigned zero
+        """
+        filled = grid != YambEnv.NAN
+        values = np.where(filled, grid, 0)
+
+        A = values[:, ROW.ONES.value:ROW.SIXES.value + 1].sum(axis=1)
+        A += 30 * (A >= 60)
+
+        B = (values[:, ROW.MAX.value] - values[:, ROW.MIN.value]) * values[:, ROW.ONES.value]
+        B *= filled[:, ROW.MAX.value] & filled[:, ROW.MIN.value] & filled[:, ROW.ONES.value]
+
+        C = values[:, ROW.DVAPARA.value:].sum(axis=1)
+        return (A + B + C).sum(axis=1)
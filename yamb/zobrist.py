@@ -0,0 +1,232 @@
+"""Zobrist keys of game states and a transposition table of fixed size keyed by them.
+
+Many histories reach the same state, different keeps can reroll into the same roll and different turns can fill out
+the same grid, so searches and value caches which key on the state repeat work unless they notice. A state's key is
+the XOR of a random 64-bit key for each of:
+
+- the value of each filled grid square
+- the count of each face in the roll
+- the roll_number
+- whether it was announced and which row, the announced_row of a turn which didn't announce is ignored
+
+The turn_number isn't part of the key since it is the number of grid squares filled out. The random keys are drawn
+from SEED so keys are the same in every process. Since each part is XORed in on its own, apply updates a key as an
+action is applied by XORing out what changes and XORing in what it changes to, instead of hashing the whole state
+again, and grid_keys hashes the grids of a batch of leaves with NumPy.
+
+Keys are plain Python ints, which are quicker to XOR than NumPy scalars, from 0 to 2 ** 64 - 1.
+"""
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from numpy.typing import NDArray
+from .row_enum import ROW
+from .col_enum import COL
+from .yamb_state import YambState
+from . import core
+from . import score_table
+
+SEED = 0x59414D42
+# grid square values are never negative and the most any square can score is a yamb of sixes
+MAX_VALUE = int(score_table.SCORE_TABLE.max())
+POLICIES = ("depth", "lru")
+
+
+def _random_keys(rng: np.random.Generator, shape: tuple) -> NDArray[np.uint64]:
+    keys = rng.integers(np.iinfo(np.uint64).max, size=shape, dtype=np.uint64, endpoint=True)
+    keys.flags.writeable = False
+    return keys
+
+_rng = np.random.default_rng(SEED)
+# CELL_KEYS[row, col, value] is XORed in once that grid square is filled out with value
+CELL_KEYS = _random_keys(_rng, (len(ROW), len(COL), MAX_VALUE + 1))
+# ROLL_KEYS[face, count] for each face of the roll, including the faces which weren't rolled
+ROLL_KEYS = _random_keys(_rng, (6, score_table.NUM_DICE + 1))
+ROLL_NUMBER_KEYS = _random_keys(_rng, (3,))
+# ANNOUNCE_KEYS[0] when not announced and ANNOUNCE_KEYS[announced_row + 1] when announced
+ANNOUNCE_KEYS = _random_keys(_rng, (len(ROW) + 1,))
+del _rng
+
+# the same keys as nested lists of Python ints for the incremental updates
+_CELL = CELL_KEYS.tolist()
+_ROLL = ROLL_KEYS.tolist()
+_ROLL_NUMBER = ROLL_NUMBER_KEYS.tolist()
+_ANNOUNCE = ANNOUNCE_KEYS.tolist()
+_NAN = YambState.NAN
+_NUM_ROWS = len(ROW)
+_ROW_COL_FILL_IDX = core.ACTION_ROW_COL_FILL_IDX
+# the values each roll fills out the rows with, looking a roll up by its tuple is quicker than roll_to_index
+_SCORES = {tuple(roll): scores for roll, scores in zip(score_table.ROLLS.tolist(), score_table.SCORE_TABLE.tolist())}
+
+
+def announce_index(announced: int, announced_row: int) -> int:
+    """
+    :return: index of the announce state in ANNOUNCE_KEYS
+    """
+    return announced_row + 1 if announced else 0
+
+def state_key(state: YambState) -> int:
+    """
+    :return: Zobrist key of the whole state
+    """
+    key = _ROLL_NUMBER[state.roll_number] ^ _ANNOUNCE[announce_index(state.announced, state.announced_row)]
+    for face, count in enumerate(state.roll.tolist()):
+        key ^= _ROLL[face][count]
+    for row, values in enumerate(state.grid.tolist()):
+        for col, value in enumerate(values):
+            if value != _NAN:
+                key ^= _CELL[row][col][value]
+    return key
+
+def grid_keys(grids: NDArray[np.integer]) -> NDArray[np.uint64]:
+    """
+    :param grids: (..., 14, 4) grids
+
+    :return: (...) Zobrist key of the grid squares of each grid, the part of state_key which comes from the grid
+    """
+    grids = np.asarray(grids)
+    filled = grids != _NAN
+    values = np.where(filled, grids, 0)
+    rows, cols = np.arange(len(ROW))[:, None], np.arange(len(COL))[None, :]
+    keys = np.where(filled, CELL_KEYS[rows, cols, values], np.uint64(0))
+    return np.bitwise_xor.reduce(keys.reshape(grids.shape[:-2] + (-1,)), axis=-1)
+
+def reroll_key(key: int, roll: List[int], new_roll: List[int]) -> int:
+    """
+    :param roll: counts of the faces of the roll as a list
+    :param new_roll: counts of the faces of the roll it changes to as a list
+
+    :return: key with the faces which differ between roll and new_roll changed over
+    """
+    for face in range(6):
+        count, new_count = roll[face], new_roll[face]
+        if count != new_count:
+            key ^= _ROLL[face][count] ^ _ROLL[face][new_count]
+    return key
+
+def apply(key: int, state: YambState, action: NDArray[np.int64], dice: NDArray[np.int64]) -> int:
+    """Updates the key of state for core.apply(state, action, dice), call it before core.apply changes the state
+
+    :param key: the key of state
+    :param action: numpy array of length 9 which check_action has accepted
+    :param dice: the dice which will be rolled, see core.apply
+
+    :return: the key of the state after core.apply
+    """
+    roll_number = state.roll_number
+    roll, action, dice = state.roll.tolist(), action.tolist(), dice.tolist()
+    key ^= _ROLL_NUMBER[roll_number]
+    if roll_number == 2:
+        col, row = divmod(action[_ROW_COL_FILL_IDX], _NUM_ROWS)
+        key ^= _CELL[row][col][_SCORES[tuple(roll)][row]]
+        key ^= _ANNOUNCE[announce_index(state.announced, state.announced_row)] ^ _ANNOUNCE[0]
+        return reroll_key(key, roll, dice) ^ _ROLL_NUMBER[0]
+    if roll_number == 0:
+        key ^= _ANNOUNCE[0] ^ _ANNOUNCE[announce_index(action[core.ACTION_ANNOUNCE_IDX], action[core.ACTION_ANNOUNCE_ROW_IDX])]
+    key = reroll_key(key, roll, [count + kept for count, kept in zip(dice, action)])
+    return key ^ _ROLL_NUMBER[roll_number + 1]
+
+
+class TranspositionTable:
+    """A table of values keyed by Zobrist keys which never grows past its size. The entries are kept in buckets of
+    bucket_size, the bucket of a key being key % number of buckets, and once a bucket is full storing another key
+    replaces one of its entries according to the policy:
+
+    - depth: the entry with the lowest depth, of those the least recently used. Depth is however much work went into
+      the value, e.g. the turns searched or the rollouts averaged, so cheap values make way for dearer ones
+    - lru: the least recently used entry
+
+    Only the keys are compared, two states whose keys collide share an entry, which for 64-bit keys is too unlikely
+    to matter.
+
+    :param size: the most entries, rounded down to a whole number of buckets
+    :param bucket_size: entries per bucket
+    :param policy: one of POLICIES
+
+    :param stats: hits and misses of get, stores, and replacements of an entry by a different key
+    """
+    def __init__(self, size: int, bucket_size: int = 4, policy: str = "depth"):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy {policy}, expected one of {POLICIES}")
+        if size < bucket_size or bucket_size < 1:
+            raise ValueError(f"Size {size} must be at least the bucket size {bucket_size}, which must be positive")
+        self.policy = policy
+        self.num_buckets = size // bucket_size
+        self.bucket_size = bucket_size
+        # an entry is empty when its depth is -1
+        self.keys = np.zeros((self.num_buckets, bucket_size), dtype=np.uint64)
+        self.values = np.zeros((self.num_buckets, bucket_size), dtype=np.float64)
+        self.depths = np.full((self.num_buckets, bucket_size), -1, dtype=np.int32)
+        self.used = np.zeros((self.num_buckets, bucket_size), dtype=np.int64)
+        self.clock = 0
+        self.stats: Dict[str, int] = dict(hits=0, misses=0, stores=0, replacements=0)
+
+    @property
+    def size(self) -> int:
+        return self.num_buckets * self.bucket_size
+
+    @property
+    def nbytes(self) -> int:
+        return self.keys.nbytes + self.values.nbytes + self.depths.nbytes + self.used.nbytes
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def __len__(self) -> int:
+        return int((self.depths >= 0).sum())
+
+    def _find(self, key: int) -> Tuple[int, Optional[int]]:
+        bucket = key % self.num_buckets
+        for slot in range(self.bucket_size):
+            if self.depths[bucket, slot] >= 0 and int(self.keys[bucket, slot]) == key:
+                return bucket, slot
+        return bucket, None
+
+    def get(self, key: int, min_depth: int = 0) -> Optional[Tuple[float, int]]:
+        """
+        :param key: Zobrist key
+        :param min_depth: entries with a lower depth count as misses
+
+        :return: value and depth stored for key, None on a miss
+        """
+        bucket, slot = self._find(key)
+        if slot is None or self.depths[bucket, slot] < min_depth:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        self.clock += 1
+        self.used[bucket, slot] = self.clock
+        return float(self.values[bucket, slot]), int(self.depths[bucket, slot])
+
+    def store(self, key: int, value: float, depth: int = 0):
+        """Stores a value for key. With the depth policy a value of the same key with a greater depth isn't replaced.
+
+        :param key: Zobrist key
+        :param value: value to store
+        :param depth: non-negative work that went into value
+        """
+        if depth < 0:
+            raise ValueError(f"Depth must be non-negative but got {depth}")
+        bucket, slot = self._find(key)
+        if slot is None:
+            # an empty entry has depth -1 and was last used at 0, so it is the first replaced under either policy
+            depths, used = self.depths[bucket], self.used[bucket]
+            slot = int(np.lexsort((used, depths))[0] if self.policy == "depth" else np.argmin(used))
+            if self.depths[bucket, slot] >= 0:
+                self.stats["replacements"] += 1
+        elif self.policy == "depth" and depth < self.depths[bucket, slot]:
+            return
+        self.stats["stores"] += 1
+        self.clock += 1
+        self.keys[bucket, slot] = key
+        self.values[bucket, slot] = value
+        self.depths[bucket, slot] = depth
+        self.used[bucket, slot] = self.clock
+
+    def clear(self):
+        """Empties the table and resets the stats"""
+        self.depths[:] = -1
+        self.used[:] = 0
+        self.clock = 0
+        self.stats.update(hits=0, misses=0, stores=0, replacements=0)